@@ -0,0 +1,125 @@
+"""
+Measure the import time and CLI startup of htms with `python -X importtime`.
+
+    python benchmarks/importtime.py                  # this tree
+    python benchmarks/importtime.py --ref HEAD~1     # compare with a commit
+
+Reports the median cumulative import time of each module over a number of
+fresh interpreters, the wall time of `python -m htms --help`, and the
+slowest imports pulled in by `import htms.HTMSLParser`.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCHMARKS_DIR.parent / "src"
+
+MODULES = ["htms", "htms.__main__", "htms.HTMSLParser"]
+
+
+def run_python(
+    src_dir: Path, *args: str, check: bool = True
+) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(src_dir)}
+    return subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=check
+    )
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every imported module."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        # import time: <self us> | <cumulative us> | <indented module name>
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def measure_import(src_dir: Path, module: str, repeat: int) -> Dict[str, int]:
+    runs = []
+    for _ in range(repeat):
+        process = run_python(src_dir, "-X", "importtime", "-c", f"import {module}")
+        runs.append(parse_importtime(process.stderr))
+    return {
+        name: int(statistics.median(r.get(name, 0) for r in runs))
+        for name in runs[-1]
+    }
+
+
+def measure_help(src_dir: Path, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # older trees take `--help` for a spec file and exit with an error after
+        # the same imports, which is still the startup time being compared
+        run_python(src_dir, "-m", "htms", "--help", check=False)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def measure(src_dir: Path, repeat: int) -> Dict[str, float]:
+    result = {}
+    for module in MODULES:
+        times = measure_import(src_dir, module, repeat)
+        result[f"import {module} (ms)"] = times[module] / 1000
+    result["python -m htms --help (ms)"] = measure_help(src_dir, repeat) * 1000
+    return result
+
+
+def export_ref(ref: str, dest: Path) -> Path:
+    archive = subprocess.run(
+        ["git", "archive", ref, "src"],
+        cwd=BENCHMARKS_DIR.parent,
+        capture_output=True,
+        check=True,
+    ).stdout
+    subprocess.run(["tar", "-x", "-C", str(dest)], input=archive, check=True)
+    return dest / "src"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--ref", help="git ref to compare against")
+    arg_parser.add_argument("--repeat", type=int, default=7)
+    arg_parser.add_argument("--top", type=int, default=15)
+    args = arg_parser.parse_args()
+
+    current = measure(SRC_DIR, args.repeat)
+
+    baseline = None
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = measure(export_ref(args.ref, Path(tmp)), args.repeat)
+
+    header = f"{'':<32}{'this tree':>12}"
+    if baseline:
+        header += f"{args.ref:>12}{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, value in current.items():
+        line = f"{name:<32}{value:>12.1f}"
+        if baseline:
+            line += f"{baseline[name]:>12.1f}{baseline[name] / value:>9.2f}x"
+        print(line)
+
+    print("\nSlowest imports of htms.HTMSLParser (cumulative ms):")
+    times = measure_import(SRC_DIR, "htms.HTMSLParser", args.repeat)
+    # `site` is imported at interpreter startup, before htms
+    times.pop("site", None)
+    for name, us in sorted(times.items(), key=lambda x: -x[1])[1 : args.top + 1]:
+        print(f"  {us / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Benchmark htms scraping specs against the local fixture server.
+
+    python benchmarks/run.py                      # all specs, serial
+    python benchmarks/run.py --concurrency 16     # start_async()
+    python benchmarks/run.py table slow --compare benchmarks/results/old.json
+
+Each spec runs in its own process so peak RSS is per spec. Reports
+pages/sec, rows/sec, p50/p99 request latency and peak RSS, and saves the
+results as JSON under benchmarks/results/.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+SPECS_DIR = BENCHMARKS_DIR / "specs"
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / "src"))
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def count_rows(output) -> int:
+    if not output:
+        return 0
+    return sum(len(v) if isinstance(v, list) else 1 for v in output.values())
+
+
+def run_spec(spec_path: str, base_url: str, concurrency: int, parse_workers: int):
+    """Run one spec in this process and return its measurements."""
+    from htms.HTMSLParser import HTMSParser
+
+    logging.getLogger("htms").setLevel(logging.WARNING)
+
+    latencies = []
+    rows = 0
+
+    class BenchmarkParser(HTMSParser):
+        def _fetch_page(self, url, method, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super()._fetch_page(url, method, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        def _finish_request(self, req, req_output):
+            nonlocal rows
+            rows += count_rows(req_output)
+            return super()._finish_request(req, req_output)
+
+    spec = Path(spec_path).read_text().replace("{{base_url}}", base_url)
+
+    parser = BenchmarkParser(parse_workers=parse_workers)
+    parser.feed(spec)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if concurrency or parse_workers:
+            asyncio.run(parser.start_async(concurrency=concurrency or 16))
+        else:
+            parser.start()
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+
+    return {
+        "pages": len(latencies),
+        "rows": rows,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(len(latencies) / elapsed, 2),
+        "rows_per_sec": round(rows / elapsed, 2),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "peak_rss_mb": round(max_rss / 1024 / 1024, 2),
+    }
+
+
+def run_spec_in_subprocess(spec: str, base_url: str, args) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json") as f:
+        subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                str(SPECS_DIR / f"{spec}.html"),
+                "--base-url",
+                base_url,
+                "--concurrency",
+                str(args.concurrency),
+                "--parse-workers",
+                str(args.parse_workers),
+                "--output",
+                f.name,
+            ],
+            check=True,
+        )
+        return json.loads(Path(f.name).read_text())
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict = None):
+    header = f"{'spec':<10}{'pages/s':>10}{'rows/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for spec, r in results.items():
+        line = (
+            f"{spec:<10}{r['pages_per_sec']:>10}{r['rows_per_sec']:>12}"
+            f"{r['latency_p50_ms']:>10}{r['latency_p99_ms']:>10}{r['peak_rss_mb']:>10}"
+        )
+        old = (baseline or {}).get(spec)
+        if old and old["rows_per_sec"]:
+            line += f"   rows/s x{r['rows_per_sec'] / old['rows_per_sec']:.2f} vs baseline"
+        print(line)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument(
+        "specs",
+        nargs="*",
+        help="spec names from benchmarks/specs (default: all)",
+    )
+    arg_parser.add_argument("--concurrency", type=int, default=0)
+    arg_parser.add_argument("--parse-workers", type=int, default=0)
+    arg_parser.add_argument("--compare", metavar="RESULTS_FILE")
+    arg_parser.add_argument("--child", metavar="SPEC_FILE", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        result = run_spec(args.child, args.base_url, args.concurrency, args.parse_workers)
+        Path(args.output).write_text(json.dumps(result))
+        return
+
+    from server import start_server
+
+    specs = args.specs or sorted(p.stem for p in SPECS_DIR.glob("*.html"))
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {}
+    for spec in specs:
+        print(f"Running '{spec}'...", file=sys.stderr)
+        results[spec] = run_spec_in_subprocess(spec, base_url, args)
+    server.shutdown()
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+    print_results(results, baseline)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{get_git_commit()}.json"
+    path.write_text(
+        json.dumps(
+            {
+                "commit": get_git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "concurrency": args.concurrency,
+                "parse_workers": args.parse_workers,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"Saved results to '{path}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Local stand-in HTTP server for the benchmarks. Serves synthetic,
+paginated fixtures:
+
+  /table?page=N   HTML table, `rows` rows x `fields` columns per page
+  /nested?page=N  HTML list whose rows are nested `depth` divs deep
+  /api?page=N     JSON API page with `rows` results
+
+Every route accepts `delay` (milliseconds) to simulate a slow upstream,
+and pages link to the next one until `pages`.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULTS = {"page": 1, "pages": 10, "rows": 100, "fields": 10, "depth": 20, "delay": 0}
+
+
+def get_params(query: str):
+    qs = parse_qs(query)
+    return {k: int(qs[k][0]) if k in qs else v for k, v in DEFAULTS.items()}
+
+
+def render_table(p) -> bytes:
+    rows = []
+    for i in range(p["rows"]):
+        cells = "".join(
+            f"<td class='f{j}'>{p['page']}-{i}-{j}</td>" for j in range(p["fields"])
+        )
+        rows.append(f"<tr><td class='id'><a href='/item/{p['page']}/{i}'>{i}</a></td>{cells}</tr>")
+    next_link = (
+        f"<a class='next' href='?page={p['page'] + 1}&pages={p['pages']}'>next</a>"
+        if p["page"] < p["pages"]
+        else ""
+    )
+    return (
+        "<html><head><title>table</title></head><body>"
+        f"<div class='pagination'><span class='total'>{p['pages']}</span>{next_link}</div>"
+        f"<table><tbody>{''.join(rows)}</tbody></table>"
+        "</body></html>"
+    ).encode()
+
+
+def render_nested(p) -> bytes:
+    rows = []
+    for i in range(p["rows"]):
+        inner = f"<h2>title {p['page']}-{i}</h2><p>summary {i}</p><span>{i * 1000:,}</span>"
+        for _ in range(p["depth"]):
+            inner = f"<div>{inner}</div>"
+        rows.append(f"<article>{inner}</article>")
+    return f"<html><body><main>{''.join(rows)}</main></body></html>".encode()
+
+
+def render_api(p) -> bytes:
+    results = [
+        {
+            "id": f"{p['page']}-{i}",
+            "title": f"title {i}",
+            "fields": {f"f{j}": j for j in range(p["fields"])},
+        }
+        for i in range(p["rows"])
+    ]
+    next_page = p["page"] + 1 if p["page"] < p["pages"] else None
+    return json.dumps({"page": p["page"], "next": next_page, "results": results}).encode()
+
+
+ROUTES = {
+    "/table": (render_table, "text/html; charset=utf-8"),
+    "/nested": (render_nested, "text/html; charset=utf-8"),
+    "/api": (render_api, "application/json"),
+}
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path not in ROUTES:
+            self.send_error(404)
+            return
+
+        params = get_params(url.query)
+        if params["delay"]:
+            time.sleep(params["delay"] / 1000)
+
+        render, content_type = ROUTES[url.path]
+        body = render(params)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(port: int = 0) -> ThreadingHTTPServer:
+    """Start the fixture server in a background thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    server = start_server(8000)
+    print(f"Serving fixtures on http://127.0.0.1:{server.server_port}")
+    threading.Event().wait()
@@ -1,12 +1,34 @@
 from html.parser import HTMLParser
-from lxml import html
-from rich import print
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import json
+import logging
+from collections import deque
+from itertools import takewhile
+import time
+from dataclasses import replace
 from pathlib import Path
-from htms.constants import DEFAULT_HEADERS
-from typing import List, Dict, Optional, Any, Union
-from htms.tags.RequestListTag import RequestListTag
+from htms.constants import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_PROGRESS_INTERVAL,
+    DEFAULT_STREAM_BATCH_SIZE,
+    VERBOSITY_NORMAL,
+    VERBOSITY_QUIET,
+)
+from typing import (
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Dict,
+    Optional,
+    Any,
+    Tuple,
+    Union,
+    TYPE_CHECKING,
+)
+from htms.tags.RequestListTag import RequestListTag, ListRequest
 from htms.tags.ItemTag import ItemTag
 from htms.tags.ListTag import ListTag
 from htms.tags.RequestTag import RequestTag
@@ -20,13 +42,40 @@ from htms.tags.constants import (
     REQUEST_LIST_TAG,
     REQUEST_TAG,
     HTML_RESPONSE_TYPE,
-    JSON_RESPONSE_TYPE,
     EXPORT_TAG,
     HEADER_TAG,
     VARIABLE_TAG,
 )
 from htms.TemplateEngine import TemplateEngine
-from htms.utils import make_cookie_jar_from_str
+from htms.session import SessionPool
+from htms.scheduler import HostScheduler, HostLimits, get_host
+from htms.retry import RetryPolicy, DeadLetter, FetchError
+from htms.cache import ResponseCache, make_cache_key
+from htms.checkpoint import Checkpoint, request_fingerprint
+from htms.extract import (
+    get_response_body,
+    parse_document,
+    run_parsers,
+    set_json_backend,
+    to_plain_data,
+)
+from htms.metrics import Metrics, STAGE_METRIC, set_metrics
+from htms.progress import ProgressReporter
+from htms.plan import (
+    ExecutionPlan,
+    PlanCache,
+    bind_export_types,
+    get_spec_key,
+    validate_plan,
+)
+from htms.pagination import Paginator
+from htms.frontier import Frontier
+from htms.streaming import iter_rows
+
+if TYPE_CHECKING:
+    # only needed by start_async(), imported when it runs
+    import asyncio
+    from htms.parallel import ParsePool
 
 """
 Notes
@@ -44,6 +93,10 @@ Notes
 
 DISPLAY_SAMPLE_DATA_COUNT = 3
 
+# start_async() fetches at most concurrency * FETCH_WINDOW_FACTOR requests
+# ahead of the response being processed
+FETCH_WINDOW_FACTOR = 2
+
 TagMap = {
     REQUEST_TAG: RequestTag,
     LIST_TAG: ListTag,
@@ -56,15 +109,68 @@ TagMap = {
 
 
 class HTMSParser(HTMLParser):
-    def __init__(self):
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        cache_ttl: Optional[float] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        parse_workers: int = 0,
+        metrics: Optional[Metrics] = None,
+        metrics_path: Optional[str] = None,
+        verbosity: int = VERBOSITY_NORMAL,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        frontier: Optional[Frontier] = None,
+        dedup: bool = True,
+        json_backend: str = "auto",
+    ):
         super().__init__()
         self.requests: List[RequestTag] = []
         self.request_generators: List[RequestListTag] = []
+        # plan of the loaded spec, see load_spec()
+        self.plan: Optional[ExecutionPlan] = None
         self.global_parsers: Dict[str, ItemTag] = {}
         self.exports = []
         self.parents: List[ItemTag] = []
         self.variables: Dict[str, str] = {}
         self.template_engine = TemplateEngine()
+        self.sessions = SessionPool(pool_size=pool_size)
+        self.scheduler = HostScheduler()
+        self.retry_policy = retry_policy or RetryPolicy()
+        # requests that failed after all retries, see rerun_dead_letters()
+        self.dead_letters: List[DeadLetter] = []
+        # responses are cached when `cache_ttl` or a request's `cache` attribute
+        # is set; the default cache is created on first use
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        # finished requests are recorded to and restored from the checkpoint
+        self.checkpoint = checkpoint
+        # with start_async(), parse pages in this many worker processes
+        self.parse_workers = parse_workers
+        # per-stage timings and counters, written to `metrics_path` at the
+        # end of a run; disabled unless given or `metrics_path` is set
+        if metrics is None:
+            metrics = Metrics(enabled=metrics_path is not None)
+        self.metrics = metrics
+        self.metrics_path = metrics_path
+        # sample rows are only printed from normal verbosity up, quiet runs
+        # report progress every `progress_interval` seconds instead
+        self.verbosity = verbosity
+        self.progress_interval = progress_interval
+        self.progress = ProgressReporter(enabled=False)
+        # requests already seen in this run are skipped, across all request
+        # lists and follow-ups, unless `dedup` is off
+        if frontier is None and dedup:
+            frontier = Frontier()
+        self.frontier = frontier
+        # decoder of JSON responses, see htms.extract.set_json_backend()
+        self.json_backend = json_backend
+
+        # only set while start_async() is running
+        self._fetch_executor: Optional[ThreadPoolExecutor] = None
+        self._fetch_window = 0
+        self._parse_pool: Optional["ParsePool"] = None
 
     def handle_starttag(self, tag: str, attrs: List[tuple]):
         attrs_dict = dict(attrs)
@@ -78,7 +184,11 @@ class HTMSParser(HTMLParser):
         if "children" in attrs_dict:
             raise ValueError("Attribute named 'children' is not allowed")
 
-        tag_ins = TagMap[tag].from_attrs(attrs_dict)
+        try:
+            tag_ins = TagMap[tag].from_attrs(attrs_dict)
+        except ValueError as e:
+            line, col = self.getpos()
+            raise ValueError(f"<{tag}> at line {line}, column {col}: {e}") from e
 
         if len(self.parents) > 0:
             tag_ins.parent = self.parents[-1]
@@ -98,12 +208,12 @@ class HTMSParser(HTMLParser):
 
         elif isinstance(tag_ins, VariableTag):
             if tag_ins.name in self.template_engine.variables:
-                logger.error(f"Variable with name '{tag_ins.name}' already exists")
+                logger.error("Variable with name '%s' already exists", tag_ins.name)
             else:
                 self.template_engine.variables[tag_ins.name] = tag_ins.get_value()
 
         else:
-            logger.error(f"Unknown tag: {tag}")
+            logger.debug("Unknown tag: %s", tag)
 
         self.parents.append(tag_ins)
 
@@ -121,20 +231,220 @@ class HTMSParser(HTMLParser):
 
         return res
 
-    def _fetch_page(
-        self, url: str, method: str, **kwargs
-    ) -> Optional[requests.Response]:
+    def compile(self) -> ExecutionPlan:
+        """
+        Validate the fed spec and resolve the parsers of its requests once.
+        Raises ValueError listing every problem found.
+        """
+        for req in self.requests + self.request_generators:
+            self._fill_request_with_parser_objs(req)
+
+        plan = ExecutionPlan(
+            requests=list(self.requests),
+            request_generators=list(self.request_generators),
+            global_parsers=dict(self.global_parsers),
+            variables=dict(self.template_engine.variables),
+        )
+        errors = validate_plan(plan)
+        if errors:
+            raise ValueError("Invalid spec:\n" + "\n".join(errors))
+        bind_export_types(plan)
+        return plan
+
+    def load_plan(self, plan: ExecutionPlan):
+        self.requests = list(plan.requests)
+        self.request_generators = list(plan.request_generators)
+        self.global_parsers = dict(plan.global_parsers)
+        self.template_engine.variables = dict(plan.variables)
+
+    def load_spec(
+        self, spec: str, plan_cache: Optional[PlanCache] = None
+    ) -> ExecutionPlan:
+        """
+        Feed and compile a spec, or load its compiled plan from `plan_cache`
+        if the same spec was compiled before.
+        """
+        key = get_spec_key(spec)
+        plan = plan_cache.load(key) if plan_cache is not None else None
+
+        if plan is None:
+            self.feed(spec)
+            plan = self.compile()
+            if plan_cache is not None:
+                plan_cache.save(key, plan)
+        else:
+            logger.info("Loaded compiled plan '%s'", plan_cache.get_path(key))
+            self.load_plan(plan)
+
+        self.plan = plan
+        return plan
+
+    def _send(
+        self, url: str, method: str, limits: Optional[HostLimits] = None, **kwargs
+    ) -> requests.Response:
+        ticket = self.scheduler.acquire(url, limits)
+        response = None
+        start = time.perf_counter()
         try:
-            response = requests.request(method, url, **kwargs)
-            response.raise_for_status()
+            response = self.sessions.get(url).request(method, url, **kwargs)
             return response
         except requests.RequestException as e:
-            logger.error(f"Request failed for {url}: {e}")
-            return None
+            self.metrics.inc(
+                "request_errors_total", host=ticket.host, error=type(e).__name__
+            )
+            raise
+        finally:
+            if self.metrics.enabled:
+                self._observe_send(
+                    ticket.host,
+                    ticket.queued_seconds,
+                    start,
+                    response,
+                    kwargs.get("stream", False),
+                )
+            if response is not None:
+                self.scheduler.release(ticket, response.status_code, response.headers)
+            else:
+                self.scheduler.release(ticket)
+
+    def _observe_send(
+        self,
+        host: str,
+        queued_seconds: float,
+        start: float,
+        response: Optional[requests.Response],
+        streamed: bool = False,
+    ):
+        self.metrics.observe(STAGE_METRIC, queued_seconds, stage="queue", host=host)
+        if response is None:
+            return
+        self.metrics.inc("responses_total", host=host, status=response.status_code)
+        if streamed:
+            # the body is read while it is parsed, see _process_stream()
+            wait = response.elapsed.total_seconds()
+            self.metrics.observe(STAGE_METRIC, wait, stage="wait", host=host)
+            return
+
+        # `elapsed` ends when the headers are parsed, so it covers DNS,
+        # connect and waiting for the server; the rest is the body download
+        total = time.perf_counter() - start
+        wait = min(response.elapsed.total_seconds(), total)
+        self.metrics.observe(STAGE_METRIC, wait, stage="wait", host=host)
+        self.metrics.observe(STAGE_METRIC, total - wait, stage="download", host=host)
+        self.metrics.inc("response_bytes_total", len(response.content), host=host)
+
+    def _get_cache(self) -> ResponseCache:
+        if self.cache is None:
+            self.cache = ResponseCache()
+        return self.cache
+
+    def _fetch_page(
+        self,
+        url: str,
+        method: str,
+        limits: Optional[HostLimits] = None,
+        retry: Optional[RetryPolicy] = None,
+        cache_ttl: Optional[float] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Fetch a page through the response cache when a cache TTL is set for
+        the request or the parser. Fresh cached pages are returned without
+        any network I/O; stale ones are revalidated with ETag/Last-Modified.
+        """
+        if cache_ttl is None:
+            cache_ttl = self.cache_ttl
+        # streamed bodies are parsed as they download and never cached
+        if cache_ttl is None or kwargs.get("stream"):
+            with self.metrics.span("fetch", host=get_host(url)):
+                return self._fetch_with_retry(url, method, limits, retry, **kwargs)
+
+        host = get_host(url)
+        with self.metrics.span("fetch", host=host):
+            cache = self._get_cache()
+            key = make_cache_key(method, url, kwargs.get("headers"))
+            entry = cache.get(key, cache_ttl)
+
+            if entry is not None and entry.is_fresh(cache_ttl):
+                logger.debug("Cache hit for %s", url)
+                self.metrics.inc("cache_total", host=host, result="hit")
+                return entry.to_response()
+
+            if entry is not None:
+                kwargs["headers"] = {
+                    **entry.get_validators(),
+                    **kwargs.get("headers", {}),
+                }
+
+            response = self._fetch_with_retry(url, method, limits, retry, **kwargs)
+
+            if entry is not None and response.status_code == 304:
+                cache.refresh(key)
+                self.metrics.inc("cache_total", host=host, result="revalidated")
+                return entry.to_response()
+
+            cache.put(key, response)
+            self.metrics.inc("cache_total", host=host, result="miss")
+            return response
+
+    def _fetch_with_retry(
+        self,
+        url: str,
+        method: str,
+        limits: Optional[HostLimits] = None,
+        retry: Optional[RetryPolicy] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request, retrying transient failures according to `retry`.
+        Raises FetchError once all attempts are used up.
+        """
+        retry = retry or self.retry_policy
+        deadline = retry.get_deadline()
+        error = None
+
+        for attempt in range(1, retry.max_attempts + 1):
+            timeout = retry.get_timeout(deadline)
+            if timeout is not None and timeout <= 0:
+                error = error or "retry budget exhausted"
+                attempt -= 1
+                break
+
+            try:
+                response = self._send(url, method, limits, timeout=timeout, **kwargs)
+                if response.status_code not in retry.retry_statuses:
+                    response.raise_for_status()
+                    return response
+                error = f"HTTP {response.status_code}"
+                response.close()
+            except requests.RequestException as e:
+                error = e
+                if not retry.is_retryable(e):
+                    break
+
+            if attempt < retry.max_attempts:
+                delay = retry.get_delay(attempt)
+                if deadline is not None:
+                    delay = min(delay, max(0.0, deadline - time.monotonic()))
+                logger.warning(
+                    "Attempt %d failed for %s: %s, retrying in %.2fs",
+                    attempt,
+                    url,
+                    error,
+                    delay,
+                )
+                self.metrics.inc("retries_total", host=get_host(url))
+                time.sleep(delay)
+
+        raise FetchError(url, attempt, error)
 
     def _fill_request_with_parser_objs(
-        self, req: Union[RequestTag, RequestListTag]
+        self, req: Union[RequestTag, RequestListTag, ListRequest]
     ) -> List[ItemTag]:
+        if isinstance(req, ListRequest) or req.parsers:
+            # already resolved, by compile() or by its request list; list
+            # requests read them from the template and can't be assigned
+            return
         parsers = list(
             filter(
                 lambda x: isinstance(x, ItemTag) or isinstance(x, ListTag),
@@ -143,83 +453,223 @@ class HTMSParser(HTMLParser):
         )
         for pn in req.parser_names:
             if pn not in self.global_parsers:
-                logger.error(f"Parser '{pn}' not found")
+                logger.error("Parser '%s' not found", pn)
                 continue
             p = self.global_parsers[pn]
             parsers.append(p)
         req.parsers = parsers
 
-    def start_request(self, req: RequestTag):
-        self._fill_request_with_parser_objs(req)
-
-        logger.info(f"Starting request: {req}")
-        url = req.url
-        method = req.method
-
+    def _build_request_params(self, req: RequestTag) -> Dict[str, Any]:
+        # default headers are attached to the pooled session
         request_params = {
-            "headers": {**DEFAULT_HEADERS, **req.headers},
+            "headers": req.headers,
             # "params": req.get("params", {}),
             # "data": req.get("data", {}),
             # "json": req.get("json", {}),
         }
+        if req.stream is not None:
+            request_params["stream"] = True
 
         if req.cookies:
-            req.cookies = self.template_engine.replace_variables(req.cookies)
+            cookies = self.template_engine.replace_variables(req.cookies)
 
             try:
-                cookiejar = make_cookie_jar_from_str(req.cookies)
-                request_params["cookies"] = cookiejar
+                self.sessions.set_cookies(req.url, cookies)
             except Exception as e:
-                logger.error(f"Failed to parse cookies:", e)
+                logger.error("Failed to parse cookies: %s", e)
+
+        return request_params
 
-        
-        logger.debug(f"Request: {req}")
-        logger.info(f"[{method}] '{url}'")
+    def fetch_request(self, req: RequestTag) -> Optional[requests.Response]:
+        request_params = self._build_request_params(req)
 
-        # Fetch the web page
-        response = self._fetch_page(url, method, **request_params)
+        logger.debug("Request: %s", req)
+        logger.info("[%s] '%s'", req.method, req.url)
+
+        try:
+            return self._fetch_page(
+                req.url,
+                req.method,
+                limits=req.limits,
+                retry=req.retry,
+                cache_ttl=req.cache_ttl,
+                **request_params,
+            )
+        except FetchError as e:
+            logger.error(str(e))
+            self.dead_letters.append(DeadLetter(req, str(e.error), e.attempts))
+            self.metrics.inc("dead_letters_total", host=get_host(req.url))
+            return None
+
+    def process_response(
+        self, req: RequestTag, response: Optional[requests.Response]
+    ) -> Optional[Dict[str, Any]]:
+        if response is None:
+            return None
+
+        if req.stream is not None:
+            return self._finish_request(req, self._process_stream(req, response))
 
         # with open("output.html", "w", encoding="utf-8") as f:
         #     f.write(response.text)
 
-        response_value = response.text
-
-        if req.response_type == HTML_RESPONSE_TYPE:
-            try:
-                tree = html.fromstring(response.content)
-            except Exception as e:
-                logger.error(f"Failed to parse document:", e)
-                return
-        elif req.response_type == JSON_RESPONSE_TYPE:
-            try:
-                tree = json.loads(response_value)
-            except Exception as e:
-                logger.error(f"Failed to parse JSON:", e)
-                return
-        else:
-            logger.error(f"Invalid response type: {req.response_type}")
+        try:
+            body, encoding = get_response_body(response)
+            with self.metrics.span("document_parse", response_type=req.response_type):
+                tree = parse_document(body, req.response_type, encoding)
+        except Exception as e:
+            logger.error("Failed to parse %s document: %s", req.response_type, e)
             return
 
+        # queue the next pages before parsing this one, so they are already
+        # being fetched while the parsers run
+        self._find_pages(req, tree, response)
+
+        req_output = run_parsers(tree, req, req.parsers)
+
+        return self._finish_request(req, req_output)
+
+    def _process_stream(
+        self, req: RequestTag, response: requests.Response
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Parse a streamed response row by row. Rows of the lists in
+        `req.row_sinks` are written to those exports in batches and not
+        kept; the other rows make up the output as usual.
+        """
         req_output = {p.get_id_or_name(): [] for p in req.parsers}
-        logger.info(f"Request output template: {req_output}")
+        batches = {name: [] for name in req.row_sinks}
 
-        for p in req.parsers:
-            name = p.get_id_or_name()
-            if p.many:
-                req_output[name] += p.parse(tree, req)
-            else:
-                req_output[name] = p.parse(tree, req)
+        def flush(name: str):
+            rows = batches[name]
+            for export_tag in req.row_sinks[name]:
+                export_tag.write({name: rows})
+            req.streamed_rows += len(rows)
+            self.metrics.inc("rows_total", len(rows), parser=name)
+            batches[name] = []
+
+        try:
+            with self.metrics.span("stream_parse", response_type=req.response_type):
+                for name, row in iter_rows(response, req):
+                    batch = batches.get(name)
+                    if batch is None:
+                        req_output[name].append(row)
+                        continue
+                    batch.append(row)
+                    if len(batch) >= DEFAULT_STREAM_BATCH_SIZE:
+                        flush(name)
+            for name in batches:
+                flush(name)
+        except Exception as e:
+            logger.error(
+                "Failed to parse streamed %s document: %s", req.response_type, e
+            )
+            return None
+        finally:
+            if self.metrics.enabled and hasattr(response.raw, "tell"):
+                self.metrics.inc(
+                    "response_bytes_total", response.raw.tell(), host=get_host(req.url)
+                )
+            response.close()
+
+        if req.streamed_rows:
+            logger.debug("Streamed %d rows of '%s'", req.streamed_rows, req.url)
+        return req_output
 
+    def _finish_request(
+        self, req: RequestTag, req_output: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Generate follow-ups, checkpoint and print a parsed request output."""
+        if req_output is None:
+            return None
+
+        self._generate_follow_ups(req, req_output)
+        if req.paginator is not None:
+            req.paginator.record_output(req_output)
+
+        if self.checkpoint is not None:
+            self.checkpoint.record(
+                request_fingerprint(req), req.url, req_output, req.next_pages
+            )
+
+        if self.metrics.enabled:
+            self.metrics.inc("pages_total", response_type=req.response_type)
+            for name, value in req_output.items():
+                rows = len(value) if isinstance(value, list) else 1
+                self.metrics.inc("rows_total", rows, parser=name)
+
+        # output_stats = {k: len(v) for k, v in req_output.items()}
+        # logger.info(f"Output stats: {output_stats}")
+        self._print_output_samples(req_output)
+
+        return req_output
+
+    def _find_pages(self, req: RequestTag, tree: Any, response: requests.Response):
+        if req.paginator is None:
+            return
+        try:
+            urls = req.pagination.find_page_urls(
+                tree, response.url or req.url, req.is_first_page
+            )
+        except Exception as e:
+            logger.error("Failed to find pages on '%s': %s", req.url, e)
+            return
+        self._add_pages(req, urls)
+
+    def _add_pages(self, req: RequestTag, urls: List[str]):
+        req.next_pages = urls
+        added = req.paginator.add_urls(urls)
+        if added:
+            logger.info("Found %d more pages of '%s'", added, req.paginator.request.url)
+            self.progress.add_total(added)
+
+    def _generate_follow_ups(self, req: RequestTag, req_output: Dict[str, Any]):
+        for p in req.parsers:
             if p.has_follow_up():
+                # the output may come from a checkpoint or a parse worker
+                p.value = req_output.get(p.get_id_or_name())
                 follow_up_req_list = p.generate_requests()
                 self.request_generators.append(follow_up_req_list)
                 logger.info(
-                    f"Generated {len(follow_up_req_list._list)} follow-up requests"
+                    "Generated %d follow-up requests", len(follow_up_req_list._list)
                 )
 
-        # output_stats = {k: len(v) for k, v in req_output.items()}
-        # logger.info(f"Output stats: {output_stats}")
-        for k, v in req_output.items():
+    def _restore_from_checkpoint(self, req: RequestTag) -> Optional[Dict[str, Any]]:
+        """
+        Output of `req` if it already finished in a previous run. Follow-up
+        requests are generated again from the restored output.
+        """
+        if self.checkpoint is None:
+            return None
+
+        req_output = self.checkpoint.get(request_fingerprint(req))
+        if req_output is None:
+            return None
+
+        logger.info("Restored from checkpoint: '%s'", req.url)
+        self._generate_follow_ups(req, req_output)
+        if req.paginator is not None:
+            fingerprint = request_fingerprint(req)
+            self._add_pages(req, self.checkpoint.get_pages(fingerprint))
+            req.paginator.record_output(req_output)
+
+        return req_output
+
+    def _advance_progress(self, req: RequestTag, req_output: Optional[Dict[str, Any]]):
+        if not self.progress.enabled:
+            return
+        rows = req.streamed_rows
+        if req_output is not None:
+            for value in req_output.values():
+                rows += len(value) if isinstance(value, list) else 1
+        self.progress.advance(failed=req_output is None, rows=rows)
+
+    def _print_output_samples(self, output: Dict[str, Any]):
+        if self.verbosity < VERBOSITY_NORMAL:
+            return
+        from rich import print
+
+        for k, v in output.items():
             print(f"{k}:")
             if isinstance(v, list):
                 for i in range(
@@ -232,101 +682,694 @@ class HTMSParser(HTMLParser):
                     print(f"... and {len(v) - DISPLAY_SAMPLE_DATA_COUNT} more")
             else:
                 print(v)
-        # print(req_output)
 
+    def _merge_request_output(
+        self,
+        output: Dict[str, Any],
+        req_output: Dict[str, Any],
+        request_list: Union[RequestListTag, RequestTag],
+    ):
+        if req_output is None:
+            return
+
+        for k, v in req_output.items():
+            if k in request_list.concat:
+                output[k] += v
+            else:
+                output[k].append(v)
+
+    def _open_stream_exports(
+        self,
+        request_list: Union[RequestListTag, RequestTag],
+        reqs: List[RequestTag],
+    ) -> List[ExportTag]:
+        stream_tags = request_list.get_stream_export_tags()
+        for export_tag in stream_tags:
+            export_tag.open()
+
+        row_sinks = self._get_row_sinks(request_list)
+        for req in reqs:
+            req.row_sinks = row_sinks
+        return stream_tags
+
+    def _get_row_sinks(
+        self, request_list: Union[RequestListTag, RequestTag]
+    ) -> Dict[str, List[ExportTag]]:
+        """
+        Streaming exports that the rows of a streamed list are written to
+        while the response is parsed, for each list whose rows nothing else
+        needs: no other export, follow-up or checkpoint.
+        """
+        if request_list.stream is None or self.checkpoint is not None:
+            return {}
+
+        export_tags = request_list.get_export_tags()
+        names = [p.get_id_or_name() for p in request_list.parsers]
+        selected = [t.get_parser(names) for t in export_tags]
+        if None in selected:
+            # an export of the whole output needs every row
+            return {}
+
+        row_sinks = {}
+        for p in request_list.parsers:
+            name = p.get_id_or_name()
+            tags = [t for t, pn in zip(export_tags, selected) if pn == name]
+            if tags and not p.has_follow_up() and all(t.is_streaming() for t in tags):
+                row_sinks[name] = tags
+        return row_sinks
+
+    def _collect_request_output(
+        self,
+        output: Dict[str, Any],
+        req_output: Optional[Dict[str, Any]],
+        request_list: Union[RequestListTag, RequestTag],
+        stream_tags: List[ExportTag],
+    ):
+        """
+        Stream a request's output to the streaming exports. It is only merged
+        into the request list output if something else still needs it, so
+        crawls exported by streaming exports only keep constant memory.
+        """
+        if req_output is None:
+            return
+
+        for export_tag in stream_tags:
+            export_tag.write(req_output)
+
+        if not stream_tags or request_list.get_export_tags() != stream_tags:
+            self._merge_request_output(output, req_output, request_list)
+
+    def _is_new_request(self, req: RequestTag) -> bool:
+        if self.frontier is None:
+            return True
+        self._fill_request_with_parser_objs(req)
+        if self.frontier.add(req):
+            return True
+        logger.debug("Skipping duplicate request '%s'", req.url)
+        self.metrics.inc("duplicates_total")
+        return False
+
+    def _filter_new_requests(self, reqs: List[RequestTag]) -> List[RequestTag]:
+        if self.frontier is None:
+            return reqs
+        return [req for req in reqs if self._is_new_request(req)]
+
+    def _iter_list_requests(
+        self, request_list: RequestListTag, template: RequestTag
+    ) -> Iterator[ListRequest]:
+        """
+        New requests of a request list, generated as they are consumed, so
+        a huge list never exists in memory at once. The progress total is
+        counted up front when the list has a length, else as it goes.
+        """
+        items = request_list.get_items()
+        total = len(items) if hasattr(items, "__len__") else None
+        if total is not None:
+            logger.info("Generating %d requests", total)
+            self.progress.add_total(total)
+
+        for req in request_list.iter_requests(items, template):
+            if total is None:
+                self.progress.add_total(1)
+            if self._is_new_request(req):
+                yield req
+            else:
+                self.progress.add_total(-1)
+
+    def start_request(self, req: RequestTag):
+        self._fill_request_with_parser_objs(req)
+
+        logger.debug("Starting request: %s", req)
+
+        req_output = self._restore_from_checkpoint(req)
+        if req_output is None:
+            with self.metrics.span("request", host=get_host(req.url)):
+                # Fetch the web page
+                response = self.fetch_request(req)
+                req_output = self.process_response(req, response)
+
+        self._advance_progress(req, req_output)
         return req_output
 
     def start_request_list(self, request_list: RequestListTag):
         self._fill_request_with_parser_objs(request_list)
 
-        logger.info(f"Starting request list: {request_list}")
+        logger.debug("Starting request list: %s", request_list)
 
-        requests = request_list.generate_requests()
-        logger.info(f"Generated {len(requests)} requests")
+        template = request_list.make_template()
+        requests = self._iter_list_requests(request_list, template)
 
         output = {p.get_id_or_name(): [] for p in request_list.parsers}
-        logger.info(f"Output template: {output}")
+        logger.debug("Output template: %s", output)
 
-        for req in requests:
-            req_output = self.start_request(req)
-            for k, v in req_output.items():
-                if k in request_list.concat:
-                    output[k] += v
-                else:
-                    output[k].append(v)
+        stream_tags = self._open_stream_exports(request_list, [template])
+        try:
+            for req in requests:
+                req_output = self.start_request(req)
+                self._collect_request_output(
+                    output, req_output, request_list, stream_tags
+                )
+        finally:
+            for export_tag in stream_tags:
+                export_tag.close()
 
         # output_stats = {k: len(v) for k, v in output.items()}
         # logger.info(f"Output stats: {output_stats}")
 
         # print the first 5 items for each key
-        for k, v in output.items():
-            print(f"{k}:")
-            if isinstance(v, list):
-                for i in range(
-                    DISPLAY_SAMPLE_DATA_COUNT
-                    if len(v) > DISPLAY_SAMPLE_DATA_COUNT
-                    else len(v)
-                ):
-                    print(v[i])
-                if len(v) > DISPLAY_SAMPLE_DATA_COUNT:
-                    print(f"... and {len(v) - DISPLAY_SAMPLE_DATA_COUNT} more")
+        self._print_output_samples(output)
+
+        return output
+
+    def start_paginated_request(self, req: RequestTag) -> Dict[str, Any]:
+        """
+        Run a paginated request and the pages found on it, merging their
+        outputs like a request list.
+        """
+        self._fill_request_with_parser_objs(req)
+
+        logger.debug("Starting paginated request: %s", req)
+
+        output = {p.get_id_or_name(): [] for p in req.parsers}
+        stream_tags = self._open_stream_exports(req, [req])
+        try:
+            # pages are added to the paginator while earlier ones are parsed
+            for page in Paginator(req):
+                req_output = self.start_request(page)
+                self._collect_request_output(output, req_output, req, stream_tags)
+        finally:
+            for export_tag in stream_tags:
+                export_tag.close()
+
+        self._print_output_samples(output)
+
+        return output
+
+    def start_streamed_request(self, req: RequestTag) -> Optional[Dict[str, Any]]:
+        """
+        Run a streamed request with its streaming exports open, so rows can
+        be written to them while the response is parsed.
+        """
+        stream_tags = self._open_stream_exports(req, [req])
+        try:
+            req_output = self.start_request(req)
+            if req_output is not None:
+                for export_tag in stream_tags:
+                    export_tag.write(req_output)
+        finally:
+            for export_tag in stream_tags:
+                export_tag.close()
+
+        return req_output
+
+    def _submit_fetch(self, req: RequestTag) -> "asyncio.Future":
+        """
+        Start fetching a request on the fetch executor right away, even
+        while the event loop is busy parsing. The executor has one thread
+        per in-flight request.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._fetch_executor, self.fetch_request, req)
+
+    async def _fetch_and_parse_async(
+        self, req: RequestTag, fetch: "asyncio.Future"
+    ) -> Union[requests.Response, Dict[str, Any], None]:
+        """
+        Wait for a request to be fetched, and parse it right away in the
+        parse pool if there is one. Returns the parsed output, or the
+        response to be parsed by process_response() otherwise.
+        """
+        response = await fetch
+        if response is None or self._parse_pool is None or req.stream is not None:
+            # streamed responses are parsed while they download, in this process
+            return response
+
+        keys = self._parse_pool.get_keys(req.parsers)
+        if keys is None:
+            return response
+
+        body, encoding = get_response_body(response)
+        if req.paginator is not None:
+            # pages are found in this process, so the next ones are fetched
+            # while the worker parses this one
+            try:
+                tree = parse_document(body, req.response_type, encoding)
+            except Exception as e:
+                logger.error(
+                    "Failed to parse %s document: %s", req.response_type, e
+                )
             else:
-                print(v)
+                self._find_pages(req, tree, response)
+
+        # per-parser stages run in the workers and are not collected, the
+        # time a page spends in the pool is recorded as `worker_parse`
+        import asyncio
+        from htms.parallel import parse_in_worker
+
+        loop = asyncio.get_running_loop()
+        with self.metrics.span("worker_parse", response_type=req.response_type):
+            return await loop.run_in_executor(
+                self._parse_pool.executor,
+                parse_in_worker,
+                body,
+                encoding,
+                req.response_type,
+                keys,
+                {"url": req.url, "method": req.method, "meta": to_plain_data(req.meta)},
+            )
+
+    async def _iter_request_outputs_async(
+        self, reqs: Iterable[RequestTag]
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Fetch requests concurrently and yield their outputs in order. Only a
+        bounded window of requests is fetched ahead of the one being
+        processed, so fetched responses don't pile up in memory, and
+        requests are only pulled from `reqs` when the window has room. Pages
+        added to a paginator are scheduled as soon as they are found.
+        """
+        import asyncio
+
+        reqs = iter(reqs)
+        pending = deque()
+
+        def schedule():
+            while len(pending) < self._fetch_window:
+                req = next(reqs, None)
+                if req is None:
+                    return
+                self._fill_request_with_parser_objs(req)
+                logger.debug("Starting request: %s", req)
+                if (
+                    self.checkpoint is not None
+                    and request_fingerprint(req) in self.checkpoint
+                ):
+                    # nothing to fetch, restored when its turn comes
+                    pending.append((req, None))
+                    continue
+                task = asyncio.ensure_future(
+                    self._fetch_and_parse_async(req, self._submit_fetch(req))
+                )
+                pending.append((req, task))
+
+        if isinstance(reqs, Paginator):
+            reqs.on_add = schedule
+
+        try:
+            while True:
+                schedule()
+                if not pending:
+                    break
+                req, task = pending.popleft()
+                if task is None:
+                    schedule()
+                    req_output = self._restore_from_checkpoint(req)
+                else:
+                    result = await task
+                    schedule()
+                    if isinstance(result, requests.Response):
+                        req_output = self.process_response(req, result)
+                    else:
+                        req_output = self._finish_request(req, result)
+                self._advance_progress(req, req_output)
+                yield req_output
+        finally:
+            for _, task in pending:
+                if task is not None:
+                    task.cancel()
+
+    async def start_requests_async(
+        self, reqs: List[RequestTag]
+    ) -> List[Optional[Dict[str, Any]]]:
+        return [o async for o in self._iter_request_outputs_async(reqs)]
+
+    async def start_paginated_request_async(self, req: RequestTag) -> Dict[str, Any]:
+        """Same as start_paginated_request(), fetching pages concurrently."""
+        self._fill_request_with_parser_objs(req)
+
+        logger.debug("Starting paginated request: %s", req)
+
+        output = {p.get_id_or_name(): [] for p in req.parsers}
+        stream_tags = self._open_stream_exports(req, [req])
+        try:
+            async for req_output in self._iter_request_outputs_async(Paginator(req)):
+                self._collect_request_output(output, req_output, req, stream_tags)
+        finally:
+            for export_tag in stream_tags:
+                export_tag.close()
+
+        self._print_output_samples(output)
+
+        return output
+
+    async def start_streamed_request_async(
+        self, req: RequestTag
+    ) -> Optional[Dict[str, Any]]:
+        """Same as start_streamed_request(), fetching in the fetch executor."""
+        stream_tags = self._open_stream_exports(req, [req])
+        try:
+            [req_output] = await self.start_requests_async([req])
+            if req_output is not None:
+                for export_tag in stream_tags:
+                    export_tag.write(req_output)
+        finally:
+            for export_tag in stream_tags:
+                export_tag.close()
+
+        return req_output
+
+    async def start_request_list_async(self, request_list: RequestListTag):
+        self._fill_request_with_parser_objs(request_list)
+
+        logger.debug("Starting request list: %s", request_list)
+
+        template = request_list.make_template()
+        requests = self._iter_list_requests(request_list, template)
+
+        output = {p.get_id_or_name(): [] for p in request_list.parsers}
+        logger.debug("Output template: %s", output)
+
+        stream_tags = self._open_stream_exports(request_list, [template])
+        try:
+            async for req_output in self._iter_request_outputs_async(requests):
+                self._collect_request_output(
+                    output, req_output, request_list, stream_tags
+                )
+        finally:
+            for export_tag in stream_tags:
+                export_tag.close()
+
+        self._print_output_samples(output)
 
         return output
 
+    def _export(self, export_tags: List[ExportTag], output: Optional[Dict[str, Any]]):
+        if output is None:
+            return
+        for export_tag in export_tags:
+            export_tag.export(output)
+
+    def rerun_dead_letters(self) -> List[Tuple[RequestTag, Optional[Dict[str, Any]]]]:
+        """
+        Run only the requests that failed in previous runs, without redoing
+        the successful ones, and export their outputs with the exports of the
+        spec request (list) they come from. Requests that fail again go back
+        to `dead_letters`.
+        """
+        dead_letters = self.dead_letters
+        self.dead_letters = []
+
+        logger.info("Re-running %d failed requests", len(dead_letters))
+        self._begin_run()
+        self.progress.add_total(len(dead_letters))
+
+        # requests by the index of the spec request (list) they come from
+        groups: Dict[Optional[int], List[RequestTag]] = {}
+        templates: Dict[int, RequestTag] = {}
+        for dl in dead_letters:
+            data = self._dead_letter_to_dict(dl)
+            req = self._make_rerun_request(data, templates)
+            groups.setdefault(data["request"], []).append(req)
+
+        spec_requests = self._get_spec_requests()
+        results = []
+        for index, reqs in groups.items():
+            source = spec_requests[index] if index is not None else None
+            results += self._rerun_requests(source, reqs)
+        self._finish_run()
+
+        return results
+
+    def _rerun_requests(
+        self,
+        source: Union[RequestTag, RequestListTag, None],
+        reqs: List[RequestTag],
+    ) -> List[Tuple[RequestTag, Optional[Dict[str, Any]]]]:
+        if source is None:
+            # follow-up requests have no exports
+            return [(req, self.start_request(req)) for req in reqs]
+
+        if isinstance(source, RequestTag) and source.pagination is None:
+            results = []
+            for req in reqs:
+                if req.stream is not None:
+                    output = self.start_streamed_request(req)
+                    self._export(source.get_batch_export_tags(), output)
+                else:
+                    output = self.start_request(req)
+                    self._export(source.get_export_tags(), output)
+                results.append((req, output))
+            return results
+
+        # pages and list requests are merged like in their request (list)
+        self._fill_request_with_parser_objs(source)
+        output = {p.get_id_or_name(): [] for p in source.parsers}
+        sink_reqs = [reqs[0].template] if isinstance(source, RequestListTag) else reqs
+        stream_tags = self._open_stream_exports(source, sink_reqs)
+        results = []
+        try:
+            for req in reqs:
+                req_output = self.start_request(req)
+                self._collect_request_output(output, req_output, source, stream_tags)
+                results.append((req, req_output))
+        finally:
+            for export_tag in stream_tags:
+                export_tag.close()
+        self._export(source.get_batch_export_tags(), output)
+
+        return results
+
+    def _get_spec_requests(self) -> List[Union[RequestTag, RequestListTag]]:
+        if self.plan is None:
+            return []
+        return self.plan.requests + self.plan.request_generators
+
+    def _get_request_source(self, req: RequestTag) -> Optional[int]:
+        """
+        Index of the spec request (list) a request comes from, None for
+        follow-up requests. Pages and list requests share its children.
+        """
+        for i, spec_req in enumerate(self._get_spec_requests()):
+            if req.children is spec_req.children:
+                return i
+        return None
+
+    def _dead_letter_to_dict(self, dl: DeadLetter) -> Dict[str, Any]:
+        data = dl.to_dict()
+        data["request"] = self._get_request_source(dl.request)
+        return data
+
+    def _make_rerun_request(
+        self, data: Dict[str, Any], templates: Dict[int, RequestTag]
+    ) -> RequestTag:
+        """Request of a dead letter, see _dead_letter_to_dict()."""
+        index = data.get("request")
+        if index is None:
+            return RequestTag(
+                url=data["url"],
+                parser_names=data.get("parsers", []),
+                method=data.get("method", "GET"),
+                meta=data.get("meta") or {},
+                response_type=data.get("type", HTML_RESPONSE_TYPE),
+            )
+
+        source = self._get_spec_requests()[index]
+        if isinstance(source, RequestListTag):
+            self._fill_request_with_parser_objs(source)
+            if index not in templates:
+                templates[index] = source.make_template()
+            return ListRequest(templates[index], data["url"], data.get("meta") or {})
+        # a single page, without following the pagination again
+        return replace(
+            source, url=data["url"], meta=data.get("meta") or {}, pagination=None
+        )
+
+    def save_dead_letters(self, path: str):
+        with open(path, "w") as f:
+            json.dump(
+                [self._dead_letter_to_dict(dl) for dl in self.dead_letters],
+                f,
+                indent=2,
+                default=str,
+            )
+        logger.info("Saved %d failed requests to '%s'", len(self.dead_letters), path)
+
+    def load_dead_letters(self, path: str):
+        """
+        Load requests saved by save_dead_letters() for rerun_dead_letters().
+        The spec they failed with must be loaded first.
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        spec_requests = self._get_spec_requests()
+        templates: Dict[int, RequestTag] = {}
+        for d in data:
+            if d.get("request") is not None and d["request"] >= len(spec_requests):
+                raise ValueError(
+                    f"Dead letter '{d['url']}' in '{path}' doesn't match the spec"
+                )
+            self.dead_letters.append(
+                DeadLetter(
+                    self._make_rerun_request(d, templates),
+                    d["error"],
+                    d.get("attempts", 0),
+                    d.get("failed_at", 0.0),
+                )
+            )
+        logger.info("Loaded %d failed requests from '%s'", len(data), path)
+
+    def _collect_parsers(self) -> List[ItemTag]:
+        """All top-level parsers any request of the spec can run."""
+        parsers = list(self.global_parsers.values())
+        for req in self.requests + self.request_generators:
+            self._fill_request_with_parser_objs(req)
+            parsers += req.parsers
+        return parsers
+
+    def _begin_run(self):
+        set_metrics(self.metrics)
+        logger.debug("JSON backend: %s", set_json_backend(self.json_backend))
+        self.progress = ProgressReporter(
+            enabled=self.verbosity <= VERBOSITY_QUIET,
+            interval=self.progress_interval,
+        )
+
+    def _finish_run(self):
+        self.progress.close()
+        if self.frontier is not None and self.frontier.skipped:
+            logger.info("Skipped %d duplicate requests", self.frontier.skipped)
+        self.sessions.close()
+        # the stats are only collected when they are logged
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Queued/wire time per host: %s", self.scheduler.stats())
+        if self.cache is not None:
+            logger.info(
+                "Cache: %d hits, %d stale, %d misses",
+                self.cache.hits,
+                self.cache.stale,
+                self.cache.misses,
+            )
+        if self.checkpoint is not None:
+            logger.info(
+                "Restored %d requests from checkpoint '%s'",
+                self.checkpoint.restored,
+                self.checkpoint.path,
+            )
+        if self.metrics_path is not None:
+            self.metrics.write(self.metrics_path)
+            logger.info("Saved metrics to '%s'", self.metrics_path)
+
     def start(self):
         if len(self.requests) == 0 and len(self.request_generators) == 0:
             return
 
         logger.info("Starting the scraping process")
+        self._begin_run()
+        if self.parse_workers:
+            logger.warning("Parse workers are only used by start_async()")
 
         self.output = []
+        output = None
 
         while len(self.requests) > 0 or len(self.request_generators) > 0:
-            logger.info(f"While loop: {len(self.requests)} requests left")
+            logger.debug("While loop: %d requests left", len(self.requests))
 
             export_tags = []
 
             if len(self.requests) > 0:
                 req = self.requests.pop(0)
-                output = self.start_request(req)
-                export_tags = req.get_export_tags()
+                if not self._is_new_request(req):
+                    continue
+                self.progress.add_total(1)
+                if req.pagination is not None:
+                    output = self.start_paginated_request(req)
+                    export_tags = req.get_batch_export_tags()
+                elif req.stream is not None:
+                    output = self.start_streamed_request(req)
+                    export_tags = req.get_batch_export_tags()
+                else:
+                    output = self.start_request(req)
+                    export_tags = req.get_export_tags()
             else:
                 req_gen = self.request_generators.pop(0)
                 output = self.start_request_list(req_gen)
-                export_tags = req_gen.get_export_tags()
+                # streaming exports were already written while the list ran
+                export_tags = req_gen.get_batch_export_tags()
 
-            for export_tag in export_tags:
-                export_tag.export(output)
+            self._export(export_tags, output)
 
             # print(req)
 
-            # pagination
-            # if the pagination-xpath is provided, then we will get the total pages
-            # and create a new request for each page
-            # assumes that the pagination-xpath returns a number
-            # and the url-template is not none and a python expression
-            # if req.get("pagination-xpath"):
-            #     print("Pagination detected")
-            #     total_page_el = tree.xpath(req["pagination-xpath"])
-            #     if len(total_page_el) > 0:
-            #         try:
-            #             total_pages = int(total_page_el[0])
-            #             for i in range(req["start"], total_pages + 1):
-            #                 next_url = eval(req["url-template"], {}, {"i": i})
-            #                 self.requests.append(
-            #                     {
-            #                         "method": req["method"],
-            #                         "url": next_url,
-            #                         "parser": req["parser"],
-            #                     }
-            #                 )
-            #             print(
-            #                 f"Added {total_pages - req['start'] + 1} pages to the request queue"
-            #             )
-            #         except Exception as e:
-            #             print(f"Failed to parse total pages:", e)
+        self._finish_run()
+
+        self.output.append(output)
+
+        return self.output
+
+    async def start_async(self, concurrency: int = DEFAULT_CONCURRENCY):
+        """
+        Same as start(), but fetch the requests of each batch concurrently
+        with at most `concurrency` requests in flight. Outputs, concat
+        semantics and export order are the same as start().
+
+        If the parser has `parse_workers`, pages are parsed in a process
+        pool as soon as they are fetched.
+        """
+        if len(self.requests) == 0 and len(self.request_generators) == 0:
+            return
+
+        logger.info("Starting the scraping process with concurrency %d", concurrency)
+
+        self.output = []
+        output = None
+        self._begin_run()
+        from htms.parallel import ParsePool
+
+        self._fetch_executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._fetch_window = concurrency * FETCH_WINDOW_FACTOR
+        if self.parse_workers:
+            self._parse_pool = ParsePool(
+                self.parse_workers, self._collect_parsers(), self.json_backend
+            )
+
+        try:
+            while len(self.requests) > 0 or len(self.request_generators) > 0:
+                logger.debug("While loop: %d requests left", len(self.requests))
+
+                # plain requests run as one concurrent batch, paginated and
+                # streamed ones with their own exports
+                reqs = list(takewhile(lambda r: not r.streams_exports(), self.requests))
+                if len(reqs) > 0:
+                    self.requests = self.requests[len(reqs) :]
+                    reqs = self._filter_new_requests(reqs)
+                    self.progress.add_total(len(reqs))
+                    outputs = await self.start_requests_async(reqs)
+                    for req, output in zip(reqs, outputs):
+                        self._export(req.get_export_tags(), output)
+                elif len(self.requests) > 0:
+                    req = self.requests.pop(0)
+                    if not self._is_new_request(req):
+                        continue
+                    self.progress.add_total(1)
+                    if req.pagination is not None:
+                        output = await self.start_paginated_request_async(req)
+                    else:
+                        output = await self.start_streamed_request_async(req)
+                    self._export(req.get_batch_export_tags(), output)
+                else:
+                    req_gen = self.request_generators.pop(0)
+                    output = await self.start_request_list_async(req_gen)
+                    self._export(req_gen.get_batch_export_tags(), output)
+        finally:
+            self._finish_run()
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown()
+                self._parse_pool = None
+            self._fetch_executor.shutdown(wait=False)
+            self._fetch_executor = None
 
         self.output.append(output)
 
@@ -1,13 +1,30 @@
-from importlib import resources
-
-try:
-    import tomllib
-except ModuleNotFoundError:
-    import tomli as tomllib
+from functools import lru_cache
+from typing import Any, Dict
 
 # Version of the realpython-reader package
 __version__ = "0.0.1"
 
-# Read URL of the Real Python feed from config file
-_cfg = tomllib.loads(resources.read_text("htms", "config.toml"))
-URL = _cfg["feed"]["url"]
+
+@lru_cache(maxsize=None)
+def _read_config() -> Dict[str, Any]:
+    from importlib import resources
+
+    try:
+        import tomllib
+    except ModuleNotFoundError:
+        import tomli as tomllib
+
+    return tomllib.loads(resources.read_text("htms", "config.toml"))
+
+
+def __getattr__(name: str) -> Any:
+    # the config and the parser are only loaded when they are first used,
+    # so importing htms (e.g. for `python -m htms --help`) stays cheap
+    if name == "URL":
+        # Read URL of the Real Python feed from config file
+        return _read_config()["feed"]["url"]
+    if name == "HTMSParser":
+        from htms.HTMSLParser import HTMSParser
+
+        return HTMSParser
+    raise AttributeError(f"module 'htms' has no attribute '{name}'")
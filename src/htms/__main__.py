@@ -1,24 +1,208 @@
-import sys
-from htms.HTMSLParser import HTMSParser
+import argparse
+from htms.constants import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RETRIES,
+    DEFAULT_CACHE_MAX_SIZE,
+    DEFAULT_PROGRESS_INTERVAL,
+    JSON_BACKENDS,
+    VERBOSITY_NORMAL,
+    VERBOSITY_QUIET,
+    VERBOSITY_VERBOSE,
+)
+from htms.utils import parse_duration
+from htms.logging import setup_logging
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m htms", description="Run an htms HTML file"
+    )
+    arg_parser.add_argument("file", help="path to the htms HTML file")
+    arg_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="fetch requests concurrently with at most N requests in flight",
+    )
+    arg_parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help="number of keep-alive connections kept per origin",
+    )
+    arg_parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="number of times a failed request is retried",
+    )
+    arg_parser.add_argument(
+        "--dead-letters",
+        metavar="FILE",
+        help="save requests that failed after all retries to a JSON file",
+    )
+    arg_parser.add_argument(
+        "--rerun-dead-letters",
+        metavar="FILE",
+        help="only run the failed requests saved by --dead-letters to FILE, "
+        "exporting them with the exports of the spec",
+    )
+    arg_parser.add_argument(
+        "--cache",
+        metavar="TTL",
+        help="cache responses on disk for TTL (e.g. 30m, 1h, 7d)",
+    )
+    arg_parser.add_argument(
+        "--cache-path",
+        metavar="FILE",
+        help="SQLite file of the response cache (default: ~/.cache/htms)",
+    )
+    arg_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_MAX_SIZE,
+        help="max size of the response cache in bytes",
+    )
+    arg_parser.add_argument(
+        "--resume",
+        metavar="STATE_FILE",
+        help="record finished requests to STATE_FILE and skip them when re-run",
+    )
+    arg_parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="parse pages in N worker processes (implies --concurrency)",
+    )
+    arg_parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="save per-stage timings and counters to FILE "
+        "(Prometheus text for .prom/.txt, JSON otherwise)",
+    )
+    arg_parser.add_argument(
+        "--plan-cache",
+        metavar="DIR",
+        nargs="?",
+        const="",
+        help="cache the compiled spec in DIR (default: ~/.cache/htms/plans) "
+        "so repeated runs skip parsing and validating it",
+    )
+    arg_parser.add_argument(
+        "--frontier",
+        choices=["memory", "disk", "bloom", "off"],
+        default="memory",
+        help="how requests already seen in the run are remembered to skip "
+        "duplicates: in memory, in a SQLite file (--frontier-path), in a "
+        "Bloom filter (less memory, rare false positives), or not at all",
+    )
+    arg_parser.add_argument(
+        "--frontier-path",
+        metavar="FILE",
+        default="htms-frontier.db",
+        help="SQLite file of the disk frontier, cleared at the start of a run",
+    )
+    arg_parser.add_argument(
+        "--json-backend",
+        choices=["auto", *JSON_BACKENDS],
+        default="auto",
+        help="decoder of JSON responses; auto picks the fastest one installed",
+    )
+    verbosity = arg_parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "-q",
+        "--quiet",
+        dest="verbosity",
+        action="store_const",
+        const=VERBOSITY_QUIET,
+        default=VERBOSITY_NORMAL,
+        help="only log warnings and report progress instead of sample rows",
+    )
+    verbosity.add_argument(
+        "-v",
+        "--verbose",
+        dest="verbosity",
+        action="store_const",
+        const=VERBOSITY_VERBOSE,
+        help="also log debug messages",
+    )
+    arg_parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=DEFAULT_PROGRESS_INTERVAL,
+        metavar="SECONDS",
+        help="seconds between progress reports in quiet mode",
+    )
+    return arg_parser.parse_args()
 
 
 def main():
+    args = parse_args()
+    file_name = args.file
+    setup_logging(args.verbosity)
 
-    # get first parameter from command line
-    if len(sys.argv) > 1:
-        file_name = sys.argv[1]
-    else:
-        print(f"Usage: {sys.argv[0]} <file.html>")
-        sys.exit(1)
+    # imported after parsing the arguments so `--help` and usage errors
+    # don't pay for requests, lxml and rich
+    from htms.HTMSLParser import HTMSParser
+    from htms.cache import ResponseCache
+    from htms.checkpoint import Checkpoint
+    from htms.retry import RetryPolicy
+    from htms.plan import PlanCache
+    from htms.frontier import Frontier, SqliteSeenSet, BloomSeenSet
 
     # read the file
     with open(file_name, "r") as f:
         sample_html = f.read()
+    if args.verbosity >= VERBOSITY_NORMAL:
         print(f"Loaded html from '{file_name}'")
 
-    parser = HTMSParser()
-    parser.feed(sample_html)
-    parser.start()
+    cache = None
+    if args.cache or args.cache_path:
+        cache = ResponseCache(args.cache_path, max_size=args.cache_size)
+
+    frontier = None
+    if args.frontier == "disk":
+        frontier = Frontier(SqliteSeenSet(args.frontier_path))
+    elif args.frontier == "bloom":
+        frontier = Frontier(BloomSeenSet())
+
+    parser = HTMSParser(
+        pool_size=args.pool_size,
+        retry_policy=RetryPolicy(max_attempts=args.retries + 1),
+        cache=cache,
+        cache_ttl=parse_duration(args.cache) if args.cache else None,
+        checkpoint=Checkpoint(args.resume) if args.resume else None,
+        parse_workers=args.parse_workers,
+        metrics_path=args.metrics,
+        verbosity=args.verbosity,
+        progress_interval=args.progress_interval,
+        frontier=frontier,
+        dedup=args.frontier != "off",
+        json_backend=args.json_backend,
+    )
+    plan_cache = None
+    if args.plan_cache is not None:
+        plan_cache = PlanCache(args.plan_cache or None)
+    parser.load_spec(sample_html, plan_cache)
+
+    if args.rerun_dead_letters:
+        parser.load_dead_letters(args.rerun_dead_letters)
+        parser.rerun_dead_letters()
+    elif args.concurrency or args.parse_workers:
+        import asyncio
+
+        asyncio.run(
+            parser.start_async(concurrency=args.concurrency or DEFAULT_CONCURRENCY)
+        )
+    else:
+        parser.start()
+
+    if frontier is not None:
+        frontier.close()
+
+    if args.dead_letters:
+        parser.save_dead_letters(args.dead_letters)
 
 
 if __name__ == "__main__":
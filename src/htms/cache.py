@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from htms.constants import DEFAULT_CACHE_MAX_SIZE, PACKAGE_NAME
+from htms.logging import logger
+
+# the cached body is stored decoded, so these no longer describe it
+DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def get_default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / PACKAGE_NAME
+
+
+def make_cache_key(method: str, url: str, headers: Optional[Dict[str, str]]) -> str:
+    headers = sorted((k.lower(), v) for k, v in (headers or {}).items())
+    raw = json.dumps([method.upper(), url, headers])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored_at < ttl
+
+    def get_validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        validators = {}
+        headers = CaseInsensitiveDict(self.headers)
+        if "ETag" in headers:
+            validators["If-None-Match"] = headers["ETag"]
+        if "Last-Modified" in headers:
+            validators["If-Modified-Since"] = headers["Last-Modified"]
+        return validators
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response._content = self.body
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = self.url
+        response.reason = "OK"
+        return response
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache in a SQLite file. Entries are keyed by
+    method, URL and request headers, expire after a TTL (stale entries are
+    revalidated with ETag/Last-Modified), and the least recently used ones
+    are evicted once the cache grows over `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+    ):
+        if path is None:
+            path = get_default_cache_dir() / "responses.sqlite"
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = str(path)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # entries found but older than the TTL, which need revalidating
+        self.stale = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[CacheEntry]:
+        """
+        Entry of `key`, fresh or not. It counts as a hit only when it is
+        fresh for `ttl`, stale entries are counted in `stale`.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status_code, headers, body, stored_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+
+            url, status_code, headers, body, stored_at = row
+            entry = CacheEntry(
+                key, url, status_code, json.loads(headers), body, stored_at
+            )
+            if ttl is None or entry.is_fresh(ttl):
+                self.hits += 1
+            else:
+                self.stale += 1
+        return entry
+
+    def put(self, key: str, response: requests.Response):
+        headers = {
+            k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS
+        }
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.url,
+                    response.status_code,
+                    json.dumps(headers),
+                    body,
+                    len(body),
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, key: str):
+        """Mark an entry as fresh again after a 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_size:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.debug("Evicted %d responses from the cache", evicted)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
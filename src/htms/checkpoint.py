@@ -0,0 +1,142 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from htms.logging import logger
+
+# key of the JSON objects that hold converted values in stored outputs
+TYPE_KEY = "__htms_type__"
+
+# restore converted values of stored outputs by their type
+TYPE_DECODERS = {
+    "decimal": Decimal,
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+}
+
+
+def encode_value(value: Any) -> Any:
+    """
+    `default` of json.dumps() for stored outputs: values of `type`
+    conversions keep their type, see decode_object().
+    """
+    if isinstance(value, Decimal):
+        return {TYPE_KEY: "decimal", "value": str(value)}
+    # datetime first, it is also a date
+    for name in ("datetime", "date", "time"):
+        if isinstance(value, getattr(datetime, name)):
+            return {TYPE_KEY: name, "value": value.isoformat()}
+    return str(value)
+
+
+def decode_object(obj: Dict[str, Any]) -> Any:
+    """`object_hook` of json.loads() restoring values of encode_value()."""
+    if TYPE_KEY in obj:
+        return TYPE_DECODERS[obj[TYPE_KEY]](obj["value"])
+    return obj
+
+
+def request_fingerprint(req) -> str:
+    """Identify a request by what it fetches and which parsers run on it."""
+    raw = json.dumps(
+        [
+            req.method.upper(),
+            req.url,
+            req.response_type,
+            [p.get_id_or_name() for p in req.parsers],
+        ]
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class Checkpoint:
+    """
+    Durable record of finished requests and their outputs in a SQLite file,
+    so an interrupted crawl can be resumed without fetching them again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.restored = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completed (
+                fingerprint TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                output TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                pages TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+        logger.info("Loaded checkpoint '%s' with %d finished requests", path, len(self))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM completed").fetchone()[0]
+
+    def __contains__(self, fingerprint: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM completed WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        return row is not None
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Output of a finished request, or None if it has not finished yet."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM completed WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        if row is None:
+            return None
+        self.restored += 1
+        return json.loads(row[0], object_hook=decode_object)
+
+    def get_pages(self, fingerprint: str) -> List[str]:
+        """Page URLs found on a finished page of a paginated request."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pages FROM completed WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return []
+        return json.loads(row[0])
+
+    def record(
+        self,
+        fingerprint: str,
+        url: str,
+        output: Dict[str, Any],
+        pages: Optional[List[str]] = None,
+    ):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completed "
+                "(fingerprint, url, output, completed_at, pages) VALUES (?, ?, ?, ?, ?)",
+                (
+                    fingerprint,
+                    url,
+                    json.dumps(output, default=encode_value),
+                    time.time(),
+                    json.dumps(pages) if pages else None,
+                ),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -6,3 +6,51 @@ DEFAULT_HEADERS = {
 }
 
 PACKAGE_NAME = "htms"
+
+# default number of in-flight requests for HTMSParser.start_async()
+DEFAULT_CONCURRENCY = 16
+
+# connections kept alive per origin by the session pool
+DEFAULT_POOL_SIZE = DEFAULT_CONCURRENCY
+
+# times a failed request is retried before it goes to the dead letters
+DEFAULT_RETRIES = 2
+
+# responses cache size in bytes before least recently used entries are evicted
+DEFAULT_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# streaming exporters flush every N records through a buffer of this many bytes
+DEFAULT_EXPORT_FLUSH_EVERY = 100
+DEFAULT_EXPORT_BUFFER_SIZE = 1024 * 1024
+# rows per record batch of columnar (Parquet) exports
+DEFAULT_EXPORT_BATCH_SIZE = 10_000
+
+# seconds between two progress reports
+DEFAULT_PROGRESS_INTERVAL = 2.0
+
+# verbosity of HTMSParser: quiet only logs warnings and reports progress,
+# normal also logs every request and prints sample rows, verbose adds debug logs
+VERBOSITY_QUIET = 0
+VERBOSITY_NORMAL = 1
+VERBOSITY_VERBOSE = 2
+
+# pages a paginated <request> fetches at most unless `max-pages` is set
+DEFAULT_MAX_PAGES = 1000
+
+# expected number of requests and false positive rate of the Bloom filter
+# frontier (--frontier bloom)
+DEFAULT_BLOOM_CAPACITY = 10_000_000
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+
+# bytes read from a streamed response at a time, and rows of a streamed list
+# written to its exports at once
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_STREAM_BATCH_SIZE = 1000
+
+# decoders of JSON responses, tried in this order when the backend is "auto"
+JSON_BACKENDS = ("orjson", "msgspec", "json")
+
+# rows of a list whose typed columns are converted at once, and the smallest
+# column converted with pyarrow.compute when it's installed
+DEFAULT_CONVERT_BATCH_SIZE = 10_000
+DEFAULT_VECTORIZE_MIN_SIZE = 256
@@ -0,0 +1,200 @@
+import datetime
+import re
+from decimal import Decimal
+from typing import Any, List, Optional
+
+from htms.constants import DEFAULT_VECTORIZE_MIN_SIZE
+
+# element types of the `type` attribute of <item> / <list>
+STR_TYPE = "str"
+INT_TYPE = "int"
+FLOAT_TYPE = "float"
+DECIMAL_TYPE = "decimal"
+BOOL_TYPE = "bool"
+DATE_TYPE = "date"
+DATETIME_TYPE = "datetime"
+TYPES = (
+    STR_TYPE,
+    INT_TYPE,
+    FLOAT_TYPE,
+    DECIMAL_TYPE,
+    BOOL_TYPE,
+    DATE_TYPE,
+    DATETIME_TYPE,
+)
+
+# texts of `bool` values
+TRUE_TEXTS = {"true", "1", "yes", "y", "on"}
+FALSE_TEXTS = {"false", "0", "no", "n", "off", ""}
+
+
+def to_number_text(value: str) -> str:
+    # commas are thousands separators, like `1,234.5`
+    return value.strip().replace(",", "")
+
+
+def to_int(value: Any, _: Optional[str]) -> int:
+    return int(to_number_text(value)) if isinstance(value, str) else int(value)
+
+
+def to_float(value: Any, _: Optional[str]) -> float:
+    return float(to_number_text(value)) if isinstance(value, str) else float(value)
+
+
+def to_decimal(value: Any, scale: Optional[str]) -> Decimal:
+    number = Decimal(to_number_text(value) if isinstance(value, str) else str(value))
+    if scale is not None:
+        number = number.quantize(Decimal(1).scaleb(-int(scale)))
+    return number
+
+
+def to_bool(value: Any, _: Optional[str]) -> bool:
+    if not isinstance(value, str):
+        return bool(value)
+    text = value.strip().lower()
+    if text in TRUE_TEXTS:
+        return True
+    if text in FALSE_TEXTS:
+        return False
+    raise ValueError(f"not a boolean: '{value}'")
+
+
+def to_str(value: Any, _: Optional[str]) -> str:
+    return str(value)
+
+
+def to_date(value: Any, fmt: Optional[str]) -> datetime.date:
+    if fmt is None:
+        return datetime.date.fromisoformat(value.strip())
+    return datetime.datetime.strptime(value.strip(), fmt).date()
+
+
+def to_datetime(value: Any, fmt: Optional[str]) -> datetime.datetime:
+    if fmt is None:
+        return datetime.datetime.fromisoformat(value.strip())
+    return datetime.datetime.strptime(value.strip(), fmt)
+
+
+CONVERT_FUNCTIONS = {
+    STR_TYPE: to_str,
+    INT_TYPE: to_int,
+    FLOAT_TYPE: to_float,
+    DECIMAL_TYPE: to_decimal,
+    BOOL_TYPE: to_bool,
+    DATE_TYPE: to_date,
+    DATETIME_TYPE: to_datetime,
+}
+
+
+class Converter:
+    """
+    Typed conversion of extracted values, from the `regex` and `type`
+    attributes. `regex` keeps the first group (or the whole match) of
+    the first match in the text, and `type` is one of TYPES with an
+    optional argument: the strptime format of `date` / `datetime`
+    (`datetime:%Y-%m-%d %H:%M`, ISO 8601 without one) or the number of
+    decimal places of `decimal` (`decimal:2`). Values that don't match
+    or don't convert become None.
+    """
+
+    def __init__(self, type: Optional[str] = None, regex: Optional[str] = None):
+        self.type = type
+        self.kind, _, arg = (type or STR_TYPE).partition(":")
+        self.arg = arg or None
+        if self.kind not in TYPES:
+            raise ValueError(f"Invalid type '{type}', expected one of {TYPES}")
+        if self.kind == DECIMAL_TYPE and self.arg and not self.arg.isdigit():
+            raise ValueError(
+                f"Invalid type '{type}', decimal places must be a number"
+            )
+
+        self.regex = None
+        if regex:
+            try:
+                self.regex = re.compile(regex)
+            except re.error as e:
+                raise ValueError(f"Invalid regex '{regex}': {e}") from e
+        self.function = CONVERT_FUNCTIONS[self.kind]
+
+    def __call__(self, value: Any) -> Any:
+        if value is None:
+            return None
+        if self.regex is not None:
+            match = self.regex.search(value if isinstance(value, str) else str(value))
+            if match is None:
+                return None
+            value = match.group(1) if self.regex.groups else match.group()
+        try:
+            return self.function(value, self.arg)
+        except (ValueError, TypeError, AttributeError, ArithmeticError):
+            return None
+
+    def convert_many(self, values: List[Any]) -> List[Any]:
+        """Convert a column of values, with pyarrow if it's installed."""
+        if (
+            self.regex is None
+            and self.kind in ARROW_CAST_TYPES
+            and len(values) >= DEFAULT_VECTORIZE_MIN_SIZE
+        ):
+            converted = cast_with_arrow(values, self.kind)
+            if converted is not None:
+                return converted
+        return [self(v) for v in values]
+
+    def get_arrow_type(self) -> Any:
+        """pyarrow type of the values, None for decimals without places."""
+        import pyarrow
+
+        if self.kind == DECIMAL_TYPE:
+            return pyarrow.decimal128(38, int(self.arg)) if self.arg else None
+        return {
+            STR_TYPE: pyarrow.string(),
+            INT_TYPE: pyarrow.int64(),
+            FLOAT_TYPE: pyarrow.float64(),
+            BOOL_TYPE: pyarrow.bool_(),
+            DATE_TYPE: pyarrow.date32(),
+            DATETIME_TYPE: pyarrow.timestamp("us"),
+        }[self.kind]
+
+
+# types cast by pyarrow.compute in convert_many()
+ARROW_CAST_TYPES = (INT_TYPE, FLOAT_TYPE)
+# texts pyarrow casts to int the same way int() does
+INT_TEXT_PATTERN = r"^[+-]?[0-9]+$"
+
+
+def cast_with_arrow(values: List[Any], kind: str) -> Optional[List[Any]]:
+    """
+    Cast a column of texts (or None) with pyarrow.compute, or None if pyarrow
+    is not installed, a value isn't a text or a text doesn't cast; those columns
+    are converted value by value, so the output doesn't depend on pyarrow.
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute as pc
+    except ImportError:
+        return None
+
+    if not all(v is None or isinstance(v, str) for v in values):
+        return None
+    try:
+        # lxml's text results are str subclasses, which pyarrow reads slowly
+        texts = pyarrow.array(
+            [v if v is None else str(v) for v in values], type=pyarrow.string()
+        )
+        texts = pc.replace_substring(pc.utf8_trim_whitespace(texts), ",", "")
+        if kind == INT_TYPE:
+            # pyarrow also reads hexadecimal ints, which int() does not
+            if not pc.all(pc.match_substring_regex(texts, INT_TEXT_PATTERN)).as_py():
+                return None
+            return pc.cast(texts, pyarrow.int64()).to_pylist()
+        return pc.cast(texts, pyarrow.float64()).to_pylist()
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        return None
+
+
+def json_default(value: Any) -> Any:
+    """`default` of json.dump() for typed values: ISO dates, exact decimals."""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
@@ -6,6 +6,7 @@ import importlib.resources
 
 from htms.HTMSLParser import HTMSParser
 from htms.constants import PACKAGE_NAME
+from htms.logging import setup_logging
 
 example_html_path = Path(importlib.resources.files(PACKAGE_NAME)) / "example_html"
 
@@ -19,6 +20,7 @@ def get_example_files():
 
 
 def main():
+    setup_logging()
     example_files = get_example_files()
 
     if len(sys.argv) < 2:
@@ -0,0 +1,300 @@
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set
+
+from htms.constants import (
+    DEFAULT_EXPORT_BUFFER_SIZE,
+    DEFAULT_EXPORT_FLUSH_EVERY,
+    DEFAULT_EXPORT_BATCH_SIZE,
+)
+from htms.converters import Converter, json_default
+from htms.logging import logger
+
+# when written data is fsync'ed to disk
+FSYNC_NEVER = "never"
+FSYNC_FLUSH = "flush"
+FSYNC_CLOSE = "close"
+FSYNC_POLICIES = (FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE)
+
+# column used for records that are not dictionaries
+VALUE_COLUMN = "value"
+
+
+class RecordWriter(ABC):
+    """
+    Base class of the streaming exporters: records are written as they
+    arrive and flushed every `flush_every` records, so a crash loses at
+    most the unflushed tail.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_every: int = DEFAULT_EXPORT_FLUSH_EVERY,
+        fsync: str = FSYNC_NEVER,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(
+                f"Invalid fsync policy '{fsync}', expected one of {FSYNC_POLICIES}"
+            )
+
+        self.path = path
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.count = 0
+        self.closed = False
+        self._pending = 0
+
+    def write(self, record: Any):
+        self._write(record)
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._flush()
+        if self.fsync == FSYNC_FLUSH:
+            self._fsync()
+        self._pending = 0
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._flush()
+            if self.fsync in (FSYNC_FLUSH, FSYNC_CLOSE):
+                self._fsync()
+        finally:
+            # e.g. the Parquet footer, without which earlier batches are lost
+            self._close()
+            self.closed = True
+
+    def _fsync(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            os.fsync(f.fileno())
+
+    @abstractmethod
+    def _write(self, record: Any):
+        ...
+
+    @abstractmethod
+    def _flush(self):
+        ...
+
+    @abstractmethod
+    def _close(self):
+        ...
+
+
+class JsonLinesWriter(RecordWriter):
+    """Write one JSON document per line."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self._file = open(
+            path, "w", encoding="utf-8", buffering=DEFAULT_EXPORT_BUFFER_SIZE
+        )
+
+    def _write(self, record: Any):
+        self._file.write(json.dumps(record, default=json_default))
+        self._file.write("\n")
+
+    def _flush(self):
+        self._file.flush()
+
+    def _fsync(self):
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class CsvWriter(RecordWriter):
+    """
+    Write records as CSV rows. The header is taken from the first record;
+    keys missing from it are ignored and nested values are JSON encoded.
+    """
+
+    def __init__(self, path: str, fieldnames: Optional[List[str]] = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.fieldnames = fieldnames
+        self._file = open(
+            path,
+            "w",
+            encoding="utf-8",
+            newline="",
+            buffering=DEFAULT_EXPORT_BUFFER_SIZE,
+        )
+        self._writer: Optional[csv.DictWriter] = None
+
+    def _write(self, record: Any):
+        if not isinstance(record, dict):
+            record = {VALUE_COLUMN: record}
+
+        if self._writer is None:
+            self._writer = csv.DictWriter(
+                self._file,
+                fieldnames=self.fieldnames or list(record.keys()),
+                extrasaction="ignore",
+            )
+            self._writer.writeheader()
+
+        self._writer.writerow(
+            {
+                k: (
+                    json.dumps(v, default=json_default)
+                    if isinstance(v, (dict, list))
+                    else v
+                )
+                for k, v in record.items()
+            }
+        )
+
+    def _flush(self):
+        self._file.flush()
+
+    def _fsync(self):
+        os.fsync(self._file.fileno())
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetWriter(RecordWriter):
+    """
+    Write records to a Parquet file in record batches of `batch_size` rows
+    (requires pyarrow). Unless a schema is given, it is inferred from the
+    batches: a column whose type widens in a later batch (e.g. all null,
+    then int, then float) or that only appears later is added with the
+    common type, rewriting the rows written so far. `column_types` are the
+    `type` attributes of columns whose Parquet type is declared instead.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        schema: Any = None,
+        batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+        column_types: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "Parquet export requires pyarrow, install it with "
+                "`pip install 'htms[parquet]'`"
+            ) from e
+
+        kwargs.setdefault("flush_every", batch_size)
+        super().__init__(path, **kwargs)
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.schema = schema
+        # a given schema is kept as is, columns missing from it are dropped
+        self.fixed_schema = schema is not None
+        self.column_types = column_types or {}
+        self._rows: List[Dict[str, Any]] = []
+        self._writer = None
+        self._dropped_columns: Set[str] = set()
+
+    def _write(self, record: Any):
+        if not isinstance(record, dict):
+            record = {VALUE_COLUMN: record}
+        self._rows.append(record)
+
+    def _flush(self):
+        if not self._rows:
+            return
+        if self.fixed_schema:
+            self._warn_dropped_columns()
+            batch = self._pa.RecordBatch.from_pylist(self._rows, schema=self.schema)
+        else:
+            batch = self._pa.RecordBatch.from_pylist(self._rows)
+            schema = self.get_merged_schema(batch.schema)
+            if self._writer is not None and schema != self.schema:
+                self._rewrite(schema)
+            self.schema = schema
+            batch = self._conform(batch)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self.schema)
+        self._writer.write_batch(batch)
+        self._rows = []
+
+    def get_merged_schema(self, inferred: Any) -> Any:
+        """Schema of the file so far merged with the schema of a new batch."""
+        fields = {f.name: f.type for f in self.schema} if self.schema else {}
+        for f in inferred:
+            declared = None
+            if f.name in self.column_types:
+                declared = Converter(self.column_types[f.name]).get_arrow_type()
+            if declared is not None:
+                fields[f.name] = declared
+            elif f.name in fields:
+                fields[f.name] = self._unify_types(fields[f.name], f.type)
+            else:
+                fields[f.name] = f.type
+        return self._pa.schema(list(fields.items()))
+
+    def _unify_types(self, a: Any, b: Any) -> Any:
+        """Common type of two batches of a column, a string if they have none."""
+        if a == b:
+            return a
+        schemas = [self._pa.schema([("c", a)]), self._pa.schema([("c", b)])]
+        try:
+            unified = self._pa.unify_schemas(schemas, promote_options="permissive")
+        except (self._pa.ArrowInvalid, self._pa.ArrowTypeError):
+            return self._pa.string()
+        return unified.field("c").type
+
+    def _conform(self, batch: Any, schema: Any = None) -> Any:
+        """Cast a batch to the file schema, with null columns for missing keys."""
+        schema = schema or self.schema
+        columns = []
+        for f in schema:
+            if f.name in batch.schema.names:
+                column = batch.column(f.name)
+                if column.type != f.type:
+                    column = column.cast(f.type)
+            else:
+                column = self._pa.nulls(batch.num_rows, f.type)
+            columns.append(column)
+        return self._pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    def _rewrite(self, schema: Any):
+        """Rewrite the batches written so far with a new schema."""
+        logger.info(
+            "Parquet columns of '%s' changed type or were added, rewriting "
+            "%d rows written so far",
+            self.path,
+            self.count - len(self._rows),
+        )
+        self._writer.close()
+        old_path = f"{self.path}.old"
+        os.replace(self.path, old_path)
+        self._writer = self._pq.ParquetWriter(self.path, schema)
+        for batch in self._pq.ParquetFile(old_path).iter_batches():
+            self._writer.write_batch(self._conform(batch, schema))
+        os.remove(old_path)
+
+    def _warn_dropped_columns(self):
+        names = set(self.schema.names)
+        for record in self._rows:
+            for key in record:
+                if key not in names and key not in self._dropped_columns:
+                    self._dropped_columns.add(key)
+                    logger.warning(
+                        "Column '%s' is not in the schema of '%s', dropping it",
+                        key,
+                        self.path,
+                    )
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
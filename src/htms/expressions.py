@@ -0,0 +1,82 @@
+import builtins
+import json
+import marshal
+import re
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Optional
+
+from lxml import html
+
+# builtins available inside tag expressions (parse, pre-parse, filter, ...)
+SAFE_BUILTIN_NAMES = (
+    "abs", "all", "any", "bool", "dict", "enumerate", "filter", "float",
+    "int", "isinstance", "len", "list", "map", "max", "min", "next", "range",
+    "reversed", "round", "set", "sorted", "str", "sum", "tuple", "zip",
+)  # fmt: skip
+
+
+def element_to_string(element):
+    return html.tostring(element, encoding="unicode")
+
+
+EXPRESSION_GLOBALS = {
+    "__builtins__": {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES},
+    "element_to_string": element_to_string,
+    "re": re,
+    "json": json,
+}
+
+
+@lru_cache(maxsize=None)
+def compile_source(source: str) -> CodeType:
+    try:
+        return compile(source, "<htms expression>", "eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression '{source}': {e.msg}") from e
+
+
+class Expression:
+    """
+    A Python expression from a tag attribute, compiled once and evaluated
+    with a restricted set of globals. Identical sources share one code
+    object.
+    """
+
+    __slots__ = ("source", "code")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.code = compile_source(source.strip())
+
+    def __call__(self, /, **names) -> Any:
+        return eval(self.code, EXPRESSION_GLOBALS, names)
+
+    def __reduce__(self):
+        # the code object is marshalled so unpickling (plan cache, parse
+        # workers) doesn't compile the source again
+        return (load_expression, (self.source, marshal.dumps(self.code)))
+
+    def __repr__(self) -> str:
+        return f"Expression({self.source!r})"
+
+
+def load_expression(source: str, code: bytes) -> Expression:
+    expression = Expression.__new__(Expression)
+    expression.source = source
+    expression.code = marshal.loads(code)
+    return expression
+
+
+def compile_expression(
+    source: Optional[str], identity: Optional[str] = None
+) -> Optional[Expression]:
+    """
+    Compile `source`, or return None if it is empty or just returns the
+    variable named `identity` (e.g. parse="value"), so callers can skip it.
+    """
+    if source is None or not source.strip():
+        return None
+    if identity is not None and source.strip() == identity:
+        return None
+    return Expression(source)
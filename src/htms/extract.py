@@ -0,0 +1,166 @@
+import codecs
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import requests
+from lxml import html
+
+from htms.constants import JSON_BACKENDS
+from htms.tags.constants import HTML_RESPONSE_TYPE, JSON_RESPONSE_TYPE
+from htms.expressions import element_to_string
+from htms.logging import logger
+from htms.metrics import get_metrics
+
+if TYPE_CHECKING:
+    from htms.tags.ItemTag import ItemTag
+    from htms.tags.RequestTag import RequestTag
+
+# name and loads function of the selected JSON decoder, see set_json_backend()
+_json_backend: Optional[Tuple[str, Callable[[bytes], Any]]] = None
+
+
+def _import_json_backend(name: str) -> Callable[[bytes], Any]:
+    if name == "orjson":
+        import orjson
+
+        return orjson.loads
+    if name == "msgspec":
+        import msgspec
+
+        return msgspec.json.decode
+    if name == "json":
+        return json.loads
+    raise ValueError(f"Unknown JSON backend '{name}', expected one of {JSON_BACKENDS}")
+
+
+def set_json_backend(name: str = "auto") -> str:
+    """
+    Select the JSON decoder of responses by name, or the fastest one that
+    is installed for "auto". Returns the name of the selected decoder.
+    """
+    global _json_backend
+    if name == "auto":
+        for candidate in JSON_BACKENDS:
+            try:
+                _json_backend = (candidate, _import_json_backend(candidate))
+                return candidate
+            except ImportError:
+                continue
+    try:
+        _json_backend = (name, _import_json_backend(name))
+    except ImportError as e:
+        raise ImportError(
+            f"JSON backend '{name}' is not installed, install it with 'pip install {name}'"
+        ) from e
+    return name
+
+
+def loads_json(body: bytes, encoding: Optional[str] = None) -> Any:
+    """
+    Decode a JSON body straight from bytes. Bodies declared in a charset
+    other than UTF-8 are decoded to str first. Documents the fast decoders
+    reject, such as NaN values, are decoded by the json module.
+    """
+    if _json_backend is None:
+        set_json_backend()
+    name, loads = _json_backend
+
+    if encoding is not None and _normalize_encoding(encoding) != "utf-8":
+        body = body.decode(encoding)
+    try:
+        return loads(body)
+    except Exception:
+        if name == "json":
+            raise
+        return json.loads(body)
+
+
+@lru_cache(maxsize=None)
+def _normalize_encoding(encoding: str) -> str:
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        logger.warning("Unknown charset '%s', decoding as UTF-8", encoding)
+        return "utf-8"
+
+
+def get_charset(response: requests.Response) -> Optional[str]:
+    """
+    Charset of the Content-Type header, or None to let the parser detect it
+    (requests falls back to ISO-8859-1 for any text/* response without one).
+    """
+    content_type = response.headers.get("content-type", "")
+    if "charset" not in content_type.lower():
+        return None
+    return requests.utils.get_encoding_from_headers(response.headers)
+
+
+def get_response_body(response: requests.Response) -> Tuple[bytes, Optional[str]]:
+    """
+    Body of a response as bytes, never decoded to str (which makes requests
+    detect the charset of bodies without one), and its declared charset.
+    """
+    return response.content, get_charset(response)
+
+
+@lru_cache(maxsize=None)
+def get_html_parser(encoding: Optional[str]) -> Optional[html.HTMLParser]:
+    """HTML parser forced to `encoding`, or None for lxml to sniff it."""
+    if encoding is None:
+        return None
+    try:
+        return html.HTMLParser(encoding=encoding)
+    except LookupError:
+        logger.warning("Unknown charset '%s', detecting it from the page", encoding)
+        return None
+
+
+def parse_document(
+    body: bytes, response_type: str, encoding: Optional[str] = None
+) -> Any:
+    """
+    Parse a response body into an lxml tree or JSON value, straight from
+    bytes. `encoding` is the charset of the Content-Type header; without
+    it lxml sniffs the charset from the document.
+    """
+    if response_type == HTML_RESPONSE_TYPE:
+        return html.fromstring(body, parser=get_html_parser(encoding))
+    elif response_type == JSON_RESPONSE_TYPE:
+        return loads_json(body, encoding)
+    raise ValueError(f"Invalid response type: {response_type}")
+
+
+def run_parsers(
+    tree: Any, req: "RequestTag", parsers: List["ItemTag"]
+) -> Dict[str, Any]:
+    metrics = get_metrics()
+    req_output = {p.get_id_or_name(): [] for p in parsers}
+
+    for p in parsers:
+        name = p.get_id_or_name()
+        with metrics.span("parser", parser=name):
+            value = p.parse(tree, req)
+        if p.many:
+            # lists from the parser are used as is instead of copied
+            req_output[name] = value if isinstance(value, list) else list(value)
+        else:
+            req_output[name] = value
+
+    return req_output
+
+
+def to_plain_data(value: Any) -> Any:
+    """
+    Convert parser output to plain Python data, e.g. before sending it to
+    another process: lxml smart strings become str and elements their HTML.
+    """
+    if isinstance(value, dict):
+        return {k: to_plain_data(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain_data(v) for v in value]
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, html.HtmlElement):
+        return element_to_string(value)
+    return value
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from htms.constants import DEFAULT_BLOOM_CAPACITY, DEFAULT_BLOOM_ERROR_RATE
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent URLs compare equal: lowercase scheme and
+    host, no default port or fragment, sorted query parameters and '/' for
+    an empty path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def url_fingerprint(req) -> bytes:
+    """
+    Identify a request by its method, normalized URL and parsers, so the
+    same page parsed by different parsers is not a duplicate.
+    """
+    raw = json.dumps(
+        [
+            req.method.upper(),
+            normalize_url(req.url),
+            [p.get_id_or_name() for p in req.parsers],
+        ]
+    )
+    return hashlib.sha256(raw.encode()).digest()[:16]
+
+
+class SeenSet(ABC):
+    """Set of request fingerprints seen by a Frontier."""
+
+    @abstractmethod
+    def add(self, fingerprint: bytes) -> bool:
+        """Add a fingerprint, returns False if it was seen before."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of fingerprints added."""
+
+    def close(self):
+        pass
+
+
+class MemorySeenSet(SeenSet):
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def add(self, fingerprint: bytes) -> bool:
+        with self._lock:
+            if fingerprint in self._seen:
+                return False
+            self._seen.add(fingerprint)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+
+class SqliteSeenSet(SeenSet):
+    """
+    Fingerprints in a SQLite file, for crawls too large to keep them in
+    memory. The file only lasts for one run and is cleared when opened.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("DROP TABLE IF EXISTS seen")
+        self._conn.execute("CREATE TABLE seen (fingerprint BLOB PRIMARY KEY)")
+        self._conn.commit()
+        self._count = 0
+
+    def add(self, fingerprint: bytes) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO seen VALUES (?)", (fingerprint,)
+            )
+            self._count += cursor.rowcount
+            return cursor.rowcount == 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+class BloomSeenSet(SeenSet):
+    """
+    Fixed-size Bloom filter of fingerprints. Uses far less memory than a
+    set, but a small fraction (`error_rate`) of new requests are mistaken
+    for duplicates and skipped.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_BLOOM_CAPACITY,
+        error_rate: float = DEFAULT_BLOOM_ERROR_RATE,
+    ):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, fingerprint: bytes):
+        # double hashing from the two halves of the fingerprint
+        h1 = int.from_bytes(fingerprint[:8], "little")
+        h2 = int.from_bytes(fingerprint[8:16], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, fingerprint: bytes) -> bool:
+        with self._lock:
+            new = False
+            for pos in self._positions(fingerprint):
+                byte, bit = divmod(pos, 8)
+                if not self._bits[byte] & (1 << bit):
+                    self._bits[byte] |= 1 << bit
+                    new = True
+            self._count += new
+            return new
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class Frontier:
+    """
+    Requests seen in one run, across all request lists and follow-ups, so
+    each page is only fetched once.
+    """
+
+    def __init__(self, seen: Optional[SeenSet] = None):
+        self.seen = seen if seen is not None else MemorySeenSet()
+        self.skipped = 0
+
+    def add(self, req) -> bool:
+        """Add a request, returns False if it was seen before."""
+        if self.seen.add(url_fingerprint(req)):
+            return True
+        self.skipped += 1
+        return False
+
+    def close(self):
+        self.seen.close()
@@ -0,0 +1,238 @@
+import re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+# a member name after '.', e.g. `items` in `$.items[*]`
+NAME_RE = re.compile(r"[^.\[\]\s]+")
+# an array slice inside brackets, e.g. `1:`, `:-2` or `::2`
+SLICE_RE = re.compile(r"(-?\d*):(-?\d*)(?::(-?\d*))?")
+INDEX_RE = re.compile(r"-?\d+")
+
+# a compiled step: the values matched by a selector in a list of values
+Step = Callable[[List[Any]], List[Any]]
+
+
+def select_member(name: str) -> Step:
+    # dotted paths index arrays with numbers too, like `pages.0.url`
+    index = int(name) if INDEX_RE.fullmatch(name) else None
+
+    def step(values: List[Any]) -> List[Any]:
+        out = []
+        for v in values:
+            if isinstance(v, dict):
+                if name in v:
+                    out.append(v[name])
+            elif index is not None and isinstance(v, list):
+                if -len(v) <= index < len(v):
+                    out.append(v[index])
+        return out
+
+    return step
+
+
+def select_key(name: str) -> Step:
+    # a quoted member name only matches object keys, even if it's a number
+    def step(values: List[Any]) -> List[Any]:
+        return [v[name] for v in values if isinstance(v, dict) and name in v]
+
+    return step
+
+
+def select_index(index: int) -> Step:
+    def step(values: List[Any]) -> List[Any]:
+        return [
+            v[index]
+            for v in values
+            if isinstance(v, list) and -len(v) <= index < len(v)
+        ]
+
+    return step
+
+
+def select_slice(s: slice) -> Step:
+    def step(values: List[Any]) -> List[Any]:
+        out = []
+        for v in values:
+            if isinstance(v, list):
+                out += v[s]
+        return out
+
+    return step
+
+
+def select_wildcard(values: List[Any]) -> List[Any]:
+    out = []
+    for v in values:
+        if isinstance(v, dict):
+            out += v.values()
+        elif isinstance(v, list):
+            out += v
+    return out
+
+
+def select_union(steps: List[Step]) -> Step:
+    def step(values: List[Any]) -> List[Any]:
+        out = []
+        for v in values:
+            for s in steps:
+                out += s([v])
+        return out
+
+    return step
+
+
+def select_descendants(selector: Step) -> Step:
+    """`..` and a selector: the selector applied to values and all their descendants."""
+
+    def step(values: List[Any]) -> List[Any]:
+        nodes = []
+        stack = values[::-1]
+        while stack:
+            v = stack.pop()
+            nodes.append(v)
+            if isinstance(v, dict):
+                stack += reversed(list(v.values()))
+            elif isinstance(v, list):
+                stack += reversed(v)
+        return selector(nodes)
+
+    return step
+
+
+def split_bracket(path: str, start: int) -> Tuple[List[str], int]:
+    """Comma separated parts of the bracket at `start`, and the position after it."""
+    parts = []
+    quote = None
+    begin = start + 1
+    for i in range(start + 1, len(path)):
+        c = path[i]
+        if quote:
+            if c == "\\":
+                continue
+            if c == quote and path[i - 1] != "\\":
+                quote = None
+        elif c in "'\"":
+            quote = c
+        elif c == ",":
+            parts.append(path[begin:i].strip())
+            begin = i + 1
+        elif c == "]":
+            parts.append(path[begin:i].strip())
+            return parts, i + 1
+    raise ValueError("unclosed '['")
+
+
+def compile_bracket_part(part: str) -> Step:
+    if part == "*":
+        return select_wildcard
+    if len(part) >= 2 and part[0] == part[-1] and part[0] in "'\"":
+        return select_key(re.sub(r"\\(.)", r"\1", part[1:-1]))
+    if INDEX_RE.fullmatch(part):
+        return select_index(int(part))
+    match = SLICE_RE.fullmatch(part)
+    if match:
+        start, stop, step = (int(x) if x else None for x in match.groups())
+        if step == 0:
+            raise ValueError("slice step can't be 0")
+        return select_slice(slice(start, stop, step))
+    if part.startswith("?"):
+        raise ValueError("filter expressions are not supported, use `filter`")
+    raise ValueError(f"invalid selector '[{part}]'")
+
+
+def compile_steps(path: str) -> List[Step]:
+    steps = []
+    pos = 0
+    if path.startswith("$"):
+        pos = 1
+    elif path and path[0] not in ".[":
+        # a relative path may start with a member name, like `user.name`
+        path = "." + path
+
+    while pos < len(path):
+        descendants = path.startswith("..", pos)
+        if descendants:
+            pos += 2
+        elif path[pos] == ".":
+            pos += 1
+
+        if pos < len(path) and path[pos] == "[":
+            parts, pos = split_bracket(path, pos)
+            selectors = [compile_bracket_part(p) for p in parts]
+            if len(selectors) == 1:
+                selector = selectors[0]
+            else:
+                selector = select_union(selectors)
+        elif pos < len(path) and path[pos] == "*":
+            pos += 1
+            selector = select_wildcard
+        else:
+            match = NAME_RE.match(path, pos)
+            if match is None or path[pos - 1] not in ".":
+                raise ValueError(f"expected a member name at {pos}")
+            pos = match.end()
+            selector = select_member(match.group())
+
+        steps.append(select_descendants(selector) if descendants else selector)
+    return steps
+
+
+def get_members(path: str) -> Optional[Tuple[str, ...]]:
+    """Names of a path made of non-numeric member names only, or None."""
+    if path.startswith("$."):
+        path = path[2:]
+    names = tuple(path.split("."))
+    for name in names:
+        if name in ("*", "$") or INDEX_RE.fullmatch(name):
+            return None
+        if not NAME_RE.fullmatch(name):
+            return None
+    return names
+
+
+class JsonPath:
+    """
+    A JSONPath compiled once and shared by every page, selecting values in
+    decoded JSON. Supports member names (`$.a.b`, `a.b`, `['a b']`),
+    indexes and slices (`[0]`, `[-1]`, `[1:10:2]`), wildcards (`*`,
+    `[*]`), unions (`[0,2]`, `['a','b']`) and recursive descent (`..a`).
+    Like an xpath, it returns the list of matched values.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self.steps = compile_steps(path.strip())
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON path '{path}': {e}") from e
+        # plain member names like `a.b` are looked up directly, without
+        # going through the steps
+        self.members = get_members(path.strip())
+
+    def __call__(self, data: Any) -> List[Any]:
+        if self.members is not None:
+            for name in self.members:
+                if not isinstance(data, dict) or name not in data:
+                    return []
+                data = data[name]
+            return [data]
+
+        values = [data]
+        for step in self.steps:
+            values = step(values)
+            if not values:
+                break
+        return values
+
+    def __reduce__(self):
+        # the compiled steps are closures, compiled again on load
+        return (JsonPath, (self.path,))
+
+    def __repr__(self) -> str:
+        return f"<JsonPath '{self.path}'>"
+
+
+@lru_cache(maxsize=None)
+def compile_json_path(path: str) -> JsonPath:
+    return JsonPath(path)
+
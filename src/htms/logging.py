@@ -1,9 +1,37 @@
 import logging
-from rich.logging import RichHandler
 
-FORMAT = "%(message)s"
-logging.basicConfig(
-    level="INFO", format=FORMAT, datefmt="[%X]", handlers=[RichHandler()]
+from htms.constants import (
+    PACKAGE_NAME,
+    VERBOSITY_NORMAL,
+    VERBOSITY_QUIET,
+    VERBOSITY_VERBOSE,
 )
 
-logger = logging.getLogger("rich")
+FORMAT = "%(message)s"
+# quiet runs (e.g. from cron) log plain lines without loading rich
+QUIET_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+# nothing is configured on import, see setup_logging()
+logger = logging.getLogger(PACKAGE_NAME)
+
+
+def setup_logging(verbosity: int = VERBOSITY_NORMAL):
+    """Log to the terminal through rich, as the command line tools do."""
+    if verbosity <= VERBOSITY_QUIET:
+        logging.basicConfig(level="INFO", format=QUIET_FORMAT)
+    else:
+        from rich.logging import RichHandler
+
+        logging.basicConfig(
+            level="INFO", format=FORMAT, datefmt="[%X]", handlers=[RichHandler()]
+        )
+    set_verbosity(verbosity)
+
+
+def set_verbosity(verbosity: int):
+    if verbosity <= VERBOSITY_QUIET:
+        logger.setLevel(logging.WARNING)
+    elif verbosity >= VERBOSITY_VERBOSE:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(logging.INFO)
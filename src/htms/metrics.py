@@ -0,0 +1,193 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+    5.0, 10.0, 30.0,
+)  # fmt: skip
+
+METRIC_PREFIX = "htms_"
+STAGE_METRIC = "stage_seconds"
+
+# returned by span() of disabled metrics
+_NULL_SPAN = nullcontext()
+
+LabelKey = Tuple[Tuple[str, str], ...]
+Hook = Callable[[str, float, Dict[str, str]], None]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    inner = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in items
+    )
+    return "{" + inner + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "min": round(self.min, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+
+class Metrics:
+    """
+    Counters and timing histograms for a run, labelled by stage, host and
+    parser. Disabled instances are a no-op fast path. Hooks added with
+    add_hook() are called with every observation.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.hooks: List[Hook] = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Hook):
+        self.hooks.append(hook)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        for hook in self.hooks:
+            hook(name, value, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+        for hook in self.hooks:
+            hook(name, value, labels)
+
+    def span(self, stage: str, **labels):
+        """Context manager timing a stage into the stage_seconds histogram."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(stage, labels)
+
+    @contextmanager
+    def _span(self, stage: str, labels: Dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_METRIC, time.perf_counter() - start, stage=stage, **labels)
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                    for name, series in self.counters.items()
+                },
+                "histograms": {
+                    name: [{"labels": dict(k), **h.to_dict()} for k, h in series.items()]
+                    for name, series in self.histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, n in zip(h.buckets, h.counts):
+                        cumulative += n
+                        le = _format_labels(key, ("le", repr(bound)))
+                        lines.append(f"{metric}_bucket{le} {cumulative}")
+                    le = _format_labels(key, ("le", "+Inf"))
+                    lines.append(f"{metric}_bucket{le} {h.count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write a Prometheus text file (.prom/.txt) or a JSON summary."""
+        with open(path, "w") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), f, indent=2)
+
+
+# metrics of the running parser, used by code without a parser reference
+# such as ItemTag.parse()
+_active_metrics = Metrics(enabled=False)
+
+
+def get_metrics() -> Metrics:
+    return _active_metrics
+
+
+def set_metrics(metrics: Metrics):
+    global _active_metrics
+    _active_metrics = metrics
@@ -0,0 +1,217 @@
+from __future__ import annotations
+import copy
+import hashlib
+import json
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, TYPE_CHECKING
+from urllib.parse import urljoin
+
+from lxml import etree
+
+from htms.constants import DEFAULT_MAX_PAGES
+from htms.expressions import Expression
+from htms.logging import logger
+from htms.tags.constants import HTML_RESPONSE_TYPE
+
+if TYPE_CHECKING:
+    from htms.tags.RequestTag import RequestTag
+
+
+def get_json_path(data: Any, path: str) -> Any:
+    """Value at a dotted path like 'meta.next' or 'pages.0.url', or None."""
+    for key in path.split("."):
+        if isinstance(data, list) and key.lstrip("-").isdigit():
+            index = int(key)
+            data = data[index] if -len(data) <= index < len(data) else None
+        elif isinstance(data, dict):
+            data = data.get(key)
+        else:
+            return None
+        if data is None:
+            return None
+    return data
+
+
+def to_page_count(value: Any) -> Optional[int]:
+    """A page count from a number, or the last number in a text like 'Page 1 of 12'."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    numbers = re.findall(r"\d+", str(value).replace(",", ""))
+    return int(numbers[-1]) if numbers else None
+
+
+@dataclass
+class Pagination:
+    """
+    Pagination of a <request>: either a total page count (`total-pages`)
+    with a `page-url` lambda, or a link to the next page (`next`) followed
+    until it runs out. Both are XPaths for HTML and dotted paths for JSON.
+    """
+
+    response_type: str = HTML_RESPONSE_TYPE
+    total_pages: Optional[str] = None
+    page_url: Optional[str] = None
+    next: Optional[str] = None
+    # number of the page of the request url, for `page-url`
+    first_page: int = 1
+    # pages fetched at most, including the first one
+    max_pages: int = DEFAULT_MAX_PAGES
+    # stop when a page has no items, or the same items as an earlier page
+    stop_when_empty: bool = True
+
+    compiled_total_pages: Optional[etree.XPath] = field(
+        default=None, init=False, repr=False
+    )
+    compiled_next: Optional[etree.XPath] = field(default=None, init=False, repr=False)
+    page_url_fn: Optional[Callable[[int], str]] = field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.total_pages and not self.page_url:
+            raise ValueError("'total-pages' needs a 'page-url' lambda")
+        self.compile()
+
+    def compile(self):
+        if self.response_type == HTML_RESPONSE_TYPE:
+            try:
+                if self.total_pages:
+                    self.compiled_total_pages = etree.XPath(self.total_pages)
+                if self.next:
+                    self.compiled_next = etree.XPath(self.next)
+            except etree.XPathSyntaxError as e:
+                raise ValueError(f"Invalid pagination xpath: {e}") from e
+        if self.page_url:
+            self.page_url_fn = Expression(self.page_url)()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.update(compiled_total_pages=None, compiled_next=None, page_url_fn=None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.compile()
+
+    @classmethod
+    def from_attrs(cls, data: Dict[str, Any]) -> Optional[Pagination]:
+        if not data.get("total-pages") and not data.get("next"):
+            return None
+        return cls(
+            response_type=data.get("type", HTML_RESPONSE_TYPE),
+            total_pages=data.get("total-pages"),
+            page_url=data.get("page-url"),
+            next=data.get("next"),
+            first_page=int(data.get("first-page", 1)),
+            max_pages=int(data.get("max-pages", DEFAULT_MAX_PAGES)),
+            stop_when_empty=data.get("stop-when-empty", "true").lower() != "false",
+        )
+
+    def _select(self, tree: Any, xpath: Optional[etree.XPath], path: str) -> Any:
+        if self.response_type == HTML_RESPONSE_TYPE:
+            result = xpath(tree)
+            return result[0] if isinstance(result, list) and result else result or None
+        return get_json_path(tree, path)
+
+    def find_page_urls(self, tree: Any, url: str, is_first_page: bool) -> List[str]:
+        """URLs of the pages found on a page at `url`."""
+        urls = []
+        if self.total_pages and is_first_page:
+            total = to_page_count(
+                self._select(tree, self.compiled_total_pages, self.total_pages)
+            )
+            if total is None:
+                logger.warning("No total page count found on '%s'", url)
+            else:
+                for i in range(self.first_page + 1, total + 1):
+                    urls.append(self.page_url_fn(i))
+        if self.next:
+            link = self._select(tree, self.compiled_next, self.next)
+            if link:
+                urls.append(urljoin(url, str(link).strip()))
+        return urls
+
+
+class Paginator:
+    """
+    Iterator over the pages of a paginated request, starting with the
+    request itself. Pages are added while earlier pages are parsed, so it
+    can run out and yield more pages later; `on_add` is called when a page
+    is added, e.g. to fetch it right away.
+    """
+
+    def __init__(self, req: RequestTag):
+        self.request = req
+        self.pagination: Pagination = req.pagination
+        self.pending = deque([req])
+        self.seen_urls: Set[str] = {req.url}
+        self.seen_outputs: Set[str] = set()
+        self.pages = 1
+        self.stopped = False
+        # set once max-pages pages are queued, the queued ones still run
+        self.reached_max_pages = False
+        self.on_add: Optional[Callable[[], None]] = None
+        req.paginator = self
+        req.is_first_page = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> RequestTag:
+        if not self.pending:
+            raise StopIteration
+        return self.pending.popleft()
+
+    def add_urls(self, urls: List[str]) -> int:
+        """Queue the pages at `urls` that are new, returns how many were added."""
+        added = 0
+        for url in urls:
+            if self.stopped or self.reached_max_pages or url in self.seen_urls:
+                continue
+            if self.pages >= self.pagination.max_pages:
+                logger.info(
+                    "Reached max-pages %d of '%s'",
+                    self.pagination.max_pages,
+                    self.request.url,
+                )
+                self.reached_max_pages = True
+                break
+            self.seen_urls.add(url)
+            page = copy.copy(self.request)
+            page.url = url
+            page.is_first_page = False
+            page.next_pages = []
+            self.pending.append(page)
+            self.pages += 1
+            added += 1
+
+        if added and self.on_add is not None:
+            self.on_add()
+        return added
+
+    def record_output(self, output: Optional[Dict[str, Any]]):
+        """Stop when a page has no new items."""
+        if output is None or not self.pagination.stop_when_empty or self.stopped:
+            return
+        if all(not v for v in output.values()):
+            logger.info("Stopping pagination of '%s': empty page", self.request.url)
+            self.stop()
+            return
+        digest = hashlib.sha256(
+            json.dumps(output, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        if digest in self.seen_outputs:
+            logger.info("Stopping pagination of '%s': repeated page", self.request.url)
+            self.stop()
+        self.seen_outputs.add(digest)
+
+    def stop(self):
+        """Queue no more pages; pages already being fetched still finish."""
+        self.stopped = True
+        self.pending.clear()
@@ -0,0 +1,76 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from htms.extract import parse_document, run_parsers, set_json_backend, to_plain_data
+from htms.logging import logger
+from htms.tags.ItemTag import ItemTag
+from htms.tags.RequestTag import RequestTag
+
+# parser trees of the spec, sent to each worker once by init_worker()
+_worker_parsers: Dict[str, ItemTag] = {}
+
+
+def init_worker(parsers_blob: bytes, json_backend: str):
+    global _worker_parsers
+    _worker_parsers = pickle.loads(parsers_blob)
+    set_json_backend(json_backend)
+
+
+def parse_in_worker(
+    body: bytes,
+    encoding: Optional[str],
+    response_type: str,
+    parser_keys: List[str],
+    request_info: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Parse a response body in a worker and return plain-data output."""
+    try:
+        tree = parse_document(body, response_type, encoding)
+    except Exception as e:
+        logger.error("Failed to parse %s document: %s", response_type, e)
+        return None
+
+    # a bare request for parse expressions that use `request`
+    req = RequestTag(parser_names=[], response_type=response_type, **request_info)
+    parsers = [_worker_parsers[key] for key in parser_keys]
+
+    return to_plain_data(run_parsers(tree, req, parsers))
+
+
+class ParsePool:
+    """
+    Process pool that runs document parsing and parser trees off the main
+    process. The parser trees are pickled once and sent to each worker
+    when it starts; pages only carry the response body and parser keys.
+    """
+
+    def __init__(
+        self, workers: int, parsers: List[ItemTag], json_backend: str = "auto"
+    ):
+        self._keys: Dict[int, str] = {}
+        registry: Dict[str, ItemTag] = {}
+        for p in parsers:
+            if id(p) not in self._keys:
+                key = str(len(registry))
+                self._keys[id(p)] = key
+                registry[key] = p
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(pickle.dumps(registry), json_backend),
+        )
+        logger.info("Started %d parse workers with %d parsers", workers, len(registry))
+
+    def get_keys(self, parsers: List[ItemTag]) -> Optional[List[str]]:
+        """Worker keys of `parsers`, or None if one is unknown to the workers."""
+        try:
+            return [self._keys[id(p)] for p in parsers]
+        except KeyError:
+            return None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from htms import __version__
+from htms.logging import logger
+from htms.streaming import validate_stream
+from htms.tags.ExportTag import STREAMING_EXPORT_WRITERS
+from htms.tags.ItemTag import ItemTag
+from htms.tags.RequestListTag import RequestListTag
+from htms.tags.RequestTag import RequestTag
+from htms.tags.constants import (
+    HTML_RESPONSE_TYPE,
+    JSON_RESPONSE_TYPE,
+    JSON_EXPORT_FORMAT,
+)
+
+# bump when the pickled tag classes change in an incompatible way
+PLAN_FORMAT_VERSION = 5
+
+RESPONSE_TYPES = (HTML_RESPONSE_TYPE, JSON_RESPONSE_TYPE)
+EXPORT_FORMATS = (JSON_EXPORT_FORMAT, *STREAMING_EXPORT_WRITERS)
+
+
+def get_spec_key(spec: str) -> str:
+    """
+    Cache key of a spec. Plans hold marshalled code objects, so they are
+    only reused by the same Python version.
+    """
+    raw = "\0".join(
+        [spec, __version__, str(PLAN_FORMAT_VERSION), sys.version.split()[0]]
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+@dataclass
+class ExecutionPlan:
+    """
+    A validated spec, ready to run: requests and request lists with their
+    parsers resolved, and XPaths and expressions compiled.
+    """
+
+    requests: List[RequestTag]
+    request_generators: List[RequestListTag]
+    global_parsers: Dict[str, ItemTag]
+    variables: Dict[str, Any] = field(default_factory=dict)
+
+
+def _iter_items(parsers: List[ItemTag]):
+    for p in parsers:
+        yield p
+        yield from _iter_items([c for c in p.children if isinstance(c, ItemTag)])
+
+
+def validate_plan(plan: ExecutionPlan) -> List[str]:
+    """Problems of a plan that would otherwise only show up while it runs."""
+    errors = []
+    reqs: List[Union[RequestTag, RequestListTag]] = (
+        plan.requests + plan.request_generators
+    )
+
+    for req in reqs:
+        name = f"<{req._tag_type}>"
+        for pn in req.parser_names:
+            if pn not in plan.global_parsers:
+                errors.append(f"{name}: parser '{pn}' not found")
+
+        if req.response_type not in RESPONSE_TYPES:
+            errors.append(f"{name}: invalid type '{req.response_type}'")
+
+        if req.stream is not None:
+            errors += validate_stream(req)
+
+        output_names = [p.get_id_or_name() for p in req.parsers]
+        for cn in getattr(req, "concat", []):
+            if cn not in output_names:
+                errors.append(f"{name}: concat parser '{cn}' not found")
+
+        for export_tag in req.get_export_tags():
+            if export_tag.format not in EXPORT_FORMATS:
+                errors.append(
+                    f"<export> '{export_tag.path}': unsupported format "
+                    f"'{export_tag.format}'"
+                )
+            if export_tag.parser is not None and export_tag.parser not in output_names:
+                errors.append(
+                    f"<export> '{export_tag.path}': parser '{export_tag.parser}' not found"
+                )
+            try:
+                export_tag.get_parser(output_names)
+            except ValueError as e:
+                errors.append(f"<export>: {e}")
+
+    parsers = list(plan.global_parsers.values())
+    for req in reqs:
+        parsers += req.parsers
+    for p in _iter_items(parsers):
+        if (p.type or p.regex) and p.get_item_children():
+            errors.append(
+                f"<item> '{p.get_id_or_name()}': 'type' and 'regex' convert "
+                "values, set them on its children"
+            )
+        if not p.has_follow_up():
+            continue
+        for pn in p.follow_up_parser_names.split(","):
+            if pn.strip() not in plan.global_parsers:
+                errors.append(
+                    f"<item> '{p.get_id_or_name()}': follow-up parser "
+                    f"'{pn.strip()}' not found"
+                )
+
+    return list(dict.fromkeys(errors))
+
+
+def bind_export_types(plan: ExecutionPlan):
+    """Give each export the column types of the parser it writes."""
+    for req in plan.requests + plan.request_generators:
+        parsers = {p.get_id_or_name(): p for p in req.parsers}
+        for export_tag in req.get_export_tags():
+            # exports without a parser are reported by validate_plan()
+            name = export_tag.get_parser(list(parsers))
+            if name in parsers:
+                export_tag.column_types = parsers[name].get_column_types()
+
+
+class PlanCache:
+    """Compiled execution plans on disk, one pickle file per spec key."""
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            from htms.cache import get_default_cache_dir
+
+            path = get_default_cache_dir() / "plans"
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def get_path(self, key: str) -> Path:
+        return self.path / f"{key}.pickle"
+
+    def load(self, key: str) -> Optional[ExecutionPlan]:
+        try:
+            with open(self.get_path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # e.g. written by an incompatible version, compiled again
+            logger.warning("Ignoring unreadable plan '%s': %s", self.get_path(key), e)
+            return None
+
+    def save(self, key: str, plan: ExecutionPlan):
+        # written to a temporary file first so readers never see half a plan
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(plan, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.get_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
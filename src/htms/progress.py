@@ -0,0 +1,77 @@
+import sys
+import time
+from typing import Optional, TextIO
+
+from htms.constants import DEFAULT_PROGRESS_INTERVAL
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """
+    Reports pages done, rows, rate and ETA of a run at most once per
+    `interval` seconds, however many requests finish in between. A disabled
+    reporter does nothing.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        interval: float = DEFAULT_PROGRESS_INTERVAL,
+        stream: Optional[TextIO] = None,
+    ):
+        self.enabled = enabled
+        self.interval = interval
+        self.stream = stream or sys.stderr
+
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.rows = 0
+
+        self._started = time.monotonic()
+        self._next_report = self._started + interval
+        self._reported = 0
+
+    def add_total(self, n: int):
+        self.total += n
+
+    def advance(self, failed: bool = False, rows: int = 0):
+        if not self.enabled:
+            return
+        self.done += 1
+        self.failed += failed
+        self.rows += rows
+
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self.report(now)
+
+    def report(self, now: Optional[float] = None):
+        now = now or time.monotonic()
+        elapsed = max(now - self._started, 1e-9)
+        self._reported = self.done
+        rate = self.done / elapsed
+
+        line = f"[htms] {self.done}/{self.total} pages"
+        if self.failed:
+            line += f" ({self.failed} failed)"
+        line += f", {self.rows} rows, {rate:.1f} pages/s"
+        if rate > 0 and self.total > self.done:
+            line += f", ETA {format_eta((self.total - self.done) / rate)}"
+
+        self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def close(self):
+        """Report the final numbers of the run."""
+        if self.enabled and self.done != self._reported:
+            self.report()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+from htms.constants import DEFAULT_RETRIES
+
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+# errors worth trying again; other exceptions (e.g. invalid URL) are final
+RETRYABLE_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+
+class FetchError(Exception):
+    def __init__(self, url: str, attempts: int, error: Any):
+        super().__init__(f"Request failed for {url} after {attempts} attempt(s): {error}")
+        self.url = url
+        self.attempts = attempts
+        self.error = error
+
+
+@dataclass
+class RetryPolicy:
+    # total number of attempts, including the first one
+    max_attempts: int = DEFAULT_RETRIES + 1
+    # delay before the 2nd attempt, multiplied by `backoff_factor` after that
+    backoff: float = 0.5
+    backoff_factor: float = 2.0
+    max_backoff: float = 30.0
+    # random extra delay, as a fraction of the backoff delay
+    jitter: float = 0.5
+    retry_statuses: Tuple[int, ...] = RETRYABLE_STATUS_CODES
+    # timeout of a single attempt in seconds
+    timeout: Optional[float] = None
+    # total time budget across all attempts in seconds
+    budget: Optional[float] = None
+
+    @classmethod
+    def from_attrs(
+        cls, data: Dict[str, Any], default: Optional[RetryPolicy] = None
+    ) -> Optional[RetryPolicy]:
+        default = default or cls()
+        keys = ("retries", "retry-backoff", "retry-statuses", "timeout", "retry-budget")
+        if not any(k in data for k in keys):
+            return None
+
+        retry_statuses = default.retry_statuses
+        if data.get("retry-statuses"):
+            retry_statuses = tuple(
+                int(x.strip()) for x in data["retry-statuses"].split(",")
+            )
+
+        return cls(
+            max_attempts=(
+                int(data["retries"]) + 1 if "retries" in data else default.max_attempts
+            ),
+            backoff=float(data.get("retry-backoff", default.backoff)),
+            backoff_factor=default.backoff_factor,
+            max_backoff=default.max_backoff,
+            jitter=default.jitter,
+            retry_statuses=retry_statuses,
+            timeout=float(data["timeout"]) if "timeout" in data else default.timeout,
+            budget=(
+                float(data["retry-budget"]) if "retry-budget" in data else default.budget
+            ),
+        )
+
+    def get_delay(self, attempt: int) -> float:
+        """Delay in seconds after the failed attempt number `attempt` (1-based)."""
+        delay = min(self.max_backoff, self.backoff * self.backoff_factor ** (attempt - 1))
+        return delay + random.uniform(0, delay * self.jitter)
+
+    def get_deadline(self) -> Optional[float]:
+        return time.monotonic() + self.budget if self.budget else None
+
+    def get_timeout(self, deadline: Optional[float]) -> Optional[float]:
+        """Timeout for the next attempt, bounded by what is left of the budget."""
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+
+    def is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, RETRYABLE_EXCEPTIONS)
+
+
+@dataclass
+class DeadLetter:
+    """A request that still failed after all its retries."""
+
+    request: Any
+    error: str
+    attempts: int = 0
+    failed_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.request.url,
+            "method": self.request.method,
+            "meta": self.request.meta,
+            "parsers": self.request.parser_names,
+            "type": self.request.response_type,
+            "error": self.error,
+            "attempts": self.attempts,
+            "failed_at": self.failed_at,
+        }
@@ -0,0 +1,270 @@
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from htms.logging import logger
+
+# status codes that make the scheduler back off a host
+THROTTLE_STATUS_CODES = (429, 503)
+
+# pause used when a throttled response has no Retry-After header
+DEFAULT_THROTTLE_PAUSE = 1.0
+MAX_THROTTLE_PAUSE = 60.0
+
+# a response is "healthy" if its latency is below this multiple of the
+# host's average latency
+HEALTHY_LATENCY_FACTOR = 2.0
+LATENCY_EWMA_ALPHA = 0.2
+
+# how much of the configured rate is recovered per healthy response
+RATE_RAMP_STEP = 0.1
+MIN_RATE_FACTOR = 0.05
+
+
+def get_host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+@dataclass
+class HostLimits:
+    # requests per second, None for no rate limit
+    rate: Optional[float] = None
+    # max number of requests sent to the host at the same time
+    max_in_flight: Optional[int] = None
+
+    @classmethod
+    def from_attrs(cls, data: Dict[str, Any]) -> Optional["HostLimits"]:
+        rate = data.get("rate-limit")
+        max_in_flight = data.get("max-in-flight")
+        if rate is None and max_in_flight is None:
+            return None
+        return cls(
+            rate=float(rate) if rate is not None else None,
+            max_in_flight=int(max_in_flight) if max_in_flight is not None else None,
+        )
+
+    def merge(self, other: "HostLimits") -> "HostLimits":
+        """The stricter of two limits set for the same host."""
+        return HostLimits(
+            rate=_stricter(self.rate, other.rate),
+            max_in_flight=_stricter(self.max_in_flight, other.max_in_flight),
+        )
+
+
+def _stricter(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float, rate: float) -> float:
+        """Take a token, or return how many seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    throttled: int = 0
+    queued_seconds: float = 0.0
+    wire_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "queued_seconds": round(self.queued_seconds, 4),
+            "wire_seconds": round(self.wire_seconds, 4),
+        }
+
+
+@dataclass
+class HostState:
+    limits: HostLimits
+    bucket: Optional[TokenBucket] = None
+    in_flight: int = 0
+    # adaptive in-flight window, None while the host has never been throttled
+    # and has no max_in_flight
+    window: Optional[float] = None
+    rate_factor: float = 1.0
+    blocked_until: float = 0.0
+    consecutive_throttles: int = 0
+    latency_ewma: Optional[float] = None
+    stats: HostStats = field(default_factory=HostStats)
+
+    def __post_init__(self):
+        self.bucket = TokenBucket(self.limits.rate) if self.limits.rate else None
+        if self.limits.max_in_flight:
+            self.window = float(self.limits.max_in_flight)
+
+    def merge_limits(self, limits: HostLimits):
+        """
+        Add the limits of another request to the host. The stricter limits
+        apply, and the backoff learned so far is kept.
+        """
+        merged = self.limits.merge(limits)
+        if merged == self.limits:
+            return
+        self.limits = merged
+        if merged.rate:
+            if self.bucket is None:
+                self.bucket = TokenBucket(merged.rate)
+            else:
+                self.bucket.rate = merged.rate
+        if merged.max_in_flight:
+            self.window = min(self.window or math.inf, float(merged.max_in_flight))
+
+
+@dataclass
+class Ticket:
+    host: str
+    queued_seconds: float
+    started: float
+
+
+class HostScheduler:
+    """
+    Shapes outgoing requests per host: a token bucket for `rate`, a cap on
+    in-flight requests, and AIMD-style backoff on 429/503 responses that
+    ramps back up while latency stays healthy.
+
+    `acquire()` blocks the calling (fetch) thread until the request may be
+    sent; `release()` must be called with the response once it is done.
+    """
+
+    def __init__(self):
+        self.hosts: Dict[str, HostState] = {}
+        self._cond = threading.Condition()
+
+    def _get_state(self, host: str, limits: Optional[HostLimits]) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostState(limits=limits or HostLimits())
+            self.hosts[host] = state
+        elif limits is not None:
+            state.merge_limits(limits)
+        return state
+
+    def _wait_time(self, state: HostState, now: float) -> Optional[float]:
+        """Seconds to wait before the next request (None: until a release)."""
+        if state.blocked_until > now:
+            return state.blocked_until - now
+        if state.window is not None and state.in_flight >= max(1, int(state.window)):
+            return None
+        if state.bucket is not None:
+            return state.bucket.take(now, state.bucket.rate * state.rate_factor)
+        return 0.0
+
+    def acquire(self, url: str, limits: Optional[HostLimits] = None) -> Ticket:
+        host = get_host(url)
+        queued_at = time.monotonic()
+        with self._cond:
+            state = self._get_state(host, limits)
+            while True:
+                wait = self._wait_time(state, time.monotonic())
+                if wait == 0:
+                    break
+                self._cond.wait(timeout=wait)
+            state.in_flight += 1
+
+        started = time.monotonic()
+        return Ticket(host=host, queued_seconds=started - queued_at, started=started)
+
+    def release(self, ticket: Ticket, status_code: Optional[int] = None, headers=None):
+        now = time.monotonic()
+        wire_seconds = now - ticket.started
+
+        with self._cond:
+            state = self.hosts[ticket.host]
+            state.in_flight -= 1
+            state.stats.requests += 1
+            state.stats.queued_seconds += ticket.queued_seconds
+            state.stats.wire_seconds += wire_seconds
+
+            if status_code in THROTTLE_STATUS_CODES:
+                self._back_off(state, now, headers)
+            else:
+                self._ramp_up(state, wire_seconds)
+
+            self._cond.notify_all()
+
+    def _back_off(self, state: HostState, now: float, headers):
+        state.stats.throttled += 1
+        state.consecutive_throttles += 1
+
+        pause = parse_retry_after(headers.get("Retry-After") if headers else None)
+        if pause is None:
+            pause = min(
+                MAX_THROTTLE_PAUSE,
+                DEFAULT_THROTTLE_PAUSE * 2 ** (state.consecutive_throttles - 1),
+            )
+        state.blocked_until = max(state.blocked_until, now + pause)
+
+        # multiplicative decrease of both the in-flight window and the rate
+        state.window = max(1.0, (state.window or state.in_flight + 1) / 2)
+        state.rate_factor = max(MIN_RATE_FACTOR, state.rate_factor / 2)
+        logger.warning(
+            "Throttled, backing off for %.2fs (window=%.1f, rate factor=%.2f)",
+            pause,
+            state.window,
+            state.rate_factor,
+        )
+
+    def _ramp_up(self, state: HostState, wire_seconds: float):
+        state.consecutive_throttles = 0
+
+        healthy = (
+            state.latency_ewma is None
+            or wire_seconds <= HEALTHY_LATENCY_FACTOR * state.latency_ewma
+        )
+        state.latency_ewma = (
+            wire_seconds
+            if state.latency_ewma is None
+            else LATENCY_EWMA_ALPHA * wire_seconds
+            + (1 - LATENCY_EWMA_ALPHA) * state.latency_ewma
+        )
+        if not healthy:
+            return
+
+        # additive increase back up to the configured limits
+        state.rate_factor = min(1.0, state.rate_factor + RATE_RAMP_STEP)
+        if state.window is not None:
+            state.window += 1 / state.window
+            if state.limits.max_in_flight:
+                state.window = min(state.window, float(state.limits.max_in_flight))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {host: s.stats.to_dict() for host, s in self.hosts.items()}
@@ -0,0 +1,162 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from lxml import etree
+
+# a location step selecting elements: a name or `*` after an optional axis
+ELEMENT_NAME_RE = re.compile(r"(?:[a-z-]+::)?(?:[A-Za-z_][\w.-]*|\*)")
+# a last step selecting text or attributes instead of elements
+LEAF_STEP_RE = re.compile(r"text\(\)|@(?:[A-Za-z_][\w.-]*|\*)")
+
+
+def split_steps(xpath: str) -> List[str]:
+    """
+    Location steps of an xpath, split on '/' outside of predicates,
+    parentheses and strings. '//' gives an empty step.
+    """
+    steps = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, c in enumerate(xpath):
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "'\"":
+            quote = c
+        elif c in "[(":
+            depth += 1
+        elif c in "])":
+            depth -= 1
+        elif c == "/" and depth == 0:
+            steps.append(xpath[start:i])
+            start = i + 1
+    steps.append(xpath[start:])
+    return steps
+
+
+def is_element_step(step: str) -> bool:
+    """Whether a step selects elements, e.g. `td` or `div[@class='a'][2]`."""
+    match = ELEMENT_NAME_RE.match(step)
+    if match is None:
+        return False
+    # anything after the name must be predicates
+    depth = 0
+    quote = None
+    for c in step[match.end() :]:
+        if quote:
+            if c == quote:
+                quote = None
+        elif depth == 0 and c != "[":
+            return False
+        elif c in "'\"":
+            quote = c
+        elif c == "[":
+            depth += 1
+        elif c == "]":
+            depth -= 1
+    return depth == 0 and quote is None
+
+
+def get_location_steps(xpath: str) -> Optional[Tuple[str, ...]]:
+    """
+    Steps of an xpath that is a single location path made of element steps,
+    '.' and '//', ending with an element, text or attribute step. None for
+    any other xpath (unions, functions, ...), which is never factored.
+    """
+    steps = tuple(s.strip() for s in split_steps(xpath.strip()))
+    *path, last = steps
+    if not (is_element_step(last) or LEAF_STEP_RE.fullmatch(last)):
+        return None
+    if not all(s in ("", ".") or is_element_step(s) for s in path):
+        return None
+    return steps
+
+
+def get_common_length(a: Tuple[str, ...], b: Tuple[str, ...]) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class FieldSelector:
+    """
+    XPath of one child item split into a prefix shared with other children
+    and the rest of the path, relative to the node the prefix selects.
+    """
+
+    def __init__(self, prefix: Tuple[str, ...], steps: Tuple[str, ...]):
+        self.prefix = prefix
+        rest = steps[len(prefix) :]
+        # `P//S` is `.//S` from the node selected by P
+        self.xpath = etree.XPath("/".join((".",) + rest))
+
+
+class SelectorPlan:
+    """
+    Plan evaluating the xpaths of the children of an item together, on one
+    element (a row of a list). Path prefixes shared by several children,
+    e.g. `.//div[@class='info']` in `.//div[@class='info']/h2/text()` and
+    `.//div[@class='info']//a/@href`, are evaluated once per row and the
+    rest of each path runs from the node they select, instead of every
+    child walking the row again from the top.
+
+    This is only the same as the full xpath when the prefix selects a
+    single node; for other rows the children fall back to their own xpath.
+    """
+
+    def __init__(self, xpaths: Tuple[Optional[str], ...]):
+        paths = [get_location_steps(x) if x else None for x in xpaths]
+
+        self.fields: List[Optional[FieldSelector]] = []
+        for i, steps in enumerate(paths):
+            shared = 0
+            if steps is not None:
+                for j, other in enumerate(paths):
+                    if j != i and other is not None:
+                        shared = max(shared, get_common_length(steps, other))
+                # the prefix must end with a step selecting elements
+                while shared and not is_element_step(steps[shared - 1]):
+                    shared -= 1
+            self.fields.append(
+                FieldSelector(steps[:shared], steps) if shared else None
+            )
+
+        self.prefixes: Dict[Tuple[str, ...], etree.XPath] = {
+            f.prefix: etree.XPath("/".join(f.prefix))
+            for f in self.fields
+            if f is not None
+        }
+
+    def is_empty(self) -> bool:
+        return not self.prefixes
+
+    def select(self, element: Any) -> List[Optional[List[Any]]]:
+        """
+        XPath result of each child on `element`, or None for children that
+        are evaluated with their own xpath.
+        """
+        contexts = {prefix: xpath(element) for prefix, xpath in self.prefixes.items()}
+        selected = []
+        for f in self.fields:
+            if f is None:
+                selected.append(None)
+                continue
+            context = contexts[f.prefix]
+            if len(context) == 1:
+                selected.append(f.xpath(context[0]))
+            elif not context:
+                selected.append([])
+            else:
+                selected.append(None)
+        return selected
+
+
+@lru_cache(maxsize=None)
+def get_selector_plan(xpaths: Tuple[Optional[str], ...]) -> SelectorPlan:
+    """Selector plan of the xpaths of an item's children, shared by every page."""
+    return SelectorPlan(xpaths)
@@ -0,0 +1,87 @@
+import threading
+from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from htms.constants import DEFAULT_HEADERS, DEFAULT_POOL_SIZE
+from htms.utils import make_cookie_jar_from_str
+
+
+def get_origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class SessionPool:
+    """
+    One keep-alive `requests.Session` per origin, each with its own
+    connection pool of `pool_size` connections. Default headers and
+    cookies are attached to the session once instead of per request.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+        compression: bool = True,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.compression = compression
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+
+        self.sessions: Dict[str, requests.Session] = {}
+        self._cookie_strs: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        session.headers.update(self.headers)
+        if self.compression:
+            # every encoding urllib3 can decode with the installed packages
+            # (gzip, deflate, plus br/zstd when brotli/zstandard are available)
+            session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        else:
+            session.headers["Accept-Encoding"] = "identity"
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+
+        return session
+
+    def get(self, url: str) -> requests.Session:
+        """Return the session for the origin of `url`, creating it if needed."""
+        origin = get_origin(url)
+        session = self.sessions.get(origin)
+        if session is None:
+            with self._lock:
+                session = self.sessions.get(origin)
+                if session is None:
+                    session = self._create_session()
+                    self.sessions[origin] = session
+        return session
+
+    def set_cookies(self, url: str, cookie_str: str):
+        """Attach the cookies in `cookie_str` to the session of `url` once."""
+        origin = get_origin(url)
+        session = self.get(url)
+        with self._lock:
+            seen = self._cookie_strs.setdefault(origin, set())
+            if cookie_str in seen:
+                return
+            seen.add(cookie_str)
+        session.cookies.update(make_cookie_jar_from_str(cookie_str))
+
+    def close(self):
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+            self._cookie_strs.clear()
@@ -0,0 +1,229 @@
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
+
+import requests
+from lxml import etree, html
+
+from htms.constants import DEFAULT_STREAM_CHUNK_SIZE
+from htms.expressions import element_to_string
+from htms.extract import get_charset, loads_json
+from htms.logging import logger
+from htms.pagination import get_json_path
+from htms.selectors import split_steps
+from htms.tags.constants import HTML_RESPONSE_TYPE, JSON_RESPONSE_TYPE
+
+if TYPE_CHECKING:
+    from htms.tags.ItemTag import ItemTag
+    from htms.tags.RequestTag import RequestTag
+
+# last step of the xpath of a streamed list: an element name with optional
+# predicates, e.g. `tr` or `div[@class='row']`
+ROW_STEP_RE = re.compile(r"([A-Za-z_][\w.-]*)(\[.*\])?", re.S)
+
+# steps allowed before the last one of a streamed list's xpath: rows are
+# matched without their ancestors, so these can't select anything
+ANCESTOR_STEPS = ("", ".")
+
+_warned_no_ijson = False
+
+
+def get_last_step(xpath: str) -> str:
+    """Last location step of an xpath, ignoring '/' in predicates and strings."""
+    return split_steps(xpath)[-1].strip()
+
+
+@lru_cache(maxsize=None)
+def compile_row_matcher(xpath: str) -> Tuple[str, etree.XPath]:
+    """
+    Tag name of the rows selected by a list xpath, and an XPath checking the
+    predicates of its last step on a single element. Rows are matched by
+    the last step only, so the xpath can't have other steps, e.g. `//tr`
+    but not `//table[@id='data']//tr`.
+    """
+    step = get_last_step(xpath)
+    ancestors = split_steps(xpath.strip())[:-1]
+    if any(s.strip() not in ANCESTOR_STEPS for s in ancestors):
+        raise ValueError(
+            f"xpath '{xpath}' can't be streamed: rows are matched by their last "
+            f"step '{step}' without checking their ancestors, use '//{step}' "
+            "or give the rows a predicate of their own"
+        )
+    match = ROW_STEP_RE.fullmatch(step)
+    if match is None:
+        raise ValueError(
+            f"xpath '{xpath}' must end with an element step such as 'tr' or "
+            "\"div[@class='row']\" to be streamed"
+        )
+    return match.group(1).lower(), etree.XPath(f"self::{step}")
+
+
+def validate_stream(req: RequestTag) -> List[str]:
+    """Problems that keep a request with a `stream` attribute from streaming."""
+    errors = []
+    name = f"<{req._tag_type}>"
+
+    if getattr(req, "pagination", None) is not None:
+        errors.append(f"{name}: 'stream' can't be combined with pagination")
+
+    for p in req.parsers:
+        pn = p.get_id_or_name()
+        if not p.many:
+            errors.append(f"{name}: only lists can be streamed, '{pn}' is an item")
+            continue
+        if p.compiled_pre_parse or p.compiled_post_parse:
+            errors.append(
+                f"{name}: 'parse' and 'pre-parse' of list '{pn}' need the whole "
+                "list and can't be streamed"
+            )
+        if req.response_type == HTML_RESPONSE_TYPE:
+            if not p.xpath:
+                errors.append(f"{name}: streamed list '{pn}' needs an xpath")
+                continue
+            try:
+                compile_row_matcher(p.xpath)
+            except (ValueError, etree.XPathSyntaxError) as e:
+                errors.append(f"{name}: {e}")
+        elif p.jsonpath:
+            errors.append(
+                f"{name}: streamed list '{pn}' takes its rows from the 'stream' "
+                "path, remove its 'jsonpath'"
+            )
+
+    return errors
+
+
+class RowFilter:
+    """
+    Per-row version of the `key`, `filter` and `strip` list operations and
+    of the `type` / `regex` conversion.
+    """
+
+    def __init__(self, parser: ItemTag):
+        self.parser = parser
+        self.name = parser.get_id_or_name()
+        self.seen_keys: Set[Any] = set()
+
+    def __call__(self, value: Any, request: RequestTag) -> Optional[Any]:
+        p = self.parser
+        if p.children:
+            row = p.parse_children(value, request)
+        elif isinstance(value, html.HtmlElement):
+            # the element is cleared once parsed, so rows keep its HTML
+            row = element_to_string(value)
+        else:
+            row = value
+
+        if p.key:
+            if row[p.key] in self.seen_keys:
+                return None
+            self.seen_keys.add(row[p.key])
+        if p.compiled_filter and not p.compiled_filter(item=row):
+            return None
+        if p.strip and isinstance(row, str):
+            row = row.strip("\n ")
+        if p.converter is not None and not p.children:
+            row = p.converter(row)
+        return row
+
+
+def iter_html_rows(
+    response: requests.Response, req: RequestTag
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Parse an HTML response while it downloads and yield (parser name, row)
+    for every row of the streamed lists. Parsed rows and everything before
+    them are removed from the tree, so memory stays bounded by the largest
+    row rather than the page.
+    """
+    matchers: Dict[str, List[Tuple[etree.XPath, RowFilter]]] = {}
+    for p in req.parsers:
+        tag, matcher = compile_row_matcher(p.xpath)
+        matchers.setdefault(tag, []).append((matcher, RowFilter(p)))
+
+    parser = etree.HTMLPullParser(
+        events=("end",),
+        tag=list(matchers),
+        huge_tree=True,
+        encoding=get_charset(response),
+    )
+    parser.set_element_class_lookup(html.HtmlElementClassLookup())
+
+    def read_rows():
+        for _, element in parser.read_events():
+            is_row = False
+            for matcher, row_filter in matchers[element.tag]:
+                if matcher(element):
+                    is_row = True
+                    row = row_filter(element, req)
+                    if row is not None:
+                        yield row_filter.name, row
+            if not is_row:
+                # e.g. a <div class="title"> inside a <div class="row"> that
+                # hasn't ended yet: the row's items still need it
+                pending_row = next(element.iterancestors(*matchers), None)
+                if pending_row is not None:
+                    continue
+            element.clear(keep_tail=True)
+            node = element
+            while (parent := node.getparent()) is not None:
+                while node.getprevious() is not None:
+                    del parent[0]
+                node = parent
+
+    for chunk in response.iter_content(DEFAULT_STREAM_CHUNK_SIZE):
+        parser.feed(chunk)
+        yield from read_rows()
+    parser.close()
+    yield from read_rows()
+
+
+def get_ijson_prefix(path: str) -> str:
+    """ijson prefix of the items of the array at a dotted path."""
+    return f"{path}.item" if path else "item"
+
+
+def iter_json_rows(
+    response: requests.Response, req: RequestTag
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (parser name, row) for every item of the array at the dotted
+    `stream` path of a JSON response, for each list parser. Items are
+    parsed one by one with ijson if it is installed; otherwise the whole
+    body is loaded first, with the same output.
+    """
+    global _warned_no_ijson
+    filters = [RowFilter(p) for p in req.parsers]
+
+    try:
+        import ijson
+    except ImportError:
+        if not _warned_no_ijson:
+            logger.warning(
+                "ijson is not installed, streamed JSON responses are loaded "
+                "whole (pip install htms[stream])"
+            )
+            _warned_no_ijson = True
+        data = loads_json(response.content, get_charset(response))
+        items = get_json_path(data, req.stream) if req.stream else data
+        items = items if isinstance(items, list) else []
+    else:
+        response.raw.decode_content = True
+        items = ijson.items(response.raw, get_ijson_prefix(req.stream), use_float=True)
+
+    for item in items:
+        for row_filter in filters:
+            row = row_filter(item, req)
+            if row is not None:
+                yield row_filter.name, row
+
+
+def iter_rows(
+    response: requests.Response, req: RequestTag
+) -> Iterator[Tuple[str, Any]]:
+    if req.response_type == HTML_RESPONSE_TYPE:
+        return iter_html_rows(response, req)
+    elif req.response_type == JSON_RESPONSE_TYPE:
+        return iter_json_rows(response, req)
+    raise ValueError(f"Invalid response type: {req.response_type}")
@@ -5,12 +5,33 @@ from .TagBase import TagBase
 from .constants import (
     EXPORT_TAG,
     JSON_EXPORT_FORMAT,
+    JSONL_EXPORT_FORMAT,
     CSV_EXPORT_FORMAT,
+    PARQUET_EXPORT_FORMAT,
     EXCEL_EXPORT_FORMAT,
 )
+from htms.exporters import (
+    RecordWriter,
+    JsonLinesWriter,
+    CsvWriter,
+    ParquetWriter,
+    FSYNC_NEVER,
+)
+from htms.converters import json_default
 from htms.logging import logger
+from htms.metrics import get_metrics
 import json
 
+# formats that can be written incrementally while a request list runs
+STREAMING_EXPORT_WRITERS = {
+    JSONL_EXPORT_FORMAT: JsonLinesWriter,
+    CSV_EXPORT_FORMAT: CsvWriter,
+    PARQUET_EXPORT_FORMAT: ParquetWriter,
+}
+
+# formats with one row per record, which need a single parser's output
+TABULAR_EXPORT_FORMATS = (CSV_EXPORT_FORMAT, PARQUET_EXPORT_FORMAT)
+
 
 @dataclass
 class ExportTag:
@@ -18,19 +39,106 @@ class ExportTag:
     format: str
     parser: str
 
+    flush_every: Optional[int] = None
+    fsync: str = FSYNC_NEVER
+    # `type` of the exported parser's columns, set when the spec is compiled
+    column_types: Dict[str, str] = field(default_factory=dict)
+
+    writer: Optional[RecordWriter] = field(default=None, init=False, repr=False)
+
     def __post_init__(self):
         self._tag_type = EXPORT_TAG
 
     @classmethod
     def from_attrs(cls, data: Dict[str, Any]) -> ExportTag:
         return ExportTag(
-            path=data["path"], format=data["format"], parser=data.get("parser", None)
+            path=data["path"],
+            format=data["format"],
+            parser=data.get("parser", None),
+            flush_every=int(data["flush-every"]) if "flush-every" in data else None,
+            fsync=data.get("fsync", FSYNC_NEVER),
+        )
+
+    def is_streaming(self) -> bool:
+        return self.format in STREAMING_EXPORT_WRITERS
+
+    def get_parser(self, names: List[str]) -> Optional[str]:
+        """
+        Parser whose rows are exported, out of the parsers `names` of the
+        output, or None when the whole output is one record.
+        """
+        if self.parser is None and self.format in TABULAR_EXPORT_FORMATS:
+            if len(names) != 1:
+                raise ValueError(
+                    f"Export to '{self.path}' in {self.format} format needs a "
+                    f"'parser' attribute, the output has parsers {names}"
+                )
+            return names[0]
+        return self.parser
+
+    def get_records(self, data: Dict[str, Any]) -> List[Any]:
+        """
+        Records written for the output of one request (list): the rows of the
+        parser named by the `parser` attribute, or the whole output as one
+        record when no parser is selected.
+        """
+        parser = self.get_parser(list(data))
+
+        if parser is None:
+            return [data]
+
+        if parser not in data:
+            logger.error("Parser '%s' not found in output for '%s'", parser, self.path)
+            return []
+
+        value = data[parser]
+        return value if isinstance(value, list) else [value]
+
+    def open(self):
+        """Start a streaming export, see write() and close()."""
+        if not self.is_streaming():
+            raise NotImplementedError(
+                f"Export format '{self.format}' does not support streaming"
+            )
+        kwargs = {"fsync": self.fsync}
+        if self.flush_every is not None:
+            kwargs["flush_every"] = self.flush_every
+        if self.format == PARQUET_EXPORT_FORMAT and self.column_types:
+            kwargs["column_types"] = self.column_types
+        self.writer = STREAMING_EXPORT_WRITERS[self.format](self.path, **kwargs)
+
+    def write(self, data: Dict[str, Any]):
+        """Write the output of one request to an open streaming export."""
+        with get_metrics().span("export", format=self.format):
+            for record in self.get_records(data):
+                self.writer.write(record)
+
+    def close(self):
+        if self.writer is None:
+            return
+        with get_metrics().span("export", format=self.format):
+            self.writer.close()
+        logger.info(
+            "Exported %d records to '%s' in %s format",
+            self.writer.count,
+            self.path,
+            self.format,
         )
+        self.writer = None
 
-    def export(self, data: Any):
+    def export(self, data: Dict[str, Any]):
         if self.format == JSON_EXPORT_FORMAT:
-            with open(self.path, "w") as f:
-                json.dump(data, f)
-                logger.info(f"Exported data to '{self.path}' in JSON format")
+            if self.parser is not None:
+                data = data.get(self.parser)
+            with get_metrics().span("export", format=self.format):
+                with open(self.path, "w") as f:
+                    json.dump(data, f, default=json_default)
+            logger.info("Exported data to '%s' in JSON format", self.path)
+        elif self.is_streaming():
+            self.open()
+            try:
+                self.write(data)
+            finally:
+                self.close()
         else:
             raise NotImplementedError(f"Export format '{self.format}' not implemented")
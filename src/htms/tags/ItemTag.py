@@ -1,27 +1,33 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, TYPE_CHECKING
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Dict, Any, TYPE_CHECKING
 
-from htms.utils import remove_dup
+from htms.constants import DEFAULT_CONVERT_BATCH_SIZE
+from htms.converters import Converter
+from htms.exporters import VALUE_COLUMN
+from htms.utils import iter_unique
+from htms.expressions import Expression, compile_expression
+from htms.jsonpath import JsonPath, compile_json_path
+from htms.metrics import get_metrics
+from htms.selectors import get_selector_plan
 
 from .TagBase import TagBase
 from .RequestTag import RequestTag
 from .RequestListTag import RequestListTag
 from .constants import ITEM_TAG, HTML_RESPONSE_TYPE
-from lxml import html
+from lxml import etree, html
 
 if TYPE_CHECKING:
     from htms.tags.RequestTag import RequestTag
 
 
-def element_to_string(element):
-    return html.tostring(element, encoding="unicode")
-
-
 @dataclass
 class ItemTag(TagBase):
     id: Optional[str] = None
     xpath: Optional[str] = None
+    # JSON path selecting the value in JSON responses, like `xpath` in HTML
+    jsonpath: Optional[str] = None
 
     name: Optional[str] = None
     is_global: Optional[str] = None
@@ -36,6 +42,9 @@ class ItemTag(TagBase):
 
     _post_parse: str = "value"
     strip: bool = False
+    # typed conversion of the value before `parse`, see htms.converters
+    type: Optional[str] = None
+    regex: Optional[str] = None
 
     # the following fields are used for list operation
 
@@ -49,8 +58,51 @@ class ItemTag(TagBase):
 
     value: Any = field(default=None, init=False)
 
+    # compiled once from `xpath` and shared by every page
+    compiled_xpath: Optional[etree.XPath] = field(
+        default=None, init=False, repr=False
+    )
+    compiled_jsonpath: Optional[JsonPath] = field(
+        default=None, init=False, repr=False
+    )
+    # compiled from pre-parse / parse / filter / follow-up-url,
+    # None when the expression is missing or a no-op
+    compiled_pre_parse: Optional[Expression] = field(
+        default=None, init=False, repr=False
+    )
+    compiled_post_parse: Optional[Expression] = field(
+        default=None, init=False, repr=False
+    )
+    compiled_filter: Optional[Expression] = field(default=None, init=False, repr=False)
+    compiled_follow_up_url: Optional[Expression] = field(
+        default=None, init=False, repr=False
+    )
+    # built from `type` / `regex`, None when neither is set
+    converter: Optional[Converter] = field(default=None, init=False, repr=False)
+
     def __post_init__(self):
         self._tag_type = ITEM_TAG
+        self.compile()
+
+    def compile(self):
+        self.compile_xpath()
+        self.compiled_jsonpath = (
+            compile_json_path(self.jsonpath) if self.jsonpath else None
+        )
+        self.compiled_pre_parse = compile_expression(self.pre_parse, "value")
+        self.compiled_post_parse = compile_expression(self._post_parse, "value")
+        self.compiled_filter = compile_expression(self.filter)
+        self.compiled_follow_up_url = compile_expression(self.follow_up_url)
+        self.converter = (
+            Converter(self.type, self.regex) if self.type or self.regex else None
+        )
+
+    def compile_xpath(self):
+        if self.xpath:
+            try:
+                self.compiled_xpath = etree.XPath(self.xpath)
+            except etree.XPathSyntaxError as e:
+                raise ValueError(f"Invalid xpath '{self.xpath}': {e}") from e
 
     @classmethod
     def from_attrs(cls, data: Dict[str, Any]) -> ItemTag:
@@ -59,9 +111,12 @@ class ItemTag(TagBase):
             id=data.get("id", None),
             name=data.get("name", None),
             xpath=data.get("xpath", None),
+            jsonpath=data.get("jsonpath", None),
             _post_parse=data.get("parse", "value"),
             pre_parse=data.get("pre-parse", "value"),
             strip="strip" in data,
+            type=data.get("type", None),
+            regex=data.get("regex", None),
             key=data.get("key", None),
             filter=data.get("filter", None),
             is_global="global" in data,
@@ -73,68 +128,207 @@ class ItemTag(TagBase):
             follow_up_concat=data.get("follow-up-concat", None),
         )
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # compiled XPaths can't be pickled and are rebuilt by __setstate__
+        # (expressions keep their code objects), and parsing doesn't need
+        # the parent chain (requests, exports)
+        state = self.__dict__.copy()
+        state.update(parent=None, value=None, compiled_xpath=None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.compile_xpath()
+
     def get_id_or_name(self) -> str:
         return self.id or self.name
 
-    def parse(self, value: Any, request: "RequestTag") -> Any:
+    def parse(self, value: Any, request: "RequestTag", convert: bool = True) -> Any:
         if self.xpath and isinstance(value, html.HtmlElement):
-            value = value.xpath(self.xpath)
+            with get_metrics().span("xpath", parser=self.get_id_or_name()):
+                nodes = self.compiled_xpath(value)
+            return self.parse_selection(nodes, request, convert)
+        if self.compiled_jsonpath is not None and not isinstance(
+            value, html.HtmlElement
+        ):
+            # not timed: selecting is a few lookups, cheaper than a span
+            return self.parse_selection(
+                self.compiled_jsonpath(value), request, convert
+            )
+        return self.parse_value(value, request, convert)
 
-            if not self.many:
-                value = value[0] if value else self.default_value
+    def parse_selection(
+        self, nodes: List[Any], request: "RequestTag", convert: bool = True
+    ) -> Any:
+        """Parse the result of this item's xpath or JSON path on one value."""
+        if not self.many:
+            nodes = nodes[0] if nodes else self.default_value
+        return self.parse_value(nodes, request, convert)
 
-        value = eval(self.pre_parse, {}, locals())
+    def parse_value(
+        self, value: Any, request: "RequestTag", convert: bool = True
+    ) -> Any:
+        """
+        Process a selected value. `convert=False` leaves the `type` / `regex`
+        conversion to the list holding this item, which converts the whole
+        column at once, see iter_converted().
+        """
+        if not self.has_processing():
+            self.value = value
+            return value
 
-        if len(self.children) > 0:
-            item_children = list(
-                filter(lambda x: isinstance(x, ItemTag), self.children)
-            )
-            if self.many:
-                value = [
-                    {
-                        item.name: item.parse(vi, request)
-                        for item in item_children
-                        if item.name
-                    }
-                    for vi in value
-                ]
-            else:
-                value = {
-                    item.name: item.parse(value, request)
-                    for item in item_children
-                    if item.name
-                }
+        metrics = get_metrics()
+        name = self.get_id_or_name()
 
-        # list specific operations
-        if self.many:
-            if self.key:
-                value = remove_dup(value, self.key)
+        if self.compiled_pre_parse:
+            with metrics.span("pre_parse", parser=name):
+                value = self.compiled_pre_parse(value=value, request=request, self=self)
 
-            if self.filter:
-                value = list(
-                    filter(lambda x: eval(self.filter, {}, {"item": x}), value)
-                )
+        if self.many:
+            # rows go through every list operation one at a time and are
+            # only collected once; a list without any is kept as is
+            if self.children or self.key or self.compiled_filter or self.strip:
+                with metrics.span("rows", parser=name):
+                    value = list(self.iter_rows(value, request))
+        elif len(self.children) > 0:
+            value = self.parse_children(value, request)
 
         if self.strip and not self.many and isinstance(value, str):
             value = value.strip("\n ")
-        elif self.strip and self.many:
-            value = [vi.strip("\n ") if isinstance(vi, str) else vi for vi in value]
-
-        value = eval(
-            self._post_parse,
-            {},
-            # {
-            #     "element_to_string": element_to_string,
-            #     # "value": v,
-            #     # "request": request,
-            # },
-            locals(),
-        )
+
+        if self.converter is not None and convert:
+            if self.many:
+                with metrics.span("convert", parser=name):
+                    value = self.converter.convert_many(list(value))
+            else:
+                # not timed: a single value converts faster than a span
+                value = self.converter(value)
+
+        if self.compiled_post_parse:
+            with metrics.span("post_parse", parser=name):
+                value = self.compiled_post_parse(value=value, request=request, self=self)
 
         self.value = value
 
         return value
 
+    def has_processing(self) -> bool:
+        """Whether parse_value() does anything besides keeping the value."""
+        return bool(
+            self.compiled_pre_parse
+            or self.compiled_post_parse
+            or self.many
+            or self.children
+            or self.strip
+            or self.converter
+        )
+
+    def iter_rows(self, values: Iterable[Any], request: "RequestTag") -> Iterator[Any]:
+        """
+        Rows of a list, lazily: each value parsed by the children, their
+        typed columns converted in batches, then deduplicated by `key`,
+        filtered and stripped.
+        """
+        rows = iter(values)
+        if self.children:
+            converters = self.get_batch_converters()
+            deferred = frozenset(converters)
+            rows = (self.parse_children(vi, request, deferred) for vi in rows)
+            if converters:
+                rows = self.iter_converted(rows, converters)
+        if self.key:
+            rows = iter_unique(rows, self.key)
+        if self.compiled_filter:
+            rows = filter(lambda x: self.compiled_filter(item=x), rows)
+        if self.strip:
+            rows = (vi.strip("\n ") if isinstance(vi, str) else vi for vi in rows)
+        return rows
+
+    def get_batch_converters(self) -> Dict[str, Converter]:
+        """
+        Converters of the children whose column is converted in batches:
+        single values with nothing to run after the conversion.
+        """
+        return {
+            c.name: c.converter
+            for c in self.get_item_children()
+            if c.converter is not None
+            and not c.compiled_post_parse
+            and not c.many
+            and not c.children
+            and not c.has_follow_up()
+        }
+
+    def iter_converted(
+        self, rows: Iterator[Dict[str, Any]], converters: Dict[str, Converter]
+    ) -> Iterator[Dict[str, Any]]:
+        """Rows with their typed columns converted, a batch of rows at a time."""
+        name = self.get_id_or_name()
+        while True:
+            batch = list(islice(rows, DEFAULT_CONVERT_BATCH_SIZE))
+            if not batch:
+                return
+            with get_metrics().span("convert", parser=name):
+                for column, converter in converters.items():
+                    values = converter.convert_many([row[column] for row in batch])
+                    for row, v in zip(batch, values):
+                        row[column] = v
+            yield from batch
+
+    def get_column_types(self) -> Dict[str, str]:
+        """
+        `type` of the columns of this item's records, by column name, for
+        tabular exports; `value` for a list of single values.
+        """
+        if self.children:
+            return {
+                c.name: c.type
+                for c in self.get_item_children()
+                if c.type and not c.compiled_post_parse and not c.many
+            }
+        if self.type and not self.compiled_post_parse:
+            return {VALUE_COLUMN: self.type}
+        return {}
+
+    def get_item_children(self) -> List[ItemTag]:
+        return [c for c in self.children if isinstance(c, ItemTag) and c.name]
+
+    def parse_children(
+        self,
+        value: Any,
+        request: "RequestTag",
+        deferred: frozenset = frozenset(),
+    ) -> Dict[str, Any]:
+        """
+        Parse one element (one row of a list) with the child items. XPath
+        prefixes shared by the children are evaluated once, see
+        htms.selectors. The children named in `deferred` are left
+        unconverted, for iter_converted().
+        """
+        items = self.get_item_children()
+        if not isinstance(value, html.HtmlElement):
+            return {
+                item.name: item.parse(value, request, item.name not in deferred)
+                for item in items
+            }
+        plan = get_selector_plan(tuple(item.xpath for item in items))
+        if plan.is_empty():
+            return {
+                item.name: item.parse(value, request, item.name not in deferred)
+                for item in items
+            }
+
+        with get_metrics().span("xpath", parser=self.get_id_or_name()):
+            selected = plan.select(value)
+        return {
+            item.name: (
+                item.parse(value, request, item.name not in deferred)
+                if nodes is None
+                else item.parse_selection(nodes, request, item.name not in deferred)
+            )
+            for item, nodes in zip(items, selected)
+        }
+
     def has_follow_up(self) -> bool:
         return bool(self.follow_up_url and self.follow_up_parser_names)
 
@@ -143,11 +337,9 @@ class ItemTag(TagBase):
             return
 
         if self.many:
-            urls = [
-                eval(self.follow_up_url, {}, {"value": value}) for value in self.value
-            ]
+            urls = [self.compiled_follow_up_url(value=value) for value in self.value]
         else:
-            urls = [eval(self.follow_up_url, {}, {"value": self.value})]
+            urls = [self.compiled_follow_up_url(value=self.value)]
         rl = RequestListTag.from_attrs(
             {
                 "parsers": self.follow_up_parser_names,
@@ -11,5 +11,6 @@ from lxml import html
 class ListTag(ItemTag):
 
     def __post_init__(self):
+        super().__post_init__()
         self._tag_type = LIST_TAG
         self.many = True
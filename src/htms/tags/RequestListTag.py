@@ -1,18 +1,53 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Union
+from itertools import repeat
+from typing import Iterable, Iterator, List, Optional, Dict, Any, Union
 
 from htms.tags.ExportTag import ExportTag
+from htms.scheduler import HostLimits
+from htms.retry import RetryPolicy
+from htms.utils import parse_duration
+from htms.expressions import Expression
 from htms.tags.TagBase import TagBase
 from htms.tags.RequestTag import RequestTag
 from htms.tags.constants import REQUEST_LIST_TAG, JSON_RESPONSE_TYPE, HTML_RESPONSE_TYPE
 from htms.logging import logger
 
 
+class ListRequest:
+    """
+    Request of a request list. Only the url and meta are its own, everything
+    else is read from a RequestTag template shared by the whole list, so a
+    list of millions of requests doesn't hold millions of RequestTags.
+    """
+
+    __slots__ = ("template", "url", "meta", "streamed_rows")
+
+    def __init__(self, template: RequestTag, url: str, meta: Dict[str, Any]):
+        self.template = template
+        self.url = url
+        self.meta = meta
+        self.streamed_rows = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.template, name)
+
+    def __str__(self) -> str:
+        pnames = list(map(lambda x: x.get_id_or_name(), self.parsers))
+        return f"<ListRequest url='{self.url}' parser_names={self.parser_names} parsers={pnames} >"
+
+    __repr__ = __str__
+
+
 @dataclass
 class RequestListTagBase:
     _list: List[Any] = field(default_factory=list)
-    get_url: str = ""
+    # the `list` expression, evaluated each time the list runs so that lazy
+    # iterables (generators, range) are never materialized; `_list` is
+    # used when it's None
+    list_expr: Optional[Expression] = None
+    get_url: str = "lambda x: x"
+    get_url_fn: Any = field(default=None, init=False, repr=False)
     # pagination_xpath: Optional[str] = None
 
     method: str = "GET"
@@ -32,12 +67,33 @@ class RequestListTagBase:
 
     response_type: Optional[str] = None
 
+    # per-host rate-limit / max-in-flight, see htms.scheduler
+    limits: Optional[HostLimits] = None
+    # retry policy, falls back to HTMSParser.retry_policy
+    retry: Optional[RetryPolicy] = None
+    # seconds a cached response stays fresh, from the `cache` attribute
+    cache_ttl: Optional[float] = None
+    # `stream` of the generated requests, see RequestTag
+    stream: Optional[str] = None
+
 
 @dataclass
 class RequestListTag(TagBase, RequestListTagBase):
 
     def __post_init__(self):
         self._tag_type = REQUEST_LIST_TAG
+        # get-url is a lambda, so it is evaluated once into a function
+        self.get_url_fn = Expression(self.get_url)()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # functions can't be pickled, get-url is evaluated again on load
+        state = self.__dict__.copy()
+        state["get_url_fn"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.get_url_fn = Expression(self.get_url)()
 
     @classmethod
     def from_attrs(cls, data: Dict[str, Any]) -> RequestListTag:
@@ -48,7 +104,7 @@ class RequestListTag(TagBase, RequestListTagBase):
             [x.strip() for x in data["concat"].split(",")] if data.get("concat") else []
         )
         return cls(
-            _list=eval(data.get("list", "[]"), {}, locals()),
+            list_expr=Expression(data["list"]) if "list" in data else None,
             get_url=data.get("get-url", "lambda x: x"),
             parser_names=parser_names,
             method=data.get("method", "GET"),
@@ -56,41 +112,78 @@ class RequestListTag(TagBase, RequestListTagBase):
             concat=concat,
             response_type=data.get("type", HTML_RESPONSE_TYPE),
             meta=data.get("meta", []),
+            limits=HostLimits.from_attrs(data),
+            retry=RetryPolicy.from_attrs(data),
+            cache_ttl=parse_duration(data["cache"]) if data.get("cache") else None,
+            stream=(data["stream"] or "") if "stream" in data else None,
         )
 
-    def generate_requests(self) -> List[RequestTag]:
-        requests = []
-
-        metas = (
-            self.meta
-            if isinstance(self.meta, list)
-            else [self.meta for _ in self._list]
+    def get_items(self) -> Iterable[Any]:
+        return self.list_expr() if self.list_expr is not None else self._list
+
+    def make_template(self) -> RequestTag:
+        """RequestTag holding what every request of the list shares."""
+        template = RequestTag(
+            url="",
+            parser_names=self.parser_names,
+            method=self.method,
+            headers=self.headers,
+            meta={},
+            response_type=self.response_type,
+            children=self.children,
+            limits=self.limits,
+            retry=self.retry,
+            cache_ttl=self.cache_ttl,
+            stream=self.stream,
         )
-        if len(metas) != len(self._list):
+        # the parsers are the same for every request of the list
+        template.parsers = self.parsers
+        return template
+
+    def iter_requests(
+        self,
+        items: Optional[Iterable[Any]] = None,
+        template: Optional[RequestTag] = None,
+    ) -> Iterator[ListRequest]:
+        """
+        Requests of the list, created one at a time while they are consumed.
+        `items` are the evaluated `list`, see get_items().
+        """
+        if items is None:
+            items = self.get_items()
+        if template is None:
+            template = self.make_template()
+
+        if not isinstance(self.meta, list):
+            metas = repeat(self.meta)
+        elif hasattr(items, "__len__") and len(self.meta) != len(items):
             logger.error(
-                f"Request list meta length {len(metas)} != list length {len(self._list)}"
-            )
-            metas = [{} for _ in self._list]
-
-        for i, item in enumerate(self._list):
-            url = eval(self.get_url, {}, locals())(item)
-            r = RequestTag(
-                url=url,
-                parser_names=self.parser_names,
-                method=self.method,
-                headers=self.headers,
-                meta=metas[i],
-                response_type=self.response_type,
-                children=self.children,
+                "Request list meta length %d != list length %d",
+                len(self.meta),
+                len(items),
             )
-            requests.append(r)
-        return requests
+            metas = None
+        else:
+            metas = iter(self.meta)
+
+        for item in items:
+            meta = next(metas, {}) if metas is not None else {}
+            yield ListRequest(template, self.get_url_fn(item), meta)
+
+    def generate_requests(self) -> List[ListRequest]:
+        return list(self.iter_requests())
 
     def __str__(self) -> str:
-        return f'<RequestListTag list={self._list} get_url="{self.get_url}" method="{self.method}" parser_names={self.parser_names} concat={self.concat}>'
+        return f'<RequestListTag list={self.list_expr or self._list} get_url="{self.get_url}" method="{self.method}" parser_names={self.parser_names} concat={self.concat}>'
 
     def __repr__(self) -> str:
-        return f'<RequestListTag list={self._list} get_url="{self.get_url}" method="{self.method}" parser_names={self.parser_names} concat={self.concat}>'
+        return f'<RequestListTag list={self.list_expr or self._list} get_url="{self.get_url}" method="{self.method}" parser_names={self.parser_names} concat={self.concat}>'
 
     def get_export_tags(self) -> List[ExportTag]:
         return list(filter(lambda x: isinstance(x, ExportTag), self.children))
+
+    def get_stream_export_tags(self) -> List[ExportTag]:
+        return [t for t in self.get_export_tags() if t.is_streaming()]
+
+    def get_batch_export_tags(self) -> List[ExportTag]:
+        return [t for t in self.get_export_tags() if not t.is_streaming()]
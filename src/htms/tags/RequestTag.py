@@ -3,12 +3,17 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any, Union, TYPE_CHECKING
 
 from htms.tags.ExportTag import ExportTag
+from htms.scheduler import HostLimits
+from htms.retry import RetryPolicy
+from htms.utils import parse_duration
+from htms.pagination import Pagination
 
 from .TagBase import TagBase
 from .constants import REQUEST_TAG, JSON_RESPONSE_TYPE, HTML_RESPONSE_TYPE
 
 if TYPE_CHECKING:
     from htms.tags.ListTag import ListTag, ItemTag
+    from htms.pagination import Paginator
 
 
 @dataclass
@@ -22,11 +27,37 @@ class RequestTagBase:
 
     response_type: Optional[str] = HTML_RESPONSE_TYPE
 
+    # per-host rate-limit / max-in-flight, see htms.scheduler
+    limits: Optional[HostLimits] = None
+    # retry policy, falls back to HTMSParser.retry_policy
+    retry: Optional[RetryPolicy] = None
+    # seconds a cached response stays fresh, from the `cache` attribute
+    cache_ttl: Optional[float] = None
+    # parse the response while it downloads, see htms.streaming; the dotted
+    # path of the streamed array for JSON, None when not streamed
+    stream: Optional[str] = None
+
     parsers: List[Union[ItemTag, ListTag]] = field(default_factory=list, init=False)
 
 
 @dataclass
 class RequestTag(TagBase, RequestTagBase):
+    # total-pages / next page pagination, see htms.pagination
+    pagination: Optional[Pagination] = None
+    # parsers whose outputs are concatenated across pages
+    concat: List[str] = field(default_factory=list)
+
+    # set while the pages of a paginated request run
+    paginator: Optional[Paginator] = field(default=None, init=False, repr=False)
+    is_first_page: bool = field(default=True, init=False, repr=False)
+    # page URLs found on this page, recorded in the checkpoint
+    next_pages: List[str] = field(default_factory=list, init=False, repr=False)
+    # open streaming exports that the rows of streamed lists are written to
+    # directly, by parser name, and the number of rows written
+    row_sinks: Dict[str, List[ExportTag]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    streamed_rows: int = field(default=0, init=False, repr=False)
 
     def __post_init__(self):
         self._tag_type = REQUEST_TAG
@@ -36,6 +67,9 @@ class RequestTag(TagBase, RequestTagBase):
         parser_names = (
             [x.strip() for x in data["parsers"].split(",")] if "parsers" in data else []
         )
+        concat = (
+            [x.strip() for x in data["concat"].split(",")] if data.get("concat") else []
+        )
         return RequestTag(
             url=data["url"],
             parser_names=parser_names,
@@ -43,6 +77,12 @@ class RequestTag(TagBase, RequestTagBase):
             headers=data.get("headers", {}),
             response_type=data.get("type", HTML_RESPONSE_TYPE),
             cookies=data.get("cookies"),
+            limits=HostLimits.from_attrs(data),
+            retry=RetryPolicy.from_attrs(data),
+            cache_ttl=parse_duration(data["cache"]) if data.get("cache") else None,
+            stream=(data["stream"] or "") if "stream" in data else None,
+            pagination=Pagination.from_attrs(data),
+            concat=concat,
         )
 
     def __str__(self) -> str:
@@ -53,5 +93,15 @@ class RequestTag(TagBase, RequestTagBase):
         pnames = list(map(lambda x: x.get_id_or_name(), self.parsers))
         return f"<RequestTag url='{self.url}' parser_names={self.parser_names} parsers={pnames} >"
 
+    def streams_exports(self) -> bool:
+        """Paginated and streamed requests write streaming exports while they run."""
+        return self.pagination is not None or self.stream is not None
+
     def get_export_tags(self) -> List[ExportTag]:
         return list(filter(lambda x: isinstance(x, ExportTag), self.children))
+
+    def get_stream_export_tags(self) -> List[ExportTag]:
+        return [t for t in self.get_export_tags() if t.is_streaming()]
+
+    def get_batch_export_tags(self) -> List[ExportTag]:
+        return [t for t in self.get_export_tags() if not t.is_streaming()]
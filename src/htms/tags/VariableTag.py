@@ -5,8 +5,6 @@ from .TagBase import TagBase
 from .constants import VARIABLE_TAG
 from htms.logging import logger
 import json
-import requests
-import http
 
 
 @dataclass
@@ -11,5 +11,7 @@ HTML_RESPONSE_TYPE = "html"
 JSON_RESPONSE_TYPE = "json"
 
 JSON_EXPORT_FORMAT = "json"
+JSONL_EXPORT_FORMAT = "jsonl"
 CSV_EXPORT_FORMAT = "csv"
+PARQUET_EXPORT_FORMAT = "parquet"
 EXCEL_EXPORT_FORMAT = "excel"
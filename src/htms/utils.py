@@ -1,17 +1,19 @@
-import http
-import requests
+from typing import Iterable, Iterator
 
 
-def remove_dup(items: list[dict], key: str):
+def iter_unique(items: Iterable[dict], key: str) -> Iterator[dict]:
+    """Items whose `key` was not seen before, in order."""
     keys = set()
-    output = []
     for item in items:
         v = item[key]
         if v in keys:
             continue
         keys.add(v)
-        output.append(item)
-    return output
+        yield item
+
+
+def remove_dup(items: list[dict], key: str):
+    return list(iter_unique(items, key))
 
 
 def parse_lambda(lambda_str: str, value: any, default_str: str):
@@ -29,6 +31,9 @@ def parse_lambda(lambda_str: str, value: any, default_str: str):
 
 
 def make_cookie_jar_from_str(cookie_str: str):
+    import http.cookiejar
+    import requests
+
     cookie_jar = http.cookiejar.CookieJar()
     cookies = cookie_str.split("; ")
     for cookie in cookies:
@@ -36,3 +41,14 @@ def make_cookie_jar_from_str(cookie_str: str):
         cookie = requests.cookies.create_cookie(name=name, value=value)
         cookie_jar.set_cookie(cookie)
     return cookie_jar
+
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(duration_str: str) -> float:
+    """Parse a duration like '30', '90s', '15m', '1h' or '7d' into seconds."""
+    duration_str = duration_str.strip().lower()
+    if duration_str and duration_str[-1] in DURATION_UNITS:
+        return float(duration_str[:-1]) * DURATION_UNITS[duration_str[-1]]
+    return float(duration_str)
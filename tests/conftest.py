@@ -0,0 +1,197 @@
+"""
+Shared fixtures: a local HTTP server whose routes are registered by each
+test, and a helper running a spec against it.
+"""
+
+import asyncio
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Union
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from htms.HTMSLParser import HTMSParser
+from htms.constants import VERBOSITY_QUIET
+from htms.metrics import Metrics, set_metrics
+from htms.retry import RetryPolicy
+
+
+class Page:
+    """Response of a fixture route."""
+
+    def __init__(
+        self,
+        body: Union[str, bytes, Any] = b"",
+        status: int = 200,
+        headers: Dict[str, str] = None,
+        content_type: str = None,
+    ):
+        if isinstance(body, str):
+            body = body.encode()
+            content_type = content_type or "text/html; charset=utf-8"
+        elif not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            content_type = content_type or "application/json"
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+        if content_type:
+            self.headers.setdefault("Content-Type", content_type)
+
+
+class FixtureRequest:
+    def __init__(self, path: str, query: Dict[str, str], headers: Dict[str, str]):
+        self.path = path
+        self.query = query
+        self.headers = headers
+
+
+# a route is a fixed response or a function of the request
+Route = Union[Page, str, bytes, dict, list, Callable[[FixtureRequest], Any]]
+
+
+class FixtureServer:
+    """
+    HTTP server on localhost serving the routes of the running test. Counts
+    the requests of each path in `hits` and keeps them in `requests`.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Route] = {}
+        self.hits: Counter = Counter()
+        self.requests: List[FixtureRequest] = []
+        self.connections = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(self))
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def route(self, path: str, response: Route):
+        self.routes[path] = response
+
+    def reset(self):
+        self.routes.clear()
+        self.hits.clear()
+        self.requests.clear()
+        self.connections = 0
+
+    def respond(self, request: FixtureRequest) -> Page:
+        self.hits[request.path] += 1
+        self.requests.append(request)
+        route = self.routes.get(request.path)
+        if route is None:
+            return Page("not found", status=404)
+        if callable(route):
+            route = route(request)
+        return route if isinstance(route, Page) else Page(route)
+
+
+def make_handler(server: FixtureServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            server.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            page = server.respond(FixtureRequest(url.path, query, dict(self.headers)))
+            self.send_response(page.status)
+            for name, value in page.headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(page.body)))
+            self.end_headers()
+            self.wfile.write(page.body)
+
+        do_POST = do_GET
+
+    return Handler
+
+
+@pytest.fixture(scope="session")
+def fixture_server():
+    server = FixtureServer()
+    yield server
+    server.httpd.shutdown()
+
+
+@pytest.fixture
+def server(fixture_server: FixtureServer) -> FixtureServer:
+    fixture_server.reset()
+    yield fixture_server
+    fixture_server.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    yield
+    set_metrics(Metrics(enabled=False))
+
+
+def table_page(page: int, rows: int = 3, pages: int = None) -> str:
+    """HTML page of a table with `rows` rows, linking to the next page."""
+    trs = "".join(
+        f"<tr><td class='id'>{page}-{i}</td><td><span>{i * 1000:,}</span></td>"
+        f"<td><a href='/detail/{page}/{i}'>d</a></td></tr>"
+        for i in range(rows)
+    )
+    next_link = ""
+    if pages is not None and page < pages:
+        next_link = f"<a class='next' href='/table?page={page + 1}'>next</a>"
+    return (
+        f"<html><body><div class='total'>Page {page} of {pages or 1}</div>"
+        f"<table>{trs}</table>{next_link}</body></html>"
+    )
+
+
+def table_route(rows: int = 3, pages: int = None) -> Callable[[FixtureRequest], str]:
+    return lambda r: table_page(int(r.query.get("page", 1)), rows, pages)
+
+
+# retries without waiting between attempts
+FAST_RETRY = RetryPolicy(max_attempts=3, backoff=0.0, jitter=0.0)
+
+
+def make_parser(spec: str, server: FixtureServer = None, **kwargs) -> HTMSParser:
+    """Parser of a spec, with `{{base_url}}` replaced by the server's url."""
+    kwargs.setdefault("verbosity", VERBOSITY_QUIET)
+    kwargs.setdefault("retry_policy", FAST_RETRY)
+    parser = HTMSParser(**kwargs)
+    if server is not None:
+        spec = spec.replace("{{base_url}}", server.url)
+    parser.load_spec(spec)
+    return parser
+
+
+def run_parser(parser: HTMSParser, concurrency: int = 0) -> Any:
+    """Run a parser with start(), or start_async() when `concurrency` is set."""
+    if concurrency:
+        output = asyncio.run(parser.start_async(concurrency=concurrency))
+    else:
+        output = parser.start()
+    return output[-1] if output else None
+
+
+def run_spec(
+    spec: str, server: FixtureServer = None, concurrency: int = 0, **kwargs
+) -> Any:
+    """Run a spec and return the output of its last request (list)."""
+    return run_parser(make_parser(spec, server, **kwargs), concurrency)
+
+
+@pytest.fixture(params=[0, 4], ids=["sync", "async"])
+def concurrency(request) -> int:
+    """Run a test with start() and with start_async()."""
+    return request.param
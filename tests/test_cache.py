@@ -0,0 +1,56 @@
+import time
+
+import requests
+from conftest import Page, make_parser, run_parser
+
+from htms.cache import ResponseCache
+
+SPEC = """
+<request url="{{base_url}}/page">
+  <item name="title" xpath="//h1/text()"></item>
+</request>
+"""
+
+
+def cached_page(request):
+    if request.headers.get("If-None-Match") == '"v1"':
+        return Page(b"", status=304)
+    return Page("<h1>Title</h1>", headers={"ETag": '"v1"'})
+
+
+def test_fresh_pages_are_served_from_the_cache(server, tmp_path):
+    server.route("/page", cached_page)
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+
+    for _ in range(2):
+        parser = make_parser(SPEC, server, cache=cache, cache_ttl=60)
+        assert run_parser(parser) == {"title": "Title"}
+
+    assert server.hits["/page"] == 1
+    assert (cache.hits, cache.stale, cache.misses) == (1, 0, 1)
+
+
+def test_stale_entries_are_revalidated_and_not_counted_as_hits(server, tmp_path):
+    server.route("/page", cached_page)
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    run_parser(make_parser(SPEC, server, cache=cache, cache_ttl=60))
+
+    time.sleep(0.05)
+    parser = make_parser(SPEC, server, cache=cache, cache_ttl=0.01)
+    assert run_parser(parser) == {"title": "Title"}
+
+    assert server.hits["/page"] == 2
+    assert server.requests[-1].headers.get("If-None-Match") == '"v1"'
+    assert (cache.hits, cache.stale, cache.misses) == (0, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    server.route("/page", Page("x" * 100))
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_size=250)
+    response = requests.get(f"{server.url}/page")
+    for key in ("a", "b", "c"):
+        cache.put(key, response)
+        time.sleep(0.01)
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
@@ -0,0 +1,60 @@
+import datetime
+from decimal import Decimal
+
+from conftest import make_parser, run_parser
+
+from htms.checkpoint import Checkpoint
+
+TYPED_SPEC = """
+<request url="{{base_url}}/table">
+  <list name="rows" xpath="//table/tr">
+    <item name="id" xpath="./td[1]/text()"></item>
+    <item name="amount" xpath="./td[2]/span/text()" type="decimal:2"></item>
+    <item name="day" xpath="./td[3]/text()" type="date"></item>
+  </list>
+</request>
+"""
+
+
+def table(request):
+    return (
+        "<table>"
+        "<tr><td>1-1</td><td><span>1,000.5</span></td><td>2024-01-01</td></tr>"
+        "<tr><td>1-2</td><td><span>2,000</span></td><td>2024-01-02</td></tr>"
+        "</table>"
+    )
+
+
+def test_outputs_keep_their_types(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "state.db"))
+    output = {
+        "price": Decimal("1.50"),
+        "at": datetime.datetime(2024, 5, 1, 12, 30),
+        "on": datetime.date(2024, 5, 1),
+        "time": datetime.time(8, 15),
+        "rows": [{"n": 1, "x": None, "s": "a"}],
+    }
+    checkpoint.record("f", "http://x", output, pages=["http://x?page=2"])
+
+    restored = Checkpoint(str(tmp_path / "state.db"))
+    assert restored.get("f") == output
+    assert type(restored.get("f")["at"]) is datetime.datetime
+    assert restored.get_pages("f") == ["http://x?page=2"]
+    assert restored.get("missing") is None
+    assert restored.restored == 2
+    assert "f" in restored and len(restored) == 1
+
+
+def test_resumed_run_restores_typed_values(server, tmp_path):
+    server.route("/table", table)
+    state = str(tmp_path / "state.db")
+
+    first = run_parser(make_parser(TYPED_SPEC, server, checkpoint=Checkpoint(state)))
+    checkpoint = Checkpoint(state)
+    second = run_parser(make_parser(TYPED_SPEC, server, checkpoint=checkpoint))
+
+    assert server.hits["/table"] == 1
+    assert checkpoint.restored == 1
+    assert second == first
+    assert second["rows"][0]["amount"] == Decimal("1000.50")
+    assert second["rows"][1]["day"] == datetime.date(2024, 1, 2)
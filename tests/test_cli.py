@@ -0,0 +1,82 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from conftest import Page, table_page, table_route
+
+SRC = str(Path(__file__).resolve().parent.parent / "src")
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        env={"PYTHONPATH": SRC},
+        timeout=60,
+    )
+
+
+def test_import_is_lazy():
+    result = run_python(
+        "-c",
+        "import sys, htms, htms.__main__; "
+        "print([m for m in ('requests', 'lxml', 'rich') if m in sys.modules])",
+    )
+    assert result.stdout.strip() == "[]", result.stderr
+
+
+def test_help_does_not_load_the_parser():
+    result = run_python(
+        "-X", "importtime", "-m", "htms", "--help"
+    )
+    assert result.returncode == 0
+    assert "usage: python -m htms" in result.stdout
+    assert "lxml" not in result.stderr
+
+
+def test_cli_runs_a_spec(server, tmp_path):
+    server.route("/table", table_route(rows=2))
+    spec = tmp_path / "spec.html"
+    out = tmp_path / "out.json"
+    spec.write_text(
+        f"""
+        <request url="{server.url}/table">
+          <list name="ids" xpath="//td[1]/text()"></list>
+          <export path="{out}" format="json"></export>
+        </request>
+        """
+    )
+    result = run_python("-m", "htms", str(spec), "-q")
+
+    assert result.returncode == 0, result.stderr
+    assert json.loads(out.read_text()) == {"ids": ["1-0", "1-1"]}
+
+
+def test_cli_reruns_dead_letters(server, tmp_path):
+    broken = [True]
+    server.route(
+        "/table", lambda r: Page("down", status=500) if broken[0] else table_page(1)
+    )
+    spec = tmp_path / "spec.html"
+    out = tmp_path / "out.json"
+    failed = tmp_path / "failed.json"
+    spec.write_text(
+        f"""
+        <request url="{server.url}/table">
+          <list name="ids" xpath="//td[1]/text()"></list>
+          <export path="{out}" format="json"></export>
+        </request>
+        """
+    )
+    args = ["-m", "htms", str(spec), "-q", "--retries", "0"]
+    result = run_python(*args, "--dead-letters", str(failed))
+    assert result.returncode == 0, result.stderr
+    assert len(json.loads(failed.read_text())) == 1
+    assert not out.exists()
+
+    broken[0] = False
+    result = run_python(*args, "--rerun-dead-letters", str(failed))
+    assert result.returncode == 0, result.stderr
+    assert json.loads(out.read_text()) == {"ids": ["1-0", "1-1", "1-2"]}
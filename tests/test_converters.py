@@ -0,0 +1,77 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from conftest import make_parser, run_spec
+
+from htms.constants import DEFAULT_VECTORIZE_MIN_SIZE
+from htms.converters import Converter, cast_with_arrow
+
+TYPED_EXPORT_SPEC = """
+<request url="http://example.test">
+  <list name="rows" xpath="//tr">
+    <item name="price" xpath="./td/text()" type="decimal:2"></item>
+  </list>
+  <export path="{path}" format="parquet"></export>
+</request>
+"""
+
+
+@pytest.mark.parametrize(
+    "type, text, value",
+    [
+        ("int", " 1,234 ", 1234),
+        ("float", "1,234.5", 1234.5),
+        ("decimal:2", "3.14159", Decimal("3.14")),
+        ("bool", "Yes", True),
+        ("date", "2024-02-29", datetime.date(2024, 2, 29)),
+        ("date:%d/%m/%Y", "29/02/2024", datetime.date(2024, 2, 29)),
+        ("datetime", "2024-02-29T10:30", datetime.datetime(2024, 2, 29, 10, 30)),
+        ("int", "n/a", None),
+        ("bool", "maybe", None),
+    ],
+)
+def test_converters(type, text, value):
+    assert Converter(type)(text) == value
+
+
+def test_regex_keeps_the_first_group():
+    converter = Converter("float", regex=r"\$([\d,.]+)")
+    assert converter("price: $1,299.99") == 1299.99
+    assert converter("free") is None
+
+
+@pytest.mark.parametrize("type", ["number", "decimal:x"])
+def test_invalid_types(type):
+    with pytest.raises(ValueError, match="Invalid type"):
+        Converter(type)
+
+
+@pytest.mark.parametrize("type", ["int", "float"])
+def test_batched_conversion_matches_value_by_value(type):
+    texts = [f" {i * 1000:,} " for i in range(DEFAULT_VECTORIZE_MIN_SIZE)] + [None]
+    converter = Converter(type)
+    assert converter.convert_many(texts) == [converter(t) for t in texts]
+
+
+def test_arrow_cast_falls_back_on_texts_it_reads_differently():
+    pytest.importorskip("pyarrow")
+    assert cast_with_arrow(["0x10", "1"], "int") is None
+    assert cast_with_arrow([1, "2"], "int") is None
+
+
+def test_list_columns_are_converted(server):
+    rows = "".join(f"<tr><td>{i},000</td></tr>" for i in range(300))
+    server.route("/table", f"<table>{rows}</table>")
+    spec = """
+    <request url="{{base_url}}/table">
+      <list name="amounts" xpath="//td/text()" type="int"></list>
+    </request>
+    """
+    assert run_spec(spec, server)["amounts"] == [i * 1000 for i in range(300)]
+
+
+def test_exports_get_the_column_types_of_their_parser(tmp_path):
+    parser = make_parser(TYPED_EXPORT_SPEC.format(path=tmp_path / "out.parquet"))
+    export_tag = parser.requests[0].get_export_tags()[0]
+    assert export_tag.column_types == {"price": "decimal:2"}
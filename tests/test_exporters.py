@@ -0,0 +1,114 @@
+import csv
+import json
+
+import pytest
+
+from htms.exporters import CsvWriter, JsonLinesWriter, ParquetWriter, RecordWriter
+
+
+def test_record_writer_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        RecordWriter(str(tmp_path / "out"))
+
+
+def test_invalid_fsync_policy(tmp_path):
+    with pytest.raises(ValueError, match="Invalid fsync policy"):
+        JsonLinesWriter(str(tmp_path / "out.jsonl"), fsync="sometimes")
+
+
+def test_json_lines_are_flushed_every_n_records(tmp_path):
+    path = tmp_path / "out.jsonl"
+    writer = JsonLinesWriter(str(path), flush_every=2)
+    writer.write({"a": 1})
+    assert path.read_text() == ""
+    writer.write({"a": 2})
+    assert path.read_text().splitlines() == ['{"a": 1}', '{"a": 2}']
+    writer.write(3)
+    writer.close()
+    assert writer.count == 3
+    assert json.loads(path.read_text().splitlines()[-1]) == 3
+
+
+def test_csv_header_comes_from_the_first_record(tmp_path):
+    path = tmp_path / "out.csv"
+    writer = CsvWriter(str(path), fsync="close")
+    writer.write({"id": 1, "tags": ["a", "b"]})
+    writer.write({"id": 2, "extra": "ignored"})
+    writer.close()
+    writer.close()
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows == [{"id": "1", "tags": '["a", "b"]'}, {"id": "2", "tags": ""}]
+
+
+def test_parquet_batches_with_declared_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "out.parquet"
+    writer = ParquetWriter(str(path), batch_size=2, column_types={"price": "float"})
+    for i in range(5):
+        writer.write({"id": str(i), "price": i})
+    writer.close()
+
+    table = pq.read_table(path)
+    assert table.num_rows == 5
+    assert str(table.schema.field("price").type) == "double"
+    assert table.column("id").to_pylist() == ["0", "1", "2", "3", "4"]
+
+
+def test_failed_last_flush_keeps_earlier_batches(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "out.parquet"
+    writer = ParquetWriter(str(path), batch_size=2)
+    writer.write({"id": 1})
+    writer.write({"id": 2})
+    writer.write({"id": object()})
+    with pytest.raises(Exception):
+        writer.close()
+
+    assert writer.closed
+    assert pq.read_table(path).column("id").to_pylist() == [1, 2]
+
+
+def write_parquet(path, records, **kwargs):
+    writer = ParquetWriter(str(path), batch_size=2, **kwargs)
+    for record in records:
+        writer.write(record)
+    writer.close()
+
+
+def test_parquet_columns_widen_across_batches(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "out.parquet"
+    records = [
+        {"id": 1, "note": None},
+        {"id": 2, "note": None},
+        {"id": 3, "note": "late"},
+        {"id": 4.5, "note": None},
+        {"id": 5, "note": "x", "extra": True},
+    ]
+    write_parquet(path, records)
+
+    table = pq.read_table(path)
+    assert str(table.schema.field("id").type) == "double"
+    assert str(table.schema.field("note").type) == "string"
+    assert table.column("id").to_pylist() == [1.0, 2.0, 3.0, 4.5, 5.0]
+    assert table.column("note").to_pylist() == [None, None, "late", None, "x"]
+    assert table.column("extra").to_pylist() == [None, None, None, None, True]
+    assert not (tmp_path / "out.parquet.old").exists()
+
+
+def test_parquet_columns_of_different_kinds_become_strings(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "out.parquet"
+    write_parquet(path, [{"v": 1}, {"v": 2}, {"v": "n/a"}])
+    assert pq.read_table(path).column("v").to_pylist() == ["1", "2", "n/a"]
+
+
+def test_parquet_given_schema_warns_about_dropped_columns(tmp_path, caplog):
+    pa = pytest.importorskip("pyarrow")
+    path = tmp_path / "out.parquet"
+    schema = pa.schema([("id", pa.int64())])
+    write_parquet(path, [{"id": 1}, {"id": 2, "other": "x"}], schema=schema)
+    assert "Column 'other' is not in the schema" in caplog.text
+    assert pa.parquet.read_table(path).column_names == ["id"]
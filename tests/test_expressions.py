@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+from conftest import make_parser
+from lxml import html
+
+from htms.expressions import Expression, compile_expression
+
+
+def test_expression_is_compiled_once_per_source():
+    a = Expression("value * 2")
+    b = Expression("value * 2")
+    assert a.code is b.code
+    assert a(value=21) == 42
+
+
+def test_identity_and_empty_expressions_are_skipped():
+    assert compile_expression("value", identity="value") is None
+    assert compile_expression("  ") is None
+    assert compile_expression(None) is None
+    assert compile_expression("value.strip()", identity="value") is not None
+
+
+def test_expressions_only_see_safe_builtins():
+    assert Expression("re.sub('a', 'b', value)")(value="aa") == "bb"
+    assert Expression("element_to_string(value)")(
+        value=html.fromstring("<b>x</b>")
+    ) == "<b>x</b>"
+    with pytest.raises(NameError):
+        Expression("open('/etc/passwd')")()
+
+
+def test_syntax_errors_are_value_errors():
+    with pytest.raises(ValueError, match="Invalid expression"):
+        Expression("value +")
+
+
+def test_expressions_pickle_without_compiling_again():
+    expression = pickle.loads(pickle.dumps(Expression("len(value)")))
+    assert expression(value=[1, 2]) == 2
+    assert expression.source == "len(value)"
+
+
+def test_spec_syntax_errors_name_the_tag():
+    spec = '<request url="http://x"><item name="a" parse="value +"></item></request>'
+    with pytest.raises(ValueError, match="<item> at line 1"):
+        make_parser(spec)
@@ -0,0 +1,70 @@
+import pytest
+import requests
+from conftest import Page, run_spec
+from lxml import html
+
+from htms.extract import (
+    get_charset,
+    loads_json,
+    parse_document,
+    set_json_backend,
+    to_plain_data,
+)
+
+LATIN1_PAGE = "<html><body><h1>café</h1></body></html>".encode("latin-1")
+
+TITLE_SPEC = """
+<request url="{{base_url}}/page">
+  <item name="title" xpath="//h1/text()"></item>
+</request>
+"""
+
+
+def make_response(content_type: str) -> requests.Response:
+    response = requests.Response()
+    response.headers["Content-Type"] = content_type
+    return response
+
+
+def test_charset_is_only_taken_from_the_header():
+    assert get_charset(make_response("text/html; charset=ISO-8859-1")) == "ISO-8859-1"
+    assert get_charset(make_response("text/html")) is None
+
+
+def test_html_is_parsed_in_the_declared_charset():
+    tree = parse_document(LATIN1_PAGE, "html", "latin-1")
+    assert tree.xpath("//h1/text()") == ["café"]
+    with pytest.raises(ValueError, match="Invalid response type"):
+        parse_document(b"", "xml")
+
+
+def test_declared_charset_is_used_for_responses(server):
+    server.route(
+        "/page",
+        Page(LATIN1_PAGE, content_type="text/html; charset=ISO-8859-1"),
+    )
+    assert run_spec(TITLE_SPEC, server) == {"title": "café"}
+
+
+@pytest.mark.parametrize("backend", ["auto", "json"])
+def test_json_backends(backend):
+    assert set_json_backend(backend) in ("orjson", "msgspec", "json")
+    try:
+        assert loads_json(b'{"a": [1, 2]}') == {"a": [1, 2]}
+        assert loads_json('{"a": "é"}'.encode("utf-16"), "utf-16") == {
+            "a": "é"
+        }
+    finally:
+        set_json_backend()
+
+
+def test_unknown_json_backend():
+    with pytest.raises(ValueError, match="Unknown JSON backend"):
+        set_json_backend("yaml")
+
+
+def test_plain_data():
+    element = html.fromstring("<p>a<b>b</b></p>")
+    value = to_plain_data({"t": element.xpath("//b/text()"), "e": element[0]})
+    assert value == {"t": ["b"], "e": "<b>b</b>"}
+    assert type(value["t"][0]) is str
@@ -0,0 +1,65 @@
+import pytest
+from conftest import run_spec, table_route
+
+from htms.frontier import (
+    BloomSeenSet,
+    Frontier,
+    MemorySeenSet,
+    SeenSet,
+    SqliteSeenSet,
+    normalize_url,
+)
+
+DUPLICATES_SPEC = """
+<request-list
+  list="[1, 2, 1, 3, 2]"
+  get-url="lambda i: f'{{base_url}}/table?page={i}'"
+  concat="ids"
+>
+  <list name="ids" xpath="//td[@class='id']/text()"></list>
+</request-list>
+"""
+
+
+def test_seen_set_is_abstract():
+    with pytest.raises(TypeError):
+        SeenSet()
+
+
+def test_normalize_url():
+    assert (
+        normalize_url("HTTP://Example.COM:80/a?b=2&a=1#top")
+        == "http://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("https://example.com:8443") == "https://example.com:8443/"
+
+
+@pytest.mark.parametrize(
+    "make_seen",
+    [MemorySeenSet, BloomSeenSet, lambda: SqliteSeenSet(":memory:")],
+    ids=["memory", "bloom", "sqlite"],
+)
+def test_seen_sets(make_seen):
+    seen = make_seen()
+    assert seen.add(b"a" * 16)
+    assert seen.add(b"b" * 16)
+    assert not seen.add(b"a" * 16)
+    assert len(seen) == 2
+    seen.close()
+
+
+@pytest.mark.parametrize("dedup, hits", [(True, 3), (False, 5)], ids=["on", "off"])
+def test_duplicate_requests_are_fetched_once(server, concurrency, dedup, hits):
+    server.route("/table", table_route(rows=1))
+    frontier = Frontier() if dedup else None
+    output = run_spec(
+        DUPLICATES_SPEC,
+        server,
+        concurrency,
+        frontier=frontier,
+        dedup=dedup,
+    )
+    assert server.hits["/table"] == hits
+    assert len(output["ids"]) == hits
+    if dedup:
+        assert frontier.skipped == 2
@@ -0,0 +1,80 @@
+import pickle
+
+import pytest
+
+from htms.jsonpath import JsonPath, compile_json_path
+
+DATA = {
+    "data": {
+        "items": [
+            {"id": 1, "name": "a", "tags": ["x", "y"]},
+            {"id": 2, "name": "b", "tags": []},
+            {"id": 3, "first name": "c"},
+        ]
+    },
+    "total": 3,
+}
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("$.total", [3]),
+        ("total", [3]),
+        ("data.items[*].id", [1, 2, 3]),
+        ("$.data.items[0].name", ["a"]),
+        ("data.items.0.name", ["a"]),
+        ("data.items[-1]['first name']", ["c"]),
+        ("data.items[0:2].id", [1, 2]),
+        ("data.items[::2].id", [1, 3]),
+        ("data.items[0,2].id", [1, 3]),
+        ("data.items[0]['id','name']", [1, "a"]),
+        ("$..id", [1, 2, 3]),
+        ("data.items[*].tags[*]", ["x", "y"]),
+        ("data.missing", []),
+        ("data.items[5]", []),
+    ],
+)
+def test_paths(path, expected):
+    assert JsonPath(path)(DATA) == expected
+
+
+@pytest.mark.parametrize(
+    "path, message",
+    [
+        ("data.items[?(@.id > 1)]", "filter expressions are not supported"),
+        ("data.items[0", "unclosed"),
+        ("data.items[::0]", "slice step"),
+    ],
+)
+def test_invalid_paths(path, message):
+    with pytest.raises(ValueError, match=message):
+        JsonPath(path)
+
+
+def test_paths_are_compiled_once_and_pickle():
+    assert compile_json_path("a.b") is compile_json_path("a.b")
+    loaded = pickle.loads(pickle.dumps(JsonPath("data.items[*].id")))
+    assert loaded(DATA) == [1, 2, 3]
+
+
+def test_json_request_with_jsonpath(server):
+    from conftest import run_spec
+
+    server.route("/api", DATA)
+    output = run_spec(
+        """
+        <request url="{{base_url}}/api" type="json">
+          <list name="items" jsonpath="$.data.items[*]" filter="item['id'] > 1">
+            <item name="id" jsonpath="id"></item>
+            <item name="tag" jsonpath="tags[0]" default="-"></item>
+          </list>
+          <item name="total" jsonpath="total"></item>
+        </request>
+        """,
+        server,
+    )
+    assert output == {
+        "items": [{"id": 2, "tag": "-"}, {"id": 3, "tag": "-"}],
+        "total": 3,
+    }
@@ -0,0 +1,43 @@
+import logging
+
+from conftest import make_parser, run_parser, table_route
+
+from htms.scheduler import HostScheduler
+
+SPEC = """
+<request url="{{base_url}}/table">
+  <list name="ids" xpath="//td[1]/text()"></list>
+</request>
+"""
+
+
+def test_host_stats_are_only_built_when_logged(server, monkeypatch, caplog):
+    server.route("/table", table_route(rows=1))
+    calls = []
+    stats = HostScheduler.stats
+    monkeypatch.setattr(
+        HostScheduler, "stats", lambda self: calls.append(1) or stats(self)
+    )
+
+    caplog.set_level(logging.WARNING, logger="htms")
+    run_parser(make_parser(SPEC, server))
+    assert calls == []
+
+    caplog.set_level(logging.INFO, logger="htms")
+    run_parser(make_parser(SPEC, server))
+    assert calls == [1]
+    assert "Queued/wire time per host" in caplog.text
+
+
+def test_cookie_errors_are_logged_with_the_error(server, monkeypatch, caplog):
+    server.route("/table", table_route(rows=1))
+    parser = make_parser(SPEC, server)
+
+    def fail(url, cookies):
+        raise ValueError("bad cookie")
+
+    monkeypatch.setattr(parser.sessions, "set_cookies", fail)
+    parser.requests[0].cookies = "a=1"
+    with caplog.at_level(logging.ERROR, logger="htms"):
+        run_parser(parser)
+    assert "Failed to parse cookies: bad cookie" in caplog.text
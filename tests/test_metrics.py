@@ -0,0 +1,66 @@
+import json
+
+from htms.metrics import Histogram, Metrics
+
+from conftest import run_spec, table_route
+from test_concurrency import TABLE_LIST_SPEC
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.inc("x")
+    with metrics.span("stage"):
+        pass
+    assert metrics.counters == {} and metrics.histograms == {}
+
+
+def test_counters_spans_and_hooks():
+    metrics = Metrics()
+    seen = []
+    metrics.add_hook(lambda name, value, labels: seen.append((name, labels)))
+    metrics.inc("rows_total", 3, parser="rows")
+    metrics.inc("rows_total", 2, parser="rows")
+    with metrics.span("xpath", parser="rows"):
+        pass
+
+    data = metrics.to_json()
+    assert data["counters"]["rows_total"] == [
+        {"labels": {"parser": "rows"}, "value": 5}
+    ]
+    [stage] = data["histograms"]["stage_seconds"]
+    assert stage["labels"] == {"parser": "rows", "stage": "xpath"}
+    assert stage["count"] == 1
+    assert seen[-1] == ("stage_seconds", {"stage": "xpath", "parser": "rows"})
+
+
+def test_histogram_quantiles():
+    h = Histogram(buckets=(1, 2, 3))
+    for v in (0.5, 1.5, 1.5, 2.5):
+        h.observe(v)
+    assert h.quantile(0.5) == 2
+    assert h.quantile(1.0) == 2.5
+    assert h.to_dict()["count"] == 4
+
+
+def test_prometheus_text():
+    metrics = Metrics()
+    metrics.inc("pages_total", response_type="html")
+    metrics.observe("stage_seconds", 0.001, stage="fetch")
+    text = metrics.to_prometheus()
+    assert '# TYPE htms_pages_total counter' in text
+    assert 'htms_pages_total{response_type="html"} 1' in text
+    assert 'htms_stage_seconds_bucket{stage="fetch",le="+Inf"} 1' in text
+    assert 'htms_stage_seconds_count{stage="fetch"} 1' in text
+
+
+def test_run_writes_metrics(server, tmp_path):
+    server.route("/table", table_route(rows=3))
+    path = tmp_path / "metrics.json"
+    run_spec(TABLE_LIST_SPEC, server, metrics_path=str(path))
+
+    data = json.loads(path.read_text())
+    assert data["counters"]["rows_total"] == [
+        {"labels": {"parser": "rows"}, "value": 24}
+    ]
+    stages = {h["labels"]["stage"] for h in data["histograms"]["stage_seconds"]}
+    assert {"fetch", "document_parse", "xpath", "rows", "request"} <= stages
@@ -0,0 +1,68 @@
+import pytest
+from conftest import make_parser, run_parser, table_route
+
+from htms.pagination import to_page_count
+
+TOTAL_PAGES_SPEC = """
+<request
+  url="{{base_url}}/table?page=1"
+  total-pages="//div[@class='total']/text()"
+  page-url="lambda i: f'{{base_url}}/table?page={i}'"
+  {max_pages}
+  concat="rows"
+>
+  <list name="rows" xpath="//table/tr">
+    <item name="id" xpath="./td[1]/text()"></item>
+  </list>
+</request>
+"""
+
+NEXT_SPEC = """
+<request url="{{base_url}}/table?page=1" next="//a[@class='next']/@href" concat="rows"
+  {max_pages}>
+  <list name="rows" xpath="//table/tr">
+    <item name="id" xpath="./td[1]/text()"></item>
+  </list>
+</request>
+"""
+
+
+def get_pages(output) -> list:
+    return sorted({int(row["id"].split("-")[0]) for row in output["rows"]})
+
+
+@pytest.mark.parametrize("spec", [TOTAL_PAGES_SPEC, NEXT_SPEC], ids=["total", "next"])
+def test_all_pages_are_followed(server, concurrency, spec):
+    server.route("/table", table_route(rows=2, pages=6))
+    output = run_parser(make_parser(spec.replace("{max_pages}", ""), server), concurrency)
+    assert get_pages(output) == [1, 2, 3, 4, 5, 6]
+    assert server.hits["/table"] == 6
+
+
+@pytest.mark.parametrize("spec", [TOTAL_PAGES_SPEC, NEXT_SPEC], ids=["total", "next"])
+def test_max_pages_caps_the_pages_fetched(server, concurrency, spec):
+    server.route("/table", table_route(rows=2, pages=20))
+    parser = make_parser(spec.replace("{max_pages}", 'max-pages="5"'), server)
+    output = run_parser(parser, concurrency)
+
+    assert get_pages(output) == [1, 2, 3, 4, 5]
+    assert server.hits["/table"] == 5
+    assert parser.progress.total == 5
+    assert parser.progress.done == 5
+
+
+def test_pagination_stops_on_an_empty_page(server):
+    server.route(
+        "/table",
+        lambda r: table_route(rows=0 if r.query["page"] == "3" else 2, pages=20)(r),
+    )
+    output = run_parser(make_parser(NEXT_SPEC.replace("{max_pages}", ""), server))
+    assert get_pages(output) == [1, 2]
+
+
+def test_page_count():
+    assert to_page_count("Page 3 of 1,200") == 1200
+    assert to_page_count(["7"]) == 7
+    assert to_page_count(12.0) == 12
+    assert to_page_count("none") is None
+    assert to_page_count(True) is None
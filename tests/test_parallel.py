@@ -0,0 +1,27 @@
+from conftest import run_spec, table_route
+
+SPEC = """
+<request-list
+  list="range(1, 5)"
+  get-url="lambda i: f'{{base_url}}/table?page={i}'"
+  concat="rows"
+>
+  <list name="rows" xpath="//table/tr" filter="item['n'] != 0">
+    <item name="id" xpath="./td[1]/text()"></item>
+    <item name="n" xpath="./td[2]/span/text()" parse="int(value.replace(',', ''))"></item>
+    <item name="url" xpath="./td[3]/a/@href" parse="request.url + value"></item>
+  </list>
+</request-list>
+"""
+
+
+def test_parse_workers_give_the_same_output(server):
+    server.route("/table", table_route(rows=3))
+    expected = run_spec(SPEC, server)
+    output = run_spec(SPEC, server, concurrency=2, parse_workers=2)
+
+    assert output == expected
+    assert len(output["rows"]) == 8
+    assert output["rows"][0]["url"].endswith("/table?page=1/detail/1/1")
+    # plain data, not lxml smart strings
+    assert type(output["rows"][0]["id"]) is str
@@ -0,0 +1,57 @@
+import pytest
+from conftest import make_parser
+
+from htms.HTMSLParser import HTMSParser
+from htms.plan import PlanCache
+
+TWO_PARSERS = """
+<request url="http://example.test">
+  <list name="ids" xpath="//td[1]/text()"></list>
+  <list name="names" xpath="//td[2]/text()"></list>
+  <export path="out.{fmt}" format="{fmt}"{parser}></export>
+</request>
+"""
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_tabular_export_of_several_parsers_needs_a_parser(fmt):
+    with pytest.raises(ValueError, match="needs a 'parser' attribute"):
+        make_parser(TWO_PARSERS.format(fmt=fmt, parser=""))
+
+
+def test_tabular_export_with_a_parser_is_valid():
+    parser = make_parser(TWO_PARSERS.format(fmt="csv", parser=' parser="ids"'))
+    assert parser.requests[0].get_export_tags()[0].parser == "ids"
+
+
+def test_json_export_of_several_parsers_is_valid():
+    make_parser(TWO_PARSERS.format(fmt="json", parser=""))
+
+
+def test_all_problems_are_reported_together():
+    spec = """
+    <request url="http://example.test" parsers="missing" type="xml">
+      <item name="a" xpath="//a"></item>
+      <export path="out.txt" format="txt" parser="b"></export>
+    </request>
+    """
+    with pytest.raises(ValueError) as e:
+        make_parser(spec)
+    message = str(e.value)
+    assert "parser 'missing' not found" in message
+    assert "invalid type 'xml'" in message
+    assert "unsupported format 'txt'" in message
+    assert "parser 'b' not found" in message
+
+
+def test_plan_cache_skips_compiling_the_spec(tmp_path, monkeypatch):
+    spec = TWO_PARSERS.format(fmt="csv", parser=' parser="ids"')
+    cache = PlanCache(str(tmp_path))
+    HTMSParser().load_spec(spec, cache)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    parser = HTMSParser()
+    monkeypatch.setattr(parser, "compile", None)
+    plan = parser.load_spec(spec, cache)
+    assert [p.get_id_or_name() for p in plan.requests[0].parsers] == ["ids", "names"]
+    assert parser.requests[0].get_export_tags()[0].parser == "ids"
@@ -0,0 +1,43 @@
+import pytest
+from conftest import make_parser, run_spec, table_route
+
+from htms.tags.RequestListTag import ListRequest
+
+LIST_SPEC = """
+<request-list
+  list="range(1, 4)"
+  get-url="lambda i: f'{{base_url}}/table?page={i}'"
+  concat="ids"
+>
+  <list name="ids" xpath="//td[@class='id']/text()"></list>
+</request-list>
+"""
+
+
+def test_list_requests_share_a_template(server, concurrency):
+    server.route("/table", table_route(rows=2))
+    output = run_spec(LIST_SPEC, server, concurrency)
+    assert output == {"ids": ["1-0", "1-1", "2-0", "2-1", "3-0", "3-1"]}
+
+
+def test_request_list_without_parsers(server, concurrency):
+    server.route("/table", table_route(rows=2))
+    spec = """
+    <request-list
+      list="range(1, 3)"
+      get-url="lambda i: f'{{base_url}}/table?page={i}'"
+    ></request-list>
+    """
+    assert run_spec(spec, server, concurrency) == {}
+    assert server.hits["/table"] == 2
+
+
+def test_list_requests_have_no_attributes_of_their_own():
+    parser = make_parser(LIST_SPEC)
+    request_list = parser.request_generators[0]
+    template = request_list.make_template()
+    req = next(request_list.iter_requests(template=template))
+    assert isinstance(req, ListRequest)
+    assert req.parsers is template.parsers
+    with pytest.raises(AttributeError):
+        req.parsers = []
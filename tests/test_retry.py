@@ -0,0 +1,100 @@
+import json
+
+from conftest import Page, make_parser, run_parser, table_page
+
+LIST_SPEC = """
+<request-list
+  list="range(1, 5)"
+  get-url="lambda i: f'{{base_url}}/table?page={i}'"
+  concat="rows"
+>
+  <list name="rows" xpath="//table/tr">
+    <item name="id" xpath="./td[1]/text()"></item>
+  </list>
+  <export path="{{out}}" format="jsonl" parser="rows"></export>
+</request-list>
+"""
+
+
+def flaky_route(failing: set):
+    def respond(request):
+        page = int(request.query["page"])
+        if page in failing:
+            return Page("down", status=500)
+        return table_page(page, rows=2)
+
+    return respond
+
+
+def test_retries_until_success(server):
+    attempts = []
+
+    def respond(request):
+        attempts.append(request)
+        return Page("down", status=503) if len(attempts) < 3 else table_page(1)
+
+    server.route("/table", respond)
+    parser = make_parser(
+        """
+        <request url="{{base_url}}/table">
+          <list name="ids" xpath="//td[1]/text()"></list>
+        </request>
+        """,
+        server,
+    )
+    assert run_parser(parser) == {"ids": ["1-0", "1-1", "1-2"]}
+    assert len(attempts) == 3
+    assert parser.dead_letters == []
+
+
+def test_dead_letters_are_rerun_from_file(server, tmp_path, concurrency):
+    out = tmp_path / "rows.jsonl"
+    spec = LIST_SPEC.replace("{{out}}", str(out))
+    failing = {2, 3}
+    server.route("/table", flaky_route(failing))
+
+    parser = make_parser(spec, server)
+    run_parser(parser, concurrency)
+    assert sorted(dl.request.url.split("=")[1] for dl in parser.dead_letters) == [
+        "2",
+        "3",
+    ]
+    dead_letters = tmp_path / "failed.json"
+    parser.save_dead_letters(str(dead_letters))
+    saved = json.loads(dead_letters.read_text())
+    assert [d["request"] for d in saved] == [0, 0]
+
+    failing.clear()
+    server.hits.clear()
+    parser = make_parser(spec, server)
+    parser.load_dead_letters(str(dead_letters))
+    results = parser.rerun_dead_letters()
+
+    assert server.hits["/table"] == 2
+    assert [output is not None for _, output in results] == [True, True]
+    assert parser.dead_letters == []
+    rows = [json.loads(line)["id"] for line in out.read_text().splitlines()]
+    assert sorted(rows) == ["2-0", "2-1", "3-0", "3-1"]
+
+
+def test_rerun_single_request_exports_its_output(server, tmp_path):
+    out = tmp_path / "out.json"
+    broken = [True]
+    server.route(
+        "/table", lambda r: Page("down", status=500) if broken[0] else table_page(1)
+    )
+    spec = f"""
+    <request url="{{{{base_url}}}}/table">
+      <list name="ids" xpath="//td[1]/text()"></list>
+      <export path="{out}" format="json"></export>
+    </request>
+    """
+    parser = make_parser(spec, server)
+    run_parser(parser)
+    assert len(parser.dead_letters) == 1
+    assert not out.exists()
+
+    broken[0] = False
+    parser.rerun_dead_letters()
+    assert parser.dead_letters == []
+    assert json.loads(out.read_text()) == {"ids": ["1-0", "1-1", "1-2"]}
@@ -0,0 +1,47 @@
+from htms.tags.ItemTag import ItemTag
+
+from conftest import run_spec
+
+
+def make_list(attrs, children=()):
+    tag = ItemTag.from_attrs({"name": "rows", "many": True, **attrs})
+    for child in children:
+        child.parent = tag
+        tag.children.append(child)
+    return tag
+
+
+def test_rows_are_parsed_lazily():
+    tag = make_list({"filter": "item > 1"})
+    rows = tag.iter_rows(iter([1, 2, 3]), None)
+    assert not isinstance(rows, list)
+    assert list(rows) == [2, 3]
+
+
+def test_key_filter_and_strip_run_in_order():
+    tag = make_list({"filter": "item != ' b'", "strip": ""})
+    assert tag.parse_value([" a\n", " b", "c "], None) == ["a", "c"]
+
+    tag = make_list({"key": "id"})
+    rows = [{"id": 1, "v": "a"}, {"id": 1, "v": "b"}, {"id": 2, "v": "c"}]
+    assert tag.parse_value(rows, None) == [{"id": 1, "v": "a"}, {"id": 2, "v": "c"}]
+
+
+def test_list_without_operations_is_kept_as_is():
+    tag = make_list({})
+    values = ["a", "b"]
+    assert tag.parse_value(values, None) is values
+
+
+def test_parse_runs_on_the_collected_list(server):
+    server.route("/", "<html><body><p>1</p><p>2</p><p>2</p><p>3</p></body></html>")
+    output = run_spec(
+        """
+        <request url="{{base_url}}/">
+          <list name="ps" xpath="//p/text()" filter="item != '1'" parse="sorted(set(value))">
+          </list>
+        </request>
+        """,
+        server,
+    )
+    assert output == {"ps": ["2", "3"]}
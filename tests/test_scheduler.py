@@ -0,0 +1,49 @@
+import time
+
+from htms.scheduler import HostLimits, HostScheduler, TokenBucket, parse_retry_after
+
+URL = "http://example.test/page"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10.0)
+    now = time.monotonic()
+    assert bucket.take(now, bucket.rate) == 0.0
+    assert bucket.take(now, bucket.rate) > 0
+
+
+def test_merged_limits_are_the_stricter_ones():
+    merged = HostLimits(rate=5.0).merge(HostLimits(rate=2.0, max_in_flight=4))
+    assert merged == HostLimits(rate=2.0, max_in_flight=4)
+    assert HostLimits().merge(HostLimits()) == HostLimits()
+
+
+def test_backoff_survives_requests_with_different_limits():
+    scheduler = HostScheduler()
+    ticket = scheduler.acquire(URL, HostLimits(max_in_flight=8))
+    scheduler.release(ticket, 429, {"Retry-After": "0"})
+    state = scheduler.hosts["example.test"]
+    assert state.window == 4.0
+    assert state.rate_factor == 0.5
+
+    # a request to the same host with other limits keeps the learned backoff
+    ticket = scheduler.acquire(URL, HostLimits(rate=1000.0))
+    assert scheduler.hosts["example.test"] is state
+    assert state.window == 4.0
+    assert state.limits == HostLimits(rate=1000.0, max_in_flight=8)
+    assert state.bucket is not None
+    scheduler.release(ticket, 429, {"Retry-After": "0"})
+    assert state.window == 2.0
+    assert state.rate_factor == 0.25
+
+    # a stricter max-in-flight lowers the window
+    scheduler.release(scheduler.acquire(URL, HostLimits(max_in_flight=1)), 200)
+    assert state.window == 1.0
+    assert state.limits.max_in_flight == 1
@@ -0,0 +1,64 @@
+from lxml import etree, html
+
+from htms.selectors import (
+    SelectorPlan,
+    get_location_steps,
+    is_element_step,
+    split_steps,
+)
+from htms.streaming import get_last_step
+
+ROW = html.fromstring(
+    "<div class='row'>"
+    "<div class='info'><h2>t</h2><p><a href='/a'>x</a></p><span>1</span></div>"
+    "<div class='info2'><h2>u</h2></div>"
+    "</div>"
+)
+XPATHS = (
+    ".//div[@class='info']/h2/text()",
+    ".//div[@class='info']//a/@href",
+    ".//div[@class='info']/span/text()",
+    ".//div[@class='info2']/h2/text()",
+    "count(.//h2)",
+    None,
+)
+
+
+def test_split_steps_ignores_slashes_in_predicates_and_strings():
+    assert split_steps(".//a[@href='/x/y']/b") == [".", "", "a[@href='/x/y']", "b"]
+    assert split_steps("(//a)[1]") == ["(//a)[1]"]
+    assert get_last_step("//table[@id='a/b']/tr") == "tr"
+
+
+def test_location_steps():
+    assert is_element_step("div[@class='a'][2]")
+    assert is_element_step("child::td")
+    assert not is_element_step("text()")
+    assert get_location_steps(".//a/@href") == (".", "", "a", "@href")
+    assert get_location_steps("count(.//h2)") is None
+    assert get_location_steps("//a | //b") is None
+
+
+def test_plan_factors_shared_prefixes():
+    plan = SelectorPlan(XPATHS)
+    assert list(plan.prefixes) == [(".", "", "div[@class='info']")]
+    assert [f is not None for f in plan.fields] == [True, True, True, False, False, False]
+
+
+def test_plan_selects_the_same_nodes_as_the_full_xpaths():
+    plan = SelectorPlan(XPATHS)
+    selected = plan.select(ROW)
+    for xpath, nodes in zip(XPATHS, selected):
+        if nodes is not None:
+            assert nodes == etree.XPath(xpath)(ROW)
+
+
+def test_plan_falls_back_when_the_prefix_matches_several_nodes():
+    row = html.fromstring(
+        "<div><div class='info'><h2>a</h2></div><div class='info'><h2>b</h2></div></div>"
+    )
+    plan = SelectorPlan(XPATHS[:2])
+    assert plan.select(row) == [None, None]
+
+    empty = html.fromstring("<div><p>nothing</p></div>")
+    assert plan.select(empty) == [[], []]
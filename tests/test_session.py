@@ -0,0 +1,39 @@
+from htms.session import SessionPool, get_origin
+
+from conftest import run_spec, table_route
+from test_concurrency import TABLE_LIST_SPEC
+
+
+def test_sessions_are_shared_per_origin():
+    pool = SessionPool()
+    a = pool.get("http://example.com/a")
+    assert pool.get("HTTP://EXAMPLE.com/b?x=1") is a
+    assert pool.get("https://example.com/a") is not a
+    assert get_origin("http://Example.com:8080/x") == "http://example.com:8080"
+    pool.close()
+    assert pool.sessions == {}
+
+
+def test_cookies_are_attached_once():
+    pool = SessionPool()
+    pool.set_cookies("http://example.com/", "a=1; b=2")
+    pool.set_cookies("http://example.com/x", "a=1; b=2")
+    cookies = pool.get("http://example.com/").cookies
+    assert cookies.get("a") == "1" and cookies.get("b") == "2"
+
+
+def test_requests_reuse_keep_alive_connections(server):
+    server.route("/table", table_route(rows=1))
+    run_spec(TABLE_LIST_SPEC, server)
+
+    assert sum(server.hits.values()) == 8
+    assert server.connections == 1
+
+
+def test_default_headers_are_sent(server):
+    server.route("/table", table_route(rows=1))
+    run_spec(TABLE_LIST_SPEC, server)
+
+    headers = server.requests[0].headers
+    assert "Mozilla" in headers["User-Agent"]
+    assert "gzip" in headers["Accept-Encoding"]
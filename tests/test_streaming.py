@@ -0,0 +1,81 @@
+import pytest
+from conftest import make_parser, run_spec
+
+from htms.streaming import compile_row_matcher
+
+PAGE = """
+<html><body>
+<table id="nav"><tr><td>home</td></tr><tr><td>about</td></tr></table>
+<table id="data">
+  <tr class="row"><td>1</td></tr>
+  <tr class="row"><td>2</td></tr>
+  <tr class="row"><td>3</td></tr>
+</table>
+</body></html>
+"""
+
+STREAM_SPEC = """
+<request url="{{base_url}}/page" stream>
+  <list name="rows" xpath="{xpath}">
+    <item name="n" xpath="./td/text()"></item>
+  </list>
+</request>
+"""
+
+
+@pytest.mark.parametrize(
+    "xpath", ["//table[@id='data']//tr", "/html/body/table/tr", "//table//tr"]
+)
+def test_xpaths_with_ancestor_steps_are_rejected(xpath):
+    with pytest.raises(ValueError, match="can't be streamed"):
+        make_parser(STREAM_SPEC.replace("{xpath}", xpath))
+
+
+@pytest.mark.parametrize("xpath", ["//tr", ".//tr", "tr", "//div[@class='a/b']"])
+def test_single_step_xpaths_are_streamed(xpath):
+    tag, matcher = compile_row_matcher(xpath)
+    assert tag in ("tr", "div")
+
+
+def test_rows_are_streamed_with_their_own_predicates(server, concurrency):
+    server.route("/page", PAGE)
+    output = run_spec(
+        STREAM_SPEC.replace("{xpath}", "//tr[@class='row']"), server, concurrency
+    )
+    assert output == {"rows": [{"n": "1"}, {"n": "2"}, {"n": "3"}]}
+
+
+def test_descendants_with_the_row_tag_are_kept_until_the_row_ends(
+    server, concurrency
+):
+    server.route(
+        "/page",
+        """
+        <html><body><div class="page">
+          <div class="row"><div class="title">A</div><span>1</span></div>
+          <div class="ad">ad</div>
+          <div class="row"><div class="title">B</div><span>2</span></div>
+        </div></body></html>
+        """,
+    )
+    spec = """
+    <request url="{{base_url}}/page"{stream}>
+      <list name="rows" xpath="//div[@class='row']">
+        <item name="t" xpath="./div[@class='title']/text()"></item>
+        <item name="n" xpath="./span/text()"></item>
+      </list>
+    </request>
+    """
+    streamed = run_spec(spec.replace("{stream}", " stream"), server, concurrency)
+    loaded = run_spec(spec.replace("{stream}", ""), server, concurrency)
+    assert streamed == loaded == {"rows": [{"t": "A", "n": "1"}, {"t": "B", "n": "2"}]}
+
+
+def test_json_rows_are_streamed(server, concurrency):
+    server.route("/data", {"results": [{"id": 1}, {"id": 2}], "count": 2})
+    spec = """
+    <request url="{{base_url}}/data" type="json" stream="results">
+      <list name="rows"><item name="id" jsonpath="id"></item></list>
+    </request>
+    """
+    assert run_spec(spec, server, concurrency) == {"rows": [{"id": 1}, {"id": 2}]}
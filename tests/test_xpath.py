@@ -0,0 +1,68 @@
+import pickle
+
+import pytest
+from lxml import etree, html
+
+from htms.HTMSLParser import HTMSParser
+from htms.tags.ItemTag import ItemTag
+
+from conftest import run_spec, table_route
+
+DOC = html.fromstring(
+    "<html><body><h1> Title </h1><ul><li>a</li><li>b</li></ul></body></html>"
+)
+
+
+def test_xpath_is_compiled_once():
+    item = ItemTag.from_attrs({"name": "title", "xpath": "//h1/text()", "strip": ""})
+    assert isinstance(item.compiled_xpath, etree.XPath)
+    assert item.parse(DOC, None) == "Title"
+
+
+def test_list_keeps_all_matches_and_item_the_first():
+    many = ItemTag.from_attrs({"name": "li", "xpath": "//li/text()", "many": True})
+    one = ItemTag.from_attrs({"name": "li", "xpath": "//li/text()"})
+    assert many.parse(DOC, None) == ["a", "b"]
+    assert one.parse(DOC, None) == "a"
+
+
+def test_missing_value_uses_default():
+    item = ItemTag.from_attrs({"name": "x", "xpath": "//h2/text()", "default": "-"})
+    assert item.parse(DOC, None) == "-"
+
+
+def test_compiled_xpath_survives_pickling():
+    item = ItemTag.from_attrs({"name": "title", "xpath": "//h1/text()"})
+    loaded = pickle.loads(pickle.dumps(item))
+    assert isinstance(loaded.compiled_xpath, etree.XPath)
+    assert loaded.parse(DOC, None) == " Title "
+
+
+def test_invalid_xpath_is_reported_with_its_line():
+    parser = HTMSParser()
+    with pytest.raises(ValueError, match="line 3.*Invalid xpath"):
+        parser.feed(
+            '<request url="http://example.com">\n'
+            '  <item name="a" xpath="//h1/text()"></item>\n'
+            '  <item name="b" xpath="//h1[/text()"></item>\n'
+            "</request>"
+        )
+
+
+def test_relative_xpath_of_list_children(server):
+    server.route("/table", table_route(rows=2))
+    output = run_spec(
+        """
+        <request url="{{base_url}}/table">
+          <list name="rows" xpath="//table/tr">
+            <item name="id" xpath="./td[1]/text()"></item>
+            <item name="href" xpath="./td[3]/a/@href"></item>
+          </list>
+        </request>
+        """,
+        server,
+    )
+    assert output["rows"] == [
+        {"id": "1-0", "href": "/detail/1/0"},
+        {"id": "1-1", "href": "/detail/1/1"},
+    ]